@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端對端延遲測試 - 比較兩個程式分開執行與 word_to_ppt run 一次執行的總時間
+
+使用方式：
+    python benchmarks/bench_cli_latency.py [--rounds N] [--exe-dir 目錄]
+
+以 word_to_ppt/input.docx、template.pptx、config.txt 從 Word 文件生成 PPT，每種方式執行 N 次（預設 5）取中位數：
+    - 兩個程式：1_extract 寫出 output.txt，再由 2_generate 讀取並生成（啟動兩次、載入兩次）
+    - run 子指令：word_to_ppt run 在同一個程序內完成（啟動一次，文字區塊直接傳遞）
+
+--exe-dir 指定打包後的執行檔目錄時，比較舊版的 1_extract.exe + 2_generate.exe
+與新版的 word_to_ppt.exe run（onefile 執行檔每次啟動都要解壓縮，差距會更明顯）。
+所有工作都使用 --headless 與獨立的 --workdir，並停用快取。
+"""
+
+import os
+import sys
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DIR = os.path.join(ROOT, 'word_to_ppt')
+
+INPUT = os.path.join(SOURCE_DIR, 'input.docx')
+TEMPLATE = os.path.join(SOURCE_DIR, 'template.pptx')
+CONFIG = os.path.join(SOURCE_DIR, 'config.txt')
+
+
+def commands(exe_dir):
+    """各程式的啟動指令（exe_dir 為 None 時以目前的 Python 執行原始碼）"""
+    if exe_dir:
+        return {
+            'extract': [os.path.join(exe_dir, '1_extract.exe')],
+            'generate': [os.path.join(exe_dir, '2_generate.exe')],
+            'run': [os.path.join(exe_dir, 'word_to_ppt.exe'), 'run'],
+        }
+    return {
+        'extract': [sys.executable, os.path.join(SOURCE_DIR, '1_extract.py')],
+        'generate': [sys.executable, os.path.join(SOURCE_DIR, '2_generate.py')],
+        'run': [sys.executable, os.path.join(SOURCE_DIR, 'word_to_ppt.py'), 'run'],
+    }
+
+
+def execute(command):
+    """執行一個程式（失敗時顯示標準錯誤並結束）"""
+    result = subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        print(result.stderr.decode('utf-8', 'replace'), file=sys.stderr)
+        raise SystemExit(f"❌ 執行失敗（結束碼 {result.returncode}）：{' '.join(command)}")
+
+
+def two_programs(programs, workdir):
+    """1_extract → output.txt → 2_generate"""
+    text_path = os.path.join(workdir, 'output.txt')
+    output_path = os.path.join(workdir, 'output.pptx')
+    execute(programs['extract'] + [INPUT, '--output', text_path, '--config', CONFIG, '--workdir', workdir,
+                                   '--no-cache', '--headless'])
+    execute(programs['generate'] + [TEMPLATE, text_path, CONFIG, output_path, '--workdir', workdir,
+                                    '--no-slide-cache', '--reproducible', '--headless'])
+    return output_path
+
+
+def one_program(programs, workdir):
+    """word_to_ppt run"""
+    output_path = os.path.join(workdir, 'output.pptx')
+    execute(programs['run'] + [INPUT, TEMPLATE, CONFIG, output_path, '--workdir', workdir,
+                               '--no-cache', '--reproducible', '--headless'])
+    return output_path
+
+
+def sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比較兩個程式分開執行與 run 子指令的端對端時間")
+    parser.add_argument('--rounds', type=int, default=5, help="執行次數，取中位數（預設 5）")
+    parser.add_argument('--exe-dir', default=None, help="打包後的執行檔目錄（預設執行原始碼）")
+    args = parser.parse_args()
+    
+    programs = commands(args.exe_dir)
+    flows = [("1_extract + 2_generate", two_programs), ("word_to_ppt run", one_program)]
+    timings = {name: [] for name, _ in flows}
+    outputs = {}
+    
+    tmp = tempfile.mkdtemp(prefix='bench_cli_')
+    try:
+        # 先各執行一次（不計時），讓作業系統快取程式檔與函式庫
+        for name, flow in flows:
+            workdir = os.path.join(tmp, f"warmup_{len(outputs)}")
+            outputs[name] = sha256(flow(programs, workdir))
+        for round_index in range(args.rounds):
+            # 交替執行，避免系統負載的變化只影響其中一種方式
+            for name, flow in flows:
+                workdir = os.path.join(tmp, f"{round_index}_{len(timings[name])}_{flow.__name__}")
+                start = time.perf_counter()
+                flow(programs, workdir)
+                timings[name].append(time.perf_counter() - start)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    
+    print(f"端對端時間（{'執行檔：' + args.exe_dir if args.exe_dir else '原始碼'}，{args.rounds} 次）")
+    print()
+    print(f"{'':<26}{'中位數':>10}{'最快':>10}{'最慢':>10}")
+    print("-" * 56)
+    for name, _ in flows:
+        values = timings[name]
+        print(f"{name:<26}{statistics.median(values) * 1000:>8.0f}ms"
+              f"{min(values) * 1000:>8.0f}ms{max(values) * 1000:>8.0f}ms")
+    print()
+    before = statistics.median(timings[flows[0][0]])
+    after = statistics.median(timings[flows[1][0]])
+    print(f"run 子指令節省 {before - after:.2f} 秒（{1 - after / before:.1%}）")
+    if len(set(outputs.values())) != 1:
+        print("❌ 兩種方式生成的 PPT 不同")
+        return 1
+    print("✅ 兩種方式生成的 PPT 相同")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提取記憶體測試 - 以含大量圖片的大型 docx 測量提取的記憶體峰值
+
+使用方式：
+    python benchmarks/bench_extract_memory.py [--size-mb N] [--max-rss-mb N] [--compare]
+
+以 word_to_ppt/input.docx 為基礎加入 N MB（預設 500）的圖片（與文件關聯，
+模擬掃描檔彙整的講章），在子程序中執行提取並讀取記憶體峰值，
+超過上限（預設 100 MB）時以結束碼 1 結束。--compare 另外測量 python-docx 開啟同一份文件。
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import zipfile
+import argparse
+import tempfile
+import contextlib
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'word_to_ppt'))
+
+from docx_stream import peak_memory_mb  # noqa: E402
+
+
+IMAGE_MB = 8
+IMAGE_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/image'
+PNG_HEADER = b'\x89PNG\r\n\x1a\n'
+
+
+def build_docx(path, size_mb):
+    """以 input.docx 加入 size_mb MB 的圖片（無法壓縮的隨機內容）"""
+    count = max(1, size_mb // IMAGE_MB)
+    image = PNG_HEADER + os.urandom(IMAGE_MB * 1024 * 1024)
+    rels = ''.join(f'<Relationship Id="rIdScan{i}" Type="{IMAGE_REL}" Target="media/scan{i}.png"/>'
+                   for i in range(1, count + 1))
+    
+    with zipfile.ZipFile(os.path.join(ROOT, 'word_to_ppt', 'input.docx')) as src, \
+            zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            data = src.read(item)
+            if item.filename == 'word/_rels/document.xml.rels':
+                data = data.replace(b'</Relationships>', rels.encode('utf-8') + b'</Relationships>')
+            elif item.filename == '[Content_Types].xml' and b'Extension="png"' not in data:
+                data = data.replace(b'<Override', b'<Default Extension="png" ContentType="image/png"/><Override', 1)
+            dst.writestr(item.filename, data)
+        for i in range(1, count + 1):
+            dst.writestr(zipfile.ZipInfo(f'word/media/scan{i}.png'), image, compress_type=zipfile.ZIP_STORED)
+
+
+def run_child(mode, path):
+    """子程序：執行一次提取，輸出記憶體峰值（JSON）"""
+    start = time.perf_counter()
+    blocks = None
+    if mode == 'stream':
+        import stages
+        extractor = stages.extract_stage().BlueTextExtractor()
+        with contextlib.redirect_stdout(io.StringIO()):
+            extractor.extract_from_docx(path)
+        blocks = len(extractor.extracted_text)
+    else:
+        from docx import Document
+        Document(path)
+    print(json.dumps({'peak_mb': peak_memory_mb(), 'seconds': time.perf_counter() - start, 'blocks': blocks}))
+
+
+def measure(mode, path):
+    """在新的程序中測量（記憶體峰值不受本程序影響）"""
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, path],
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="測量大型 docx 提取的記憶體峰值")
+    parser.add_argument('--size-mb', type=int, default=500, help="加入的圖片大小（預設 500 MB）")
+    parser.add_argument('--max-rss-mb', type=float, default=100, help="記憶體峰值上限（預設 100 MB）")
+    parser.add_argument('--compare', action='store_true', help="同時測量 python-docx 開啟文件")
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        run_child(*args.child)
+        return 0
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'large.docx')
+        build_docx(path, args.size_mb)
+        print(f"測試文件：{os.path.getsize(path) / 1024 / 1024:.0f} MB")
+        print()
+        print(f"{'讀取方式':<20}{'記憶體峰值':>12}{'時間':>10}")
+        print("-" * 44)
+        
+        modes = [('串流提取', 'stream')] + ([('python-docx 開啟', 'python-docx')] if args.compare else [])
+        results = {}
+        for name, mode in modes:
+            results[mode] = measure(mode, path)
+            print(f"{name:<20}{results[mode]['peak_mb']:>10.1f}MB{results[mode]['seconds']:>9.2f}s")
+    
+    peak = results['stream']['peak_mb']
+    if peak > args.max_rss_mb:
+        print(f"\n❌ 記憶體峰值 {peak:.1f} MB 超過上限 {args.max_rss_mb:.0f} MB")
+        return 1
+    print(f"\n✅ 記憶體峰值 {peak:.1f} MB（上限 {args.max_rss_mb:.0f} MB）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+run 合併測試 - 比較 Word 拆碎的 run 合併前後需要判斷顏色的 run 數量與提取時間
+
+使用方式：
+    python benchmarks/bench_run_coalescing.py [--repeat N] [--rounds N]
+
+以 word_to_ppt/input.docx 的本文重複 N 次（預設 200），再把每個 run 拆成逐字的 run
+（加上修訂記錄 ID 與拼字檢查標記，模擬 Word 實際存檔的結果），測量：
+    - 合併前後的 run 數量
+    - 顏色判斷（extract_from_paragraph）的時間（合併後的時間包含合併本身）
+    - 拆碎的文件與原本的文件提取結果是否相同（舊的做法會在中文字之間多出空白）
+"""
+
+import os
+import sys
+import io
+import time
+import zipfile
+import argparse
+import tempfile
+import contextlib
+from copy import deepcopy
+from lxml import etree
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'word_to_ppt'))
+
+import stages  # noqa: E402
+from docx_stream import W_NS, iter_paragraphs, coalesce_runs  # noqa: E402
+
+
+def w(tag):
+    return f'{{{W_NS}}}{tag}'
+
+
+def fragment_runs(body):
+    """把本文每個只有文字的 run 拆成逐字的 run（每個 run 有不同的修訂記錄 ID）"""
+    rsid = 0
+    for p in body.iter(w('p')):
+        for r in list(p.iterchildren(w('r'))):
+            texts = r.findall(w('t'))
+            if len(texts) != 1 or len(r) > 2 or len(texts[0].text or '') < 2:
+                continue
+            rpr = r.find(w('rPr'))
+            index = p.index(r)
+            p.remove(r)
+            for offset, char in enumerate(texts[0].text):
+                if offset % 4 == 2:
+                    proof = etree.Element(w('proofErr'))
+                    proof.set(w('type'), 'spellStart')
+                    p.insert(index, proof)
+                    index += 1
+                rsid += 1
+                run = etree.Element(w('r'))
+                run.set(w('rsidR'), f"{rsid:08X}")
+                if rpr is not None:
+                    run.append(deepcopy(rpr))
+                t = etree.SubElement(run, w('t'))
+                t.text = char
+                t.set('{http://www.w3.org/XML/1998/namespace}space', 'preserve')
+                p.insert(index, run)
+                index += 1
+
+
+def build_docx(path, repeat, fragment):
+    """以 input.docx 的本文重複 repeat 次建立測試文件（fragment 為 True 時拆碎 run）"""
+    with zipfile.ZipFile(os.path.join(ROOT, 'word_to_ppt', 'input.docx')) as src, \
+            zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            data = src.read(item)
+            if item.filename == 'word/document.xml':
+                root = etree.fromstring(data)
+                body = root.find(w('body'))
+                section = body.find(w('sectPr'))
+                content = [child for child in body if child is not section]
+                for _ in range(repeat - 1):
+                    for child in content:
+                        if section is not None:
+                            section.addprevious(deepcopy(child))
+                        else:
+                            body.append(deepcopy(child))
+                if fragment:
+                    fragment_runs(body)
+                data = etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+            dst.writestr(item, data)
+
+
+def old_join(extractor, paragraph):
+    """舊的做法：每個藍色 run 去除空白後以空白連接"""
+    texts = [run.text.strip() for run in paragraph.runs
+             if run.color is not None and extractor.is_blue(run.color) and run.text.strip()]
+    return ' '.join(texts) if texts else None
+
+
+def extract(path):
+    """提取文件的藍色文字"""
+    extractor = stages.extract_stage().BlueTextExtractor()
+    with contextlib.redirect_stdout(io.StringIO()):
+        extractor.extract_from_docx(path)
+    return extractor.extracted_text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比較 run 合併前後的 run 數量與提取時間")
+    parser.add_argument('--repeat', type=int, default=200, help="本文重複次數（預設 200）")
+    parser.add_argument('--rounds', type=int, default=5, help="計時次數，取最快（預設 5）")
+    args = parser.parse_args()
+
+    extractor = stages.extract_stage().BlueTextExtractor()
+    with tempfile.TemporaryDirectory() as tmp:
+        original_path = os.path.join(tmp, 'original.docx')
+        fragmented_path = os.path.join(tmp, 'fragmented.docx')
+        build_docx(original_path, args.repeat, fragment=False)
+        build_docx(fragmented_path, args.repeat, fragment=True)
+
+        paragraphs = list(iter_paragraphs(fragmented_path))
+        raw_runs = sum(len(paragraph.runs) for paragraph in paragraphs)
+        coalesced = [coalesce_runs(paragraph) for paragraph in paragraphs]
+        merged_runs = sum(len(paragraph.runs) for paragraph in coalesced)
+
+        def classify_raw():
+            return [extractor.extract_from_paragraph(paragraph) for paragraph in paragraphs]
+
+        def classify_coalesced():
+            return [extractor.extract_from_paragraph(coalesce_runs(paragraph)) for paragraph in paragraphs]
+
+        timings = {}
+        for name, function in (('raw', classify_raw), ('coalesced', classify_coalesced)):
+            best = None
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                function()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+
+        spaced = sum(1 for paragraph in paragraphs
+                     if old_join(extractor, paragraph) != extractor.extract_from_paragraph(paragraph))
+        same = extract(original_path) == extract(fragmented_path)
+
+    print(f"測試文件：{len(paragraphs)} 段（本文重複 {args.repeat} 次，run 拆成逐字）")
+    print()
+    print(f"{'':<16}{'run 數量':>12}{'顏色判斷時間':>16}")
+    print("-" * 46)
+    print(f"{'合併前':<16}{raw_runs:>12}{timings['raw'] * 1000:>14.1f}ms")
+    print(f"{'合併後':<16}{merged_runs:>12}{timings['coalesced'] * 1000:>14.1f}ms")
+    print()
+    print(f"需要判斷的 run 減少 {1 - merged_runs / raw_runs:.1%}（{raw_runs} → {merged_runs}）")
+    print(f"舊的做法會多出空白的段落：{spaced} 段")
+    if not same:
+        print("❌ 拆碎的文件與原本的文件提取結果不同")
+        return 1
+    print("✅ 拆碎的文件與原本的文件提取結果相同")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+儲存效能測試 - 比較不同壓縮方式的儲存時間與檔案大小
+
+使用方式：
+    python benchmarks/bench_save.py [--repeat N] [--rounds N]
+
+以 word_to_ppt/template.pptx、config.txt、output.txt 產生簡報，
+內容區塊重複 N 次模擬大型簡報，再以各種壓縮方式儲存並計時。
+"""
+
+import os
+import sys
+import io
+import time
+import argparse
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'word_to_ppt'))
+
+import stages  # noqa: E402
+from package_writer import save_presentation  # noqa: E402
+
+
+# (名稱, save_presentation 參數)
+STRATEGIES = [
+    ("python-pptx 預設", {}),
+    ("deflate 1", {'compress_level': 1}),
+    ("deflate 6", {'compress_level': 6}),
+    ("deflate 9", {'compress_level': 9}),
+    ("媒體直接存入 + deflate 1", {'store_media': True, 'compress_level': 1}),
+    ("媒體直接存入 + deflate 6", {'store_media': True, 'compress_level': 6}),
+    ("可重現輸出", {'reproducible': True}),
+]
+
+
+def build_deck(repeat):
+    """產生測試用簡報（內容區塊重複 repeat 次）"""
+    base = os.path.join(ROOT, 'word_to_ppt')
+    generator = stages.generate_stage().PPTGeneratorV2(os.path.join(base, 'template.pptx'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator.load_config(os.path.join(base, 'config.txt'))
+        generator.load_variables_and_content(os.path.join(base, 'output.txt'))
+        generator.content_lines = generator.content_lines * repeat
+        specs = generator.plan_slides()
+        generator._render_sequential(specs, list(range(1, len(specs) + 1)))
+    return generator.output_prs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比較不同壓縮方式的儲存時間與檔案大小")
+    parser.add_argument('--repeat', type=int, default=10, help="內容區塊重複次數（預設 10）")
+    parser.add_argument('--rounds', type=int, default=5, help="每種方式儲存次數，取最快（預設 5）")
+    args = parser.parse_args()
+    
+    prs = build_deck(args.repeat)
+    print(f"投影片數量：{len(prs.slides)}（內容重複 {args.repeat} 次）")
+    print()
+    print(f"{'壓縮方式':<24}{'儲存時間':>12}{'檔案大小':>14}")
+    print("-" * 50)
+    
+    for name, options in STRATEGIES:
+        best = None
+        for _ in range(args.rounds):
+            buffer = io.BytesIO()
+            start = time.perf_counter()
+            save_presentation(prs, buffer, **options)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        size_kb = len(buffer.getvalue()) / 1024
+        print(f"{name:<24}{best * 1000:>10.1f}ms{size_kb:>12.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,26 +5,101 @@
 Extract blue text from Word document and convert to PPT format
 """
 
-from docx import Document
-from docx.shared import RGBColor
 import sys
 import os
+import io
+import json
+import hashlib
+import argparse
 import traceback
-from datetime import datetime
+from build_plan import read_target_color, parse_content_text, format_content_text, ConfigError
+from blockfile import write_blockfile
+from cache_store import DiskCache, make_key
+from workspace import atomic_write, enter_workdir, write_error_log
+from events import open_event_stream, EXIT_OK, EXIT_ERROR, EXIT_INVALID
+from docx_stream import iter_paragraphs, paragraphs_from_document, coalesce_runs, peak_memory_mb
+from paragraph_features import (ParagraphFeatures, HAS_TEXT, HAS_RUNS, HAS_SIZE, DATE,
+                                VERSE_MARKER, SCRIPTURE_LABEL, TITLE_STOP, SIZE_TOLERANCE)
+
+
+# 提取邏輯版本（提取結果會改變時遞增，舊的快取就不會再被使用）
+EXTRACTOR_VERSION = 3
+
+# 提取結果快取的預設位置與大小上限
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'extract')
+DEFAULT_CACHE_MB = 64
+
+# output.txt 變數區的預設值（文件中找不到時使用）
+DEFAULT_VARIABLES = {
+    '日期': '2026年1月1日',
+    '禮拜類型': '週三禮拜',
+    '主題': '我是主題',
+    '經文章節': '【箴言27章12節、詩篇46篇1節】',
+}
+DEFAULT_VERSES = ['〈箴言27章12節〉XXXXXXXX。', '〈詩篇46篇1節〉OOOOOOOO。']
+
+
+def read_paragraphs(source):
+    """
+    讀取 Word 文件本文的段落（串流讀取 document.xml，不載入圖片等媒體檔）
+    
+    格式相同的相鄰 run 先合併，之後的顏色判斷與特徵統計只需處理合併後的 run。
+    
+    Args:
+        source: 檔案路徑、file-like 物件、docx 內容（bytes）或已開啟的 Document
+    
+    Returns:
+        list: DocxParagraph 列表
+    """
+    if hasattr(source, 'paragraphs'):
+        return [coalesce_runs(paragraph) for paragraph in paragraphs_from_document(source)]
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return [coalesce_runs(paragraph) for paragraph in iter_paragraphs(source)]
+
+
+def docx_digest(source):
+    """
+    docx 內容的 SHA-256（檔案分段讀取，不會整份載入記憶體）
+    
+    Args:
+        source: 檔案路徑、file-like 物件或 bytes
+    
+    Returns:
+        bytes: 雜湊值
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray)):
+        digest.update(source)
+        return digest.digest()
+    
+    f = source if hasattr(source, 'read') else open(source, 'rb')
+    try:
+        position = f.tell()
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+        # file-like 物件讀完後回到原位置，之後還要讀取內容
+        f.seek(position)
+    finally:
+        if f is not source:
+            f.close()
+    return digest.digest()
 
 
 class BlueTextExtractor:
     """特定顏色文字提取器"""
     
-    def __init__(self, target_color=None, tolerance=50):
+    def __init__(self, target_color=None, tolerance=50, cache=None):
         """
         初始化提取器
         
         Args:
             target_color: 目標顏色 (r, g, b) 或 "#RRGGBB"，預設為藍色
             tolerance: 顏色容差（0-255）
+            cache: 提取結果快取（DiskCache，可選）
         """
         self.tolerance = tolerance
+        self.cache = cache
         self.extracted_text = []
         self.variables = {}  # 儲存自動提取的變數
         
@@ -45,7 +120,7 @@ class BlueTextExtractor:
         判斷顏色是否為目標顏色（在容差範圍內）
         
         Args:
-            rgb: RGBColor 物件或 tuple (r, g, b)
+            rgb: tuple (r, g, b)（python-docx 的 RGBColor 也是 tuple）
         
         Returns:
             bool: 是否為目標顏色
@@ -54,9 +129,7 @@ class BlueTextExtractor:
             return False
         
         # 獲取 RGB 值
-        if isinstance(rgb, RGBColor):
-            r, g, b = rgb
-        elif isinstance(rgb, tuple) and len(rgb) == 3:
+        if isinstance(rgb, tuple) and len(rgb) == 3:
             r, g, b = rgb
         else:
             return False
@@ -77,116 +150,119 @@ class BlueTextExtractor:
         從段落中提取藍色文字
         
         Args:
-            paragraph: docx 段落物件
+            paragraph: DocxParagraph 段落
         
         Returns:
-            str: 提取的藍色文字（如果有）
+            str: 提取的藍色文字（如果有）；相鄰的藍色 run 直接相接（中文不會多出空白），
+                 被其他顏色文字隔開的藍色文字以空白分隔
         """
-        blue_text = []
+        segments = []
+        current = []
         
         for run in paragraph.runs:
-            # 檢查文字顏色
-            if run.font.color and run.font.color.type == 1:  # RGB 顏色
-                rgb = run.font.color.rgb
-                if self.is_blue(rgb):
-                    text = run.text.strip()
-                    if text:
-                        blue_text.append(text)
-        
+            if not run.text:
+                # 沒有文字的 run 不會隔開前後的藍色文字
+                continue
+            # 檢查文字顏色（只有 RGB 顏色）
+            if run.color is not None and self.is_blue(run.color):
+                current.append(run.text)
+            elif current:
+                segments.append(''.join(current))
+                current = []
+        if current:
+            segments.append(''.join(current))
+        
+        blue_text = [text.strip() for text in segments if text.strip()]
         return ' '.join(blue_text) if blue_text else None
     
     def extract_variables(self, docx_path):
-        """自動提取文件變數（日期、禮拜類型、主題、經文）"""
+        """
+        自動提取文件變數（日期、禮拜類型、主題、經文）
+        
+        Args:
+            docx_path: 檔案路徑、docx 內容（bytes）、已開啟的 Document 或 DocxParagraph 列表
+        """
         import re
         
-        doc = Document(docx_path)
-        date = "2026年1月1日"
-        service_type = "週三禮拜"
-        title = "我是主題"
-        verse_refs = "【箴言27章12節、詩篇46篇1節】"
+        paragraphs = docx_path if isinstance(docx_path, list) else read_paragraphs(docx_path)
+        # 每段的字體大小、標記等只計算一次，以下的偵測都是查詢這個特徵表
+        features = ParagraphFeatures(paragraphs)
+        date = DEFAULT_VARIABLES['日期']
+        service_type = DEFAULT_VARIABLES['禮拜類型']
+        title = DEFAULT_VARIABLES['主題']
+        verse_refs = DEFAULT_VARIABLES['經文章節']
         verses = []
         
-        # 1. 提取日期和禮拜類型
-        for para in doc.paragraphs:
-            text = para.text.strip()
-            if '年' in text and '月' in text and '日' in text:
-                date_match = re.search(r'(\d{4}年\d{1,2}月\d{1,2}日)', text)
-                if date_match:
-                    date = date_match.group(1)
-                
-                if '週' in text or '禮拜' in text:
-                    for day in ['週一', '週二', '週三', '週四', '週五', '週六', '主日', '週日']:
-                        if day in text:
-                            service_type = f"{day}禮拜" if day != '主日' else '主日禮拜'
-                            break
-                break
+        # 1. 提取日期和禮拜類型（第一個包含年、月、日的段落）
+        date_index = features.find(DATE)
+        if date_index is not None:
+            text = features.texts[date_index]
+            date_match = re.search(r'(\d{4}年\d{1,2}月\d{1,2}日)', text)
+            if date_match:
+                date = date_match.group(1)
+            
+            if '週' in text or '禮拜' in text:
+                for day in ['週一', '週二', '週三', '週四', '週五', '週六', '主日', '週日']:
+                    if day in text:
+                        service_type = f"{day}禮拜" if day != '主日' else '主日禮拜'
+                        break
         
-        # 2. 提取主題（使用字體大小分析）
+        # 2. 提取主題（日期之後、字體比內文大的段落；內文大小取文件中字數最多的字體大小）
         title_lines = []
+        body_size = features.body_size()
         found_date = False
         
-        for para in doc.paragraphs:
-            text = para.text.strip()
-            if not text:
+        for i in range(len(features)):
+            if not features.has(i, HAS_TEXT):
                 continue
             
             # 跳過日期行
-            if '年' in text and '月' in text and '日' in text:
+            if features.has(i, DATE):
                 found_date = True
                 continue
             
-            # 遇到這些關鍵字就停止
-            if any(keyword in text for keyword in ['經文:', '經文：', '〈', '【']):
+            # 遇到經文標籤、〈、【就停止
+            if features.has(i, TITLE_STOP):
                 break
             
             # 只在找到日期之後才開始收集主題
             if found_date:
-                # 檢查字體大小
-                if para.runs:
-                    sizes = [r.font.size.pt for r in para.runs if r.font.size]
-                    if sizes:
-                        avg_size = sum(sizes) / len(sizes)
-                        if avg_size > 16 or len(title_lines) < 2:
-                            title_lines.append(text)
-                else:
+                if features.has(i, HAS_SIZE):
+                    if features.size[i] > body_size + SIZE_TOLERANCE or len(title_lines) < 2:
+                        title_lines.append(features.texts[i])
+                elif not features.has(i, HAS_RUNS):
                     if len(title_lines) < 2:
-                        title_lines.append(text)
+                        title_lines.append(features.texts[i])
         
         if title_lines:
             title = '\n'.join(title_lines[:3])
         
-        # 3. 提取經文（只提取「經文：」後面的 17pt 字體經文）
-        found_jingwen = False
+        # 3. 提取經文（「經文：」之後、與第一段〈章節〉經文字體大小相同的連續段落）
         verse_list = []
-        
-        for para in doc.paragraphs:
-            text = para.text.strip()
-            if not text:
-                continue
-            
-            # 找到「經文:」標記
-            if '經文:' in text or '經文：' in text:
-                found_jingwen = True
-                continue
-            
-            # 在「經文:」之後
-            if found_jingwen:
-                # 檢查字體大小（必須是 17pt）
-                if para.runs:
-                    sizes = [r.font.size.pt for r in para.runs if r.font.size]
-                    if sizes:
-                        # 檢查是否所有字體都是 17pt
-                        if all(abs(s - 17.0) < 0.5 for s in sizes):  # 容許 ±0.5pt 誤差
-                            # 檢查是否為經文格式
-                            if text.startswith('〈') and '〉' in text:
-                                verse_ref = text.split('〉')[0].lstrip('〈')
-                                verse_content = text.split('〉', 1)[1].strip() if '〉' in text else ""
-                                
-                                verses.append(f"〈{verse_ref}〉{verse_content}")
-                                verse_list.append(verse_ref)
-                        else:
-                            # 字體不是 17pt，停止提取
-                            break
+        label_index = features.find(SCRIPTURE_LABEL)
+        marker_index = None
+        if label_index is not None:
+            marker_index = features.find(VERSE_MARKER | HAS_SIZE, label_index + 1)
+        
+        if marker_index is not None:
+            verse_size = features.size[marker_index]
+            for i in range(label_index + 1, len(features)):
+                if (not features.has(i, HAS_TEXT) or features.has(i, SCRIPTURE_LABEL)
+                        or not features.has(i, HAS_SIZE)):
+                    continue
+                
+                if not features.is_uniform(i, verse_size):
+                    # 字體大小不同，經文結束
+                    break
+                
+                # 檢查是否為經文格式
+                if features.has(i, VERSE_MARKER):
+                    text = features.texts[i]
+                    verse_ref = text.split('〉')[0].lstrip('〈')
+                    verse_content = text.split('〉', 1)[1].strip()
+                    
+                    verses.append(f"〈{verse_ref}〉{verse_content}")
+                    verse_list.append(verse_ref)
         
         # 組合經文章節
         if verse_list:
@@ -211,16 +287,33 @@ class BlueTextExtractor:
         print(f"  經文數量: {len(verses)}")
     
     def extract_from_docx(self, docx_path):
-        """從 Word 文件中提取所有藍色文字（連續的藍色段落會合併）"""
+        """
+        從 Word 文件中提取所有藍色文字（連續的藍色段落會合併）
+        
+        Args:
+            docx_path: 檔案路徑、docx 內容（bytes）或已開啟的 Document
+        
+        Raises:
+            Exception: 無法讀取文件時
+        """
+        cache_key = None
+        if self.cache is not None and not hasattr(docx_path, 'paragraphs'):
+            cache_key = self.cache_key(docx_digest(docx_path))
+            if self.load_from_cache(cache_key):
+                print(f"♻️  使用快取的提取結果（{len(self.extracted_text)} 段）")
+                return self.extracted_text
+        
         try:
+            # 文件只讀取一次，變數與藍色文字共用
+            paragraphs = read_paragraphs(docx_path)
+            
             # 先提取變數
-            self.extract_variables(docx_path)
+            self.extract_variables(paragraphs)
             
-            doc = Document(docx_path)
             self.extracted_text = []
             current_group = []
             
-            for paragraph in doc.paragraphs:
+            for paragraph in paragraphs:
                 blue_text = self.extract_from_paragraph(paragraph)
                 
                 if blue_text:
@@ -235,11 +328,54 @@ class BlueTextExtractor:
                 merged_text = '\n'.join(current_group)
                 self.extracted_text.append(merged_text)
             
+            if cache_key:
+                self.save_to_cache(cache_key)
             return self.extracted_text
         
         except Exception as e:
             print(f"❌ 讀取文件時發生錯誤: {e}")
-            sys.exit(1)
+            raise
+    
+    def cache_key(self, docx_hash):
+        """
+        提取結果的快取鍵：docx 內容雜湊 + 目標顏色 + 容差 + 提取邏輯版本
+        
+        Args:
+            docx_hash: docx 內容的 SHA-256（docx_digest）
+        """
+        return make_key(
+            docx_hash,
+            '%d,%d,%d' % self.target_color,
+            str(self.tolerance),
+            f"extractor-v{EXTRACTOR_VERSION}",
+        )
+    
+    def load_from_cache(self, cache_key):
+        """
+        從快取載入提取結果（不需要開啟 Word 文件）
+        
+        Returns:
+            bool: 是否命中快取
+        """
+        data = self.cache.get(cache_key)
+        if data is None:
+            return False
+        try:
+            cached = json.loads(data.decode('utf-8'))
+            variables, extracted_text = cached['variables'], cached['extracted_text']
+        except (ValueError, KeyError, TypeError):
+            return False
+        self.variables = variables
+        self.extracted_text = extracted_text
+        return True
+    
+    def save_to_cache(self, cache_key):
+        """將提取結果寫入快取"""
+        data = json.dumps(
+            {'variables': self.variables, 'extracted_text': self.extracted_text},
+            ensure_ascii=False, separators=(',', ':')
+        )
+        self.cache.put(cache_key, data.encode('utf-8'))
     
     def format_for_ppt(self, title="簡報標題"):
         """
@@ -270,6 +406,48 @@ class BlueTextExtractor:
         
         return formatted
     
+    def output_variables(self):
+        """
+        取得寫入 output.txt 的變數（缺少的變數使用預設值，沒有經文時使用範例經文）
+        
+        Returns:
+            dict: 變數字典（依寫入順序）
+        """
+        variables = {key: self.variables.get(key, default) for key, default in DEFAULT_VARIABLES.items()}
+        
+        # 計算經文數量（排除「經文章節」）
+        verse_count = sum(1 for k in self.variables.keys() if k.startswith('經文') and k[2:].isdigit())
+        if verse_count > 0:
+            for i in range(1, verse_count + 1):
+                verse_value = self.variables.get(f'經文{i}', '')
+                if verse_value:  # 只寫入有內容的經文
+                    variables[f'經文{i}'] = verse_value
+        else:
+            # 沒有提取到經文，使用預設值
+            for i, verse_value in enumerate(DEFAULT_VERSES, 1):
+                variables[f'經文{i}'] = verse_value
+        return variables
+    
+    def format_output_text(self):
+        """
+        產生 output.txt 的內容（變數區 + 以空行分隔的藍色文字區塊）
+        
+        Returns:
+            str: 檔案內容
+        """
+        return format_content_text(self.output_variables(), self.extracted_text)
+    
+    def save_to_blockfile(self, output_path):
+        """
+        儲存成區塊檔（內容與 output.txt 相同，可直接跳到任一區塊；可用 blockfile.py 與 output.txt 互轉）
+        
+        Args:
+            output_path: 輸出檔案路徑
+        """
+        variables, content_lines = parse_content_text(self.format_output_text())
+        write_blockfile(output_path, variables, content_lines)
+        print(f"📦 已儲存區塊檔：{output_path}（{len(content_lines)} 個區塊）")
+    
     def save_to_file(self, output_path, title="簡報標題"):
         """
         儲存提取的文字到檔案（包含變數模板）
@@ -283,31 +461,8 @@ class BlueTextExtractor:
             return False
         
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                # 寫入自動提取的變數
-                f.write("[變數]\n")
-                f.write(f"日期={self.variables.get('日期', '2026年1月1日')}\n")
-                f.write(f"禮拜類型={self.variables.get('禮拜類型', '週三禮拜')}\n")
-                f.write(f"主題={self.variables.get('主題', '我是主題')}\n")
-                f.write(f"經文章節={self.variables.get('經文章節', '【箴言27章12節、詩篇46篇1節】')}\n")
-                
-                # 寫入自動提取的經文（如果有的話）
-                # 計算經文數量（排除「經文章節」）
-                verse_count = sum(1 for k in self.variables.keys() if k.startswith('經文') and k[2:].isdigit())
-                if verse_count > 0:
-                    for i in range(1, verse_count + 1):
-                        verse_value = self.variables.get(f'經文{i}', '')
-                        if verse_value:  # 只寫入有內容的經文
-                            f.write(f"經文{i}={verse_value}\n")
-                else:
-                    # 沒有提取到經文，使用預設值
-                    f.write("經文1=〈箴言27章12節〉XXXXXXXX。\n")
-                    f.write("經文2=〈詩篇46篇1節〉OOOOOOOO。\n")
-                f.write("[變數結束]\n\n")
-                
-                # 寫入提取的藍色文字內容
-                for text in self.extracted_text:
-                    f.write(f"{text}\n\n")
+            with atomic_write(output_path, 'w', encoding='utf-8') as f:
+                f.write(self.format_output_text())
             
             print(f"✅ 成功提取 {len(self.extracted_text)} 段藍色文字")
             print(f"📝 已儲存到：{output_path}")
@@ -320,49 +475,51 @@ class BlueTextExtractor:
 
 def main():
     """主程式"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('input', nargs='?', default=None)
+    parser.add_argument('-h', '--help', action='store_true')
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--config', default=None)
+    parser.add_argument('--workdir', default=None)
+    parser.add_argument('--cache-dir', default=None)
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_MB)
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--blockfile', default=None)
+    parser.add_argument('--headless', action='store_true')
+    args = parser.parse_args()
+    
+    # --headless：標準輸出只有 NDJSON 事件，其他訊息改寫到標準錯誤
+    events = open_event_stream(args.headless, "1_extract.py")
+    
+    # 獨立的工作目錄：命令列指定的路徑相對於原本的目錄，預設檔名與 error.log 放在工作目錄中
+    workdir = None
+    if args.workdir:
+        workdir = enter_workdir(args.workdir, args, ('input', 'output', 'config', 'cache_dir', 'blockfile'))
+    
     # 參數 1：輸入 Word 檔案（可選，預設 input.docx）
-    input_file = sys.argv[1] if len(sys.argv) >= 2 else "input.docx"
+    input_file = args.input or "input.docx"
     
-    # 固定輸出檔案為 output.txt
-    output_file = "output.txt"
+    # 輸出檔案（預設 output.txt）
+    output_file = args.output or "output.txt"
+    cache_dir = args.cache_dir or DEFAULT_CACHE_DIR
     
     # 從 config.txt 讀取顏色設定（可選，預設藍色）
     target_color = None
-    config_file = "config.txt"
+    config_file = args.config or "config.txt"
     
     if os.path.exists(config_file):
         try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                in_color_section = False
-                for line in f:
-                    line = line.strip()
-                    
-                    if line == '[顏色設定]':
-                        in_color_section = True
-                        continue
-                    
-                    if line.startswith('[') and line.endswith(']'):
-                        in_color_section = False
-                        continue
-                    
-                    if in_color_section and line.startswith('提取文字顏色'):
-                        if '=' in line:
-                            _, value = line.split('=', 1)
-                            value = value.strip()
-                            
-                            if value.startswith('#'):
-                                target_color = value
-                            else:
-                                rgb = tuple(int(c.strip()) for c in value.split(','))
-                                if len(rgb) == 3:
-                                    target_color = rgb
-                            break
+            # 只讀取顏色設定：其他區段（頁面結構等）的錯誤由生成時回報，不影響提取
+            target_color = read_target_color(config_file)
+        except ConfigError as e:
+            print(f"⚠️  警告：{config_file} 設定有誤: {e}")
+            print(f"    使用預設藍色")
         except Exception as e:
-            print(f"⚠️  警告：讀取 config.txt 時發生錯誤: {e}")
+            print(f"⚠️  警告：讀取 {config_file} 時發生錯誤: {e}")
             print(f"    使用預設藍色")
     
     # 顯示使用說明（如果使用 -h 或 --help 參數）
-    if len(sys.argv) >= 2 and sys.argv[1] in ['-h', '--help', 'help']:
+    if args.help or input_file == 'help':
         print("📖 特定顏色文字提取工具")
         print("=" * 70)
         print()
@@ -372,8 +529,20 @@ def main():
         print("參數說明：")
         print("  Word檔案  - Word 文件路徑（預設：input.docx）")
         print()
-        print("固定設定：")
-        print("  輸出檔案：output.txt（固定）")
+        print("選項：")
+        print(f"  --cache-dir 目錄  - 提取結果快取位置（預設：{DEFAULT_CACHE_DIR}）")
+        print(f"  --cache-size MB   - 快取大小上限（預設：{DEFAULT_CACHE_MB} MB，超過時刪除最久未用的）")
+        print("  --no-cache        - 不使用快取")
+        print("  --blockfile 檔案  - 另外輸出區塊檔（2_generate.py 可直接讀取，可隨機讀取任一區塊）")
+        print("  --output 檔案     - 輸出文字檔（預設：output.txt）")
+        print("  --config 檔案     - 設定檔（預設：config.txt）")
+        print("  --workdir 目錄    - 在獨立的工作目錄中執行：預設檔名、快取與 error.log 都放在此目錄")
+        print("                      （命令列指定的路徑仍相對於目前目錄，可同時執行多個工作）")
+        print("  --headless        - 不等待按鍵，標準輸出改為 NDJSON 進度事件（其他訊息寫到標準錯誤）")
+        print("                      結束碼：0 成功、1 執行錯誤或沒有找到文字、2 參數錯誤")
+        print()
+        print("預設設定：")
+        print("  輸出檔案：output.txt")
         print("  顏色設定：從 config.txt 讀取「提取文字顏色」（預設：藍色）")
         print()
         print("Config 顏色設定範例（在 config.txt 中）：")
@@ -389,6 +558,9 @@ def main():
         print("  python 1_extract.py 20251231.docx")
         print("    → 從 20251231.docx 提取文字，輸出到 output.txt")
         print()
+        print("  python 1_extract.py 20251231.docx --workdir jobs/1231")
+        print("    → 使用 jobs/1231/config.txt，輸出到 jobs/1231/output.txt")
+        print()
         print("=" * 70)
         print()
         print("💡 提取完成後，可直接執行：")
@@ -396,16 +568,22 @@ def main():
         print()
         sys.exit(0)
     
+    events.emit('job_start', input=input_file, output=output_file, config=config_file,
+                workdir=workdir or os.getcwd())
+    
     # 檢查輸入檔案是否存在
     if not os.path.exists(input_file):
         print(f"❌ 錯誤：找不到檔案 '{input_file}'")
-        sys.exit(1)
+        events.error(FileNotFoundError(f"找不到檔案 '{input_file}'"))
+        sys.exit(events.job_end(EXIT_INVALID))
     
     # 執行提取
     print("\n" + "="*60)
     print("📖 Word 文字提取工具")
     print("="*60)
     print(f"\n正在分析文件：{input_file}")
+    if workdir:
+        print(f"工作目錄：{workdir}")
     print("請稍候...\n")
     
     if target_color:
@@ -416,8 +594,26 @@ def main():
     else:
         print(f"🎨 目標顏色：藍色（預設）")
     
-    extractor = BlueTextExtractor(target_color=target_color, tolerance=50)
-    extractor.extract_from_docx(input_file)
+    cache = None
+    if not args.no_cache:
+        try:
+            cache = DiskCache(cache_dir, max_bytes=args.cache_size * 1024 * 1024)
+        except OSError as e:
+            print(f"⚠️  無法使用快取目錄 {cache_dir}：{e}")
+    
+    extractor = BlueTextExtractor(target_color=target_color, tolerance=50, cache=cache)
+    try:
+        with events.stage('extract', input=input_file) as result:
+            extractor.extract_from_docx(input_file)
+            result['blocks'] = len(extractor.extracted_text)
+    except Exception as e:
+        events.error(e)
+        events.job_end(EXIT_ERROR)
+        raise
+    
+    peak = peak_memory_mb()
+    if peak is not None:
+        print(f"📈 記憶體峰值：{peak:.1f} MB")
     
     # 顯示提取結果
     if extractor.extracted_text:
@@ -429,26 +625,38 @@ def main():
         print("-" * 50)
     
     # 儲存結果
-    if extractor.save_to_file(output_file):
-        print(f"\n🎉 完成！現在可以執行：")
-        print(f"   2_generate.exe (或 python 2_generate.py)")
-        print(f"\n提示：")
-        print(f"  1. 請先編輯 output.txt 填入變數")
-        print(f"  2. 然後執行 2_generate.exe 生成 PPT")
+    with events.stage('save', output=output_file) as result:
+        saved = extractor.save_to_file(output_file)
+        if saved and args.blockfile:
+            extractor.save_to_blockfile(args.blockfile)
+        result['saved'] = saved
+    if not saved:
+        reason = "沒有找到藍色文字" if not extractor.extracted_text else f"無法儲存 {output_file}"
+        events.error(ValueError(reason), stage='save')
+        sys.exit(events.job_end(EXIT_ERROR))
+    
+    events.emit('output', path=output_file, blocks=len(extractor.extracted_text))
+    if args.blockfile:
+        events.emit('output', path=args.blockfile, blocks=len(extractor.extracted_text))
+    
+    print(f"\n🎉 完成！現在可以執行：")
+    print(f"   2_generate.bat (或 python 2_generate.py)")
+    print(f"\n提示：")
+    print(f"  1. 請先編輯 {output_file} 填入變數")
+    print(f"  2. 然後執行 2_generate.bat 生成 PPT")
+    
+    events.job_end(EXIT_OK)
 
 
 if __name__ == "__main__":
+    # --headless：不等待按鍵，由結束碼與事件串流回報結果
+    headless = '--headless' in sys.argv[1:]
     try:
         main()
     except Exception as e:
-        # 記錄錯誤到檔案
+        # 記錄錯誤到檔案（使用 --workdir 時在工作目錄中）
         try:
-            with open('error.log', 'a', encoding='utf-8') as f:
-                f.write(f"\n{'='*60}\n")
-                f.write(f"錯誤時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"程式: 1_extract.py\n")
-                f.write(f"錯誤訊息: {str(e)}\n")
-                f.write(f"詳細資訊:\n{traceback.format_exc()}\n")
+            write_error_log("1_extract.py", e, traceback.format_exc())
         except:
             pass
         
@@ -459,5 +667,7 @@ if __name__ == "__main__":
         print(f"\n錯誤詳細資訊已記錄到 error.log")
         print(f"請將 error.log 提供給開發者協助除錯")
         print(f"{'='*60}")
+        sys.exit(EXIT_ERROR)
     finally:
-        input("\n按 Enter 鍵退出...")
+        if not headless:
+            input("\n按 Enter 鍵退出...")
@@ -14,158 +14,176 @@ PPT 生成程式 V3 - 基於 template.pptx 的彈性化版本
     - 支援段落間插入主題頁功能
 """
 
+import os
+import io
 import sys
-import re
+import copy
+import time
+import hashlib
+import contextlib
+import argparse
 import traceback
-from datetime import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from lxml import etree
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR, MSO_AUTO_SIZE
+from pptx.enum.dml import MSO_COLOR_TYPE
+from pptx.oxml import parse_xml
+from build_plan import (load_build_plan, check_template, expand_slides, parse_content_text,
+                        parse_slide_range, format_slide_numbers, block_slide_numbers, check_slide_numbers,
+                        split_content_blocks, ConfigError, ArgumentError, SlideSpec, VERSE_PATTERN)
+from package_writer import dedupe_media_parts, save_presentation
+from cache_store import DiskCache, make_key
+from template_analysis import DEFAULT_DESIGNS, load_template_analysis, analysis_problems
+from verse_reference import convert_verse_reference
+from blockfile import read_content
+from workspace import atomic_write, enter_workdir, write_error_log
+from events import EventStream, open_event_stream, EXIT_OK, EXIT_ERROR, EXIT_INVALID
+import exporters
+import stages
+
+
+# 文字框快取版本（文字框產生方式改變時遞增，舊的快取就不會再被使用）
+SLIDE_CACHE_VERSION = 1
+
+# 文字框快取的預設位置與大小上限
+DEFAULT_SLIDE_CACHE_DIR = os.path.join('.cache', 'slides')
+DEFAULT_SLIDE_CACHE_MB = 32
 
 
 class PPTGeneratorV2:
     """PPT 生成器 V2"""
     
-    def __init__(self, template_path, output_path):
+    def __init__(self, template_path, output_path=None):
         """
         初始化 PPT 生成器
         
         Args:
-            template_path: 模板 PPT 路徑（必須包含 4 頁）
-            output_path: 輸出 PPT 路徑
+            template_path: 模板 PPT 路徑（必須包含 5 種內建頁面設計，可另有自訂設計）
+            output_path: 輸出 PPT 路徑（generate() 完成時才寫入；None 表示只在記憶體中生成，例如平行生成的子程序）
         """
-        # 先複製 template 到 output
-        import shutil
-        shutil.copy2(template_path, output_path)
-        
-        # 開啟輸出檔案（包含模板的 4 頁）
-        self.output_prs = Presentation(output_path)
+        # 直接開啟模板（包含模板頁），不先複製到輸出檔：生成失敗時不會覆蓋原本的輸出
+        self.output_prs = Presentation(template_path)
         self.output_path = output_path
+        self.template_path = template_path
         
-        # 確認模板有 5 頁
-        if len(self.output_prs.slides) < 5:
-            raise ValueError(f"模板必須包含至少 5 頁，目前只有 {len(self.output_prs.slides)} 頁")
+        # 模板頁面設計與文字框的角色（依模板雜湊快取，模板未變更時不需重新分析）
+        self.template_analysis = load_template_analysis(template_path)
+        self._bound_shape_cache = {}
         
-        # 注意：不刪除模板頁，稍後生成時會用到
+        # 確認內建頁面設計齊全
+        missing = [kind for kind in DEFAULT_DESIGNS if kind not in self.template_analysis['designs']]
+        if missing:
+            raise ValueError(f"模板缺少頁面設計：{'、'.join(missing)}")
+        
+        # 頁面設計名稱 → 模板頁（生成時只用到版面配置與文字框格式）
+        slides = list(self.output_prs.slides)
+        self.template_slides = {design: slides[index]
+                                for design, index in self.template_analysis['designs'].items()}
+        self._detach_template_slides()
         
         # 變數字典
         self.variables = {}
         # 內容列表
         self.content_lines = []
-        # 頁面結構
+        # 頁面結構（以及套用的生成計畫）
         self.page_structure = []
-        # 記錄需要刪除的模板頁索引
-        self.template_page_count = len(self.output_prs.slides)
+        self.plan = None
         # 一般設定
         self.insert_title_between_paragraphs = False  # 段落間插入主題頁
+        # 可重現輸出（相同模板、設定與輸入產生完全相同的檔案）
+        self.reproducible = False
+        # 儲存時的壓縮方式（XML 壓縮等級、已壓縮媒體直接存入）
+        self.compress_level = None
+        self.store_media = False
+        # 已產生文字框的快取（DiskCache，None 表示不使用）
+        self.slide_cache = None
+        # 只生成部分投影片（投影片編號列表，從 1 開始；None 表示全部）
+        self.slide_numbers = None
+        # 進度事件（--headless 時輸出 NDJSON，預設不輸出）
+        self.events = EventStream()
+        self._template_page_hashes = {}
+    
+    def _detach_template_slides(self):
+        """
+        將模板頁從輸出簡報移除（一次清空投影片清單並移除關聯）
+        
+        模板頁物件仍保留在 self.template_slides 供生成時參考，但已不屬於輸出簡報，
+        儲存時不會寫入，生成結束後也不需要再逐頁刪除。
+        """
+        prs_part = self.output_prs.part
+        sldIdLst = self.output_prs.slides._sldIdLst
+        rIds = [sldId.rId for sldId in sldIdLst]
+        del sldIdLst[:]
+        for rId in rIds:
+            prs_part.drop_rel(rId)
     
     def load_variables_and_content(self, txt_path):
         """
-        從 TXT 檔案讀取變數和內容（使用空行分隔頁面）
+        從 TXT 檔案（使用空行分隔頁面）或區塊檔讀取變數和內容
         
         Args:
-            txt_path: TXT 檔案路徑
+            txt_path: TXT 檔案或區塊檔路徑
         """
-        with open(txt_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        in_variables = False
-        in_content = False
-        current_block = []
+        self._add_variables_and_content(*read_content(txt_path))
+    
+    def parse_variables_and_content(self, text):
+        """
+        解析 output.txt 格式的文字（變數區 + 以空行分隔的內容區塊）
         
-        for line in lines:
-            line = line.rstrip('\n')
-            
-            # 檢查變數區開始
-            if line.strip() == '[變數]':
-                in_variables = True
-                continue
-            
-            # 檢查變數區結束
-            if line.strip() == '[變數結束]':
-                in_variables = False
-                in_content = True
-                continue
-            
-            # 讀取變數
-            if in_variables and '=' in line:
-                key, value = line.split('=', 1)
-                self.variables[key.strip()] = value.strip()
-            
-            # 讀取內容（使用空行分隔不同頁面）
-            elif in_content:
-                if line.strip():
-                    # 有內容的行，加入當前區塊
-                    current_block.append(line.strip())
-                else:
-                    # 空行，表示一個區塊結束
-                    if current_block:
-                        # 將區塊合併成一個項目（用換行符連接）
-                        self.content_lines.append('\n'.join(current_block))
-                        current_block = []
-        
-        # 處理最後一個區塊（如果檔案結尾沒有空行）
-        if current_block:
-            self.content_lines.append('\n'.join(current_block))
+        Args:
+            text: 檔案內容
+        """
+        self._add_variables_and_content(*parse_content_text(text))
+    
+    def _add_variables_and_content(self, variables, content_lines):
+        self.variables.update(variables)
+        self.content_lines.extend(content_lines)
         
         print(f"✅ 讀取變數: {len(self.variables)} 個")
         print(f"✅ 讀取內容區塊: {len(self.content_lines)} 個（用空行分隔）")
     
-    def load_config(self, config_path):
+    def set_variables_and_content(self, variables, blocks):
         """
-        從 config 檔案讀取頁面結構和一般設定
+        直接設定變數和內容區塊（不經過 output.txt）
+        
+        內容區塊的切分與寫入再讀取 output.txt 相同；變數則保留完整內容
+        （output.txt 中多行的變數只會讀到第一行）。
         
         Args:
-            config_path: config 檔案路徑
+            variables: 變數字典
+            blocks: 內容區塊列表（例如 BlueTextExtractor.extracted_text）
         """
-        with open(config_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        for key, value in variables.items():
+            self.variables[key.strip()] = value.strip()
+        self.content_lines.extend(split_content_blocks(blocks))
+    
+    def load_config(self, config_path):
+        """
+        從 config 檔案讀取頁面結構和一般設定（經由生成計畫，雜湊相符時不重新解析）
         
-        in_structure = False
-        in_general_settings = False
+        Args:
+            config_path: config 檔案路徑（或已編譯的 .plan.json）
+        """
+        plan = load_build_plan(config_path, self.template_path)
+        self.apply_build_plan(plan)
+    
+    def apply_build_plan(self, plan):
+        """
+        套用已編譯的生成計畫
         
-        for line in lines:
-            line = line.strip()
-            
-            # 跳過空行和註解
-            if not line or line.startswith('#'):
-                continue
-            
-            # 檢查一般設定區開始
-            if line == '[一般設定]':
-                in_general_settings = True
-                in_structure = False
-                continue
-            
-            # 檢查頁面結構區開始
-            if line == '[頁面結構]':
-                in_structure = True
-                in_general_settings = False
-                continue
-            
-            # 讀取一般設定
-            if in_general_settings and '=' in line:
-                key, value = line.split('=', 1)
-                key = key.strip()
-                value = value.strip()
-                
-                if key == '段落間插入主題頁':
-                    self.insert_title_between_paragraphs = (value == '是')
-                    print(f"✅ 段落間插入主題頁: {'是' if self.insert_title_between_paragraphs else '否'}")
-            
-            # 讀取頁面結構
-            if in_structure:
-                # 解析頁面類型和參數
-                if '=' in line:
-                    parts = line.split('=', 1)
-                    page_type = parts[0].strip()
-                    param = parts[1].strip()
-                    self.page_structure.append((page_type, param))
-                else:
-                    page_type = line.strip()
-                    self.page_structure.append((page_type, None))
+        Args:
+            plan: build_plan.compile_config 產生的生成計畫
+        """
+        self.plan = plan
+        self.insert_title_between_paragraphs = plan['settings']['段落間插入主題頁']
+        print(f"✅ 段落間插入主題頁: {'是' if self.insert_title_between_paragraphs else '否'}")
         
+        self.page_structure = [(page_type, param) for page_type, param in plan['page_structure']]
         print(f"✅ 讀取頁面結構: {len(self.page_structure)} 頁")
     
     def is_verse_format(self, text):
@@ -177,14 +195,12 @@ class PPTGeneratorV2:
         
         Args:
             text: 要判斷的文字
-            
+        
         Returns:
             Match object 如果匹配，否則 None
         """
         # 單行格式：〈章節〉內容
-        pattern = r'^[〈<]([^〉>]+)[〉>](.+)$'
-        match = re.match(pattern, text)
-        return match
+        return VERSE_PATTERN.match(text)
     
     def convert_verse_reference(self, verse_ref):
         """
@@ -194,107 +210,48 @@ class PPTGeneratorV2:
         
         Args:
             verse_ref: 原始章節格式
-            
+        
         Returns:
             轉換後的章節格式
         """
-        # 如果已經包含「章」「節」，直接返回
-        if '章' in verse_ref and '節' in verse_ref:
-            return verse_ref
-        
-        # 轉換簡化格式（例如：創19:17）
-        pattern = r'^([^0-9]+)(\d+):(\d+)$'
-        match = re.match(pattern, verse_ref)
+        return convert_verse_reference(verse_ref)
+    
+    def _bound_shapes(self, kind):
+        """
+        取得模板頁上已指定角色的文字框（依模板分析查表，每種頁面只建立一次）
         
-        if match:
-            book = match.group(1)
-            chapter = match.group(2)
-            verse = match.group(3)
-            
-            # 書卷名稱轉換（如果需要）
-            book_map = {
-                '創': '創世記',
-                '出': '出埃及記',
-                '利': '利未記',
-                '民': '民數記',
-                '申': '申命記',
-                '書': '約書亞記',
-                '士': '士師記',
-                '得': '路得記',
-                '撒上': '撒母耳記上',
-                '撒下': '撒母耳記下',
-                '王上': '列王紀上',
-                '王下': '列王紀下',
-                '代上': '歷代志上',
-                '代下': '歷代志下',
-                '拉': '以斯拉記',
-                '尼': '尼希米記',
-                '斯': '以斯帖記',
-                '伯': '約伯記',
-                '詩': '詩篇',
-                '箴': '箴言',
-                '傳': '傳道書',
-                '歌': '雅歌',
-                '賽': '以賽亞書',
-                '耶': '耶利米書',
-                '哀': '耶利米哀歌',
-                '結': '以西結書',
-                '但': '但以理書',
-                '何': '何西阿書',
-                '珥': '約珥書',
-                '摩': '阿摩司書',
-                '俄': '俄巴底亞書',
-                '拿': '約拿書',
-                '彌': '彌迦書',
-                '鴻': '那鴻書',
-                '哈': '哈巴谷書',
-                '番': '西番雅書',
-                '該': '哈該書',
-                '亞': '撒迦利亞書',
-                '瑪': '瑪拉基書',
-                '太': '馬太福音',
-                '可': '馬可福音',
-                '路': '路加福音',
-                '約': '約翰福音',
-                '徒': '使徒行傳',
-                '羅': '羅馬書',
-                '林前': '哥林多前書',
-                '林後': '哥林多後書',
-                '加': '加拉太書',
-                '弗': '以弗所書',
-                '腓': '腓立比書',
-                '西': '歌羅西書',
-                '帖前': '帖撒羅尼迦前書',
-                '帖後': '帖撒羅尼迦後書',
-                '提前': '提摩太前書',
-                '提後': '提摩太後書',
-                '多': '提多書',
-                '門': '腓利門書',
-                '來': '希伯來書',
-                '雅': '雅各書',
-                '彼前': '彼得前書',
-                '彼後': '彼得後書',
-                '約壹': '約翰一書',
-                '約貳': '約翰二書',
-                '約參': '約翰三書',
-                '猶': '猶大書',
-                '啟': '啟示錄'
-            }
-            
-            full_book = book_map.get(book, book)
-            return f"{full_book}{chapter}章{verse}節"
+        Args:
+            kind: 頁面類型
         
-        return verse_ref
+        Returns:
+            list: (來源形狀, 角色)，依文字框順序
+        """
+        bound = self._bound_shape_cache.get(kind)
+        if bound is None:
+            index = self.template_analysis['designs'][kind]
+            roles = self.template_analysis['slides'][index]['roles']
+            shapes = {shape.shape_id: shape for shape in self.template_slides[kind].shapes}
+            bound = [(shapes[int(shape_id)], role) for shape_id, role in roles.items()
+                     if int(shape_id) in shapes]
+            self._bound_shape_cache[kind] = bound
+        return bound
+    
+    def _bound_shape(self, kind, role):
+        """取得模板頁上指定角色的第一個文字框（沒有時回傳 None）"""
+        for shape, bound_role in self._bound_shapes(kind):
+            if bound_role == role:
+                return shape
+        return None
     
     def create_cover_page(self, subtitle=None):
         """
-        建立封面頁（複製 template 第 1 頁並修改內容）
+        建立封面頁（複製模板的封面頁設計並修改內容）
         
         Args:
             subtitle: 小標題（可選）
         """
-        # 使用模板第 1 頁的版面配置
-        template_slide = self.output_prs.slides[0]
+        # 使用模板「封面頁」設計的版面配置
+        template_slide = self.template_slides['封面頁']
         slide_layout = template_slide.slide_layout
         new_slide = self.output_prs.slides.add_slide(slide_layout)
         
@@ -309,41 +266,36 @@ class PPTGeneratorV2:
             sp.getparent().remove(sp)
         
         # 複製模板頁的所有形狀並修改文字
-        for shape in template_slide.shapes:
-            if hasattr(shape, "text_frame"):
-                # 根據位置判斷是哪個文字框
-                # 文字框1: 日期+禮拜類型 (top ≈ 1.23")
-                # 文字框2: 小標題 (top ≈ 4.30")
-                # 文字框3: 經文章節 (top ≈ 3.40")
-                
-                if abs(shape.top.inches - 1.23) < 0.1:
-                    # 文字框1: 日期+禮拜類型
-                    date = self.variables.get('日期', '')
-                    service_type = self.variables.get('禮拜類型', '')
-                    text = f"{date}\n\n{service_type}"
-                    self._create_textbox_with_format(new_slide, shape, text)
-                
-                elif abs(shape.top.inches - 4.30) < 0.1:
-                    # 文字框2: 小標題（只有在有參數時才顯示）
-                    if subtitle:
-                        self._create_textbox_with_format(new_slide, shape, subtitle)
-                
-                elif abs(shape.top.inches - 3.40) < 0.1:
-                    # 文字框3: 經文章節
-                    verse_refs = self.variables.get('經文章節', '')
-                    self._create_textbox_with_format(new_slide, shape, verse_refs)
+        # 依模板分析的角色直接取得文字框（見 template_analysis）
+        for shape, role in self._bound_shapes('封面頁'):
+            if role == '日期禮拜類型':
+                # 文字框1: 日期+禮拜類型
+                date = self.variables.get('日期', '')
+                service_type = self.variables.get('禮拜類型', '')
+                text = f"{date}\n\n{service_type}"
+                self._create_textbox_with_format(new_slide, shape, text)
+            
+            elif role == '小標題':
+                # 文字框2: 小標題（只有在有參數時才顯示）
+                if subtitle:
+                    self._create_textbox_with_format(new_slide, shape, subtitle)
+            
+            elif role == '經文章節':
+                # 文字框3: 經文章節
+                verse_refs = self.variables.get('經文章節', '')
+                self._create_textbox_with_format(new_slide, shape, verse_refs)
         
         return new_slide
     
     def create_title_page(self, subtitle=None):
         """
-        建立主題頁（複製 template 第 3 頁並修改內容）
+        建立主題頁（複製模板的主題頁設計並修改內容）
         
         Args:
             subtitle: 小標題（可選）
         """
-        # 使用模板第 3 頁的版面配置
-        template_slide = self.output_prs.slides[2]
+        # 使用模板「主題頁」設計的版面配置
+        template_slide = self.template_slides['主題頁']
         slide_layout = template_slide.slide_layout
         new_slide = self.output_prs.slides.add_slide(slide_layout)
         
@@ -358,46 +310,40 @@ class PPTGeneratorV2:
             sp.getparent().remove(sp)
         
         # 複製模板頁的所有形狀並修改文字
-        for shape in template_slide.shapes:
-            if hasattr(shape, "text_frame"):
-                # 文字框1: 日期+禮拜類型 (top ≈ 0.51")
-                # 文字框2: 主題 (top ≈ 1.72")
-                # 文字框3: 經文章節 (top ≈ 3.76")
-                # 文字框4: 小標題 (top ≈ 4.46")
-                
-                if abs(shape.top.inches - 0.51) < 0.1:
-                    # 文字框1: 日期+禮拜類型
-                    date = self.variables.get('日期', '')
-                    service_type = self.variables.get('禮拜類型', '')
-                    text = f"{date} {service_type}"
-                    self._create_textbox_with_format(new_slide, shape, text)
-                
-                elif abs(shape.top.inches - 1.72) < 0.1:
-                    # 文字框2: 主題
-                    title = self.variables.get('主題', '')
-                    self._create_textbox_with_format(new_slide, shape, title)
-                
-                elif abs(shape.top.inches - 3.76) < 0.1:
-                    # 文字框3: 經文章節
-                    verse_refs = self.variables.get('經文章節', '')
-                    self._create_textbox_with_format(new_slide, shape, verse_refs)
-                
-                elif abs(shape.top.inches - 4.46) < 0.1:
-                    # 文字框4: 小標題（只有在有參數時才顯示）
-                    if subtitle:
-                        self._create_textbox_with_format(new_slide, shape, subtitle)
+        for shape, role in self._bound_shapes('主題頁'):
+            if role == '日期禮拜類型':
+                # 文字框1: 日期+禮拜類型
+                date = self.variables.get('日期', '')
+                service_type = self.variables.get('禮拜類型', '')
+                text = f"{date} {service_type}"
+                self._create_textbox_with_format(new_slide, shape, text)
+            
+            elif role == '主題':
+                # 文字框2: 主題
+                title = self.variables.get('主題', '')
+                self._create_textbox_with_format(new_slide, shape, title)
+            
+            elif role == '經文章節':
+                # 文字框3: 經文章節
+                verse_refs = self.variables.get('經文章節', '')
+                self._create_textbox_with_format(new_slide, shape, verse_refs)
+            
+            elif role == '小標題':
+                # 文字框4: 小標題（只有在有參數時才顯示）
+                if subtitle:
+                    self._create_textbox_with_format(new_slide, shape, subtitle)
         
         return new_slide
     
     def create_service_flow_page(self, text):
         """
-        建立禮拜流程頁（複製 template 第 2 頁並修改內容）
+        建立禮拜流程頁（複製模板的禮拜流程頁設計並修改內容）
         
         Args:
             text: 禮拜流程項目文字
         """
-        # 使用模板第 2 頁的版面配置
-        template_slide = self.output_prs.slides[1]
+        # 使用模板「禮拜流程頁」設計的版面配置
+        template_slide = self.template_slides['禮拜流程頁']
         slide_layout = template_slide.slide_layout
         new_slide = self.output_prs.slides.add_slide(slide_layout)
         
@@ -411,24 +357,22 @@ class PPTGeneratorV2:
             sp = shape.element
             sp.getparent().remove(sp)
         
-        # 找到模板頁的第一個文字框並複製
-        for shape in template_slide.shapes:
-            if hasattr(shape, "text_frame"):
-                # 使用模板的位置和大小
-                self._create_textbox_with_format(new_slide, shape, text)
-                break
+        # 找到模板頁的內容文字框並複製（使用模板的位置和大小）
+        source_shape = self._bound_shape('禮拜流程頁', '內容')
+        if source_shape:
+            self._create_textbox_with_format(new_slide, source_shape, text)
         
         return new_slide
     
     def create_content_page(self, text):
         """
-        建立內文頁（複製 template 第 4 頁並修改內容）
+        建立內文頁（複製模板的內容頁設計並修改內容）
         
         Args:
             text: 內容文字
         """
-        # 使用模板第 4 頁的版面配置
-        template_slide = self.output_prs.slides[3]
+        # 使用模板「內容頁」設計的版面配置
+        template_slide = self.template_slides['內容頁']
         slide_layout = template_slide.slide_layout
         new_slide = self.output_prs.slides.add_slide(slide_layout)
         
@@ -442,25 +386,23 @@ class PPTGeneratorV2:
             sp = shape.element
             sp.getparent().remove(sp)
         
-        # 找到模板頁的第一個文字框並複製
-        for shape in template_slide.shapes:
-            if hasattr(shape, "text_frame"):
-                # 使用模板的位置和大小（不要寫死）
-                self._create_textbox_with_format(new_slide, shape, text)
-                break
+        # 找到模板頁的內容文字框並複製（使用模板的位置和大小，不要寫死）
+        source_shape = self._bound_shape('內容頁', '內容')
+        if source_shape:
+            self._create_textbox_with_format(new_slide, source_shape, text)
         
         return new_slide
     
     def create_verse_page(self, verse_ref, verse_text):
         """
-        建立經文頁（複製 template 第 5 頁並修改內容）
+        建立經文頁（複製模板的經文頁設計並修改內容）
         
         Args:
             verse_ref: 經文章節
             verse_text: 經文內容
         """
-        # 使用模板第 5 頁的版面配置
-        template_slide = self.output_prs.slides[4]
+        # 使用模板「經文頁」設計的版面配置
+        template_slide = self.template_slides['經文頁']
         slide_layout = template_slide.slide_layout
         new_slide = self.output_prs.slides.add_slide(slide_layout)
         
@@ -474,12 +416,8 @@ class PPTGeneratorV2:
             sp = shape.element
             sp.getparent().remove(sp)
         
-        # 找到模板頁的第一個文字框
-        source_shape = None
-        for shape in template_slide.shapes:
-            if hasattr(shape, "text_frame"):
-                source_shape = shape
-                break
+        # 找到模板頁的經文文字框
+        source_shape = self._bound_shape('經文頁', '經文')
         
         if source_shape:
             # 使用模板的位置和大小（不要寫死）
@@ -566,6 +504,46 @@ class PPTGeneratorV2:
         
         return new_slide
     
+    def create_design_page(self, design, text=None):
+        """
+        建立模板中自訂設計的頁面（例如聖餐頁、詩歌頁）
+        
+        文字框依模板分析的角色填入：內容、小標題、經文填入參數文字，
+        日期禮拜類型、主題、經文章節填入變數。
+        
+        Args:
+            design: 頁面設計名稱
+            text: 頁面參數（可選）
+        """
+        template_slide = self.template_slides[design]
+        slide_layout = template_slide.slide_layout
+        new_slide = self.output_prs.slides.add_slide(slide_layout)
+        
+        # 刪除從版面配置繼承的空文字框
+        shapes_to_remove = []
+        for shape in new_slide.shapes:
+            if hasattr(shape, "text_frame") and not shape.text.strip():
+                shapes_to_remove.append(shape)
+        
+        for shape in shapes_to_remove:
+            sp = shape.element
+            sp.getparent().remove(sp)
+        
+        for shape, role in self._bound_shapes(design):
+            if role == '日期禮拜類型':
+                date = self.variables.get('日期', '')
+                service_type = self.variables.get('禮拜類型', '')
+                self._create_textbox_with_format(new_slide, shape, f"{date} {service_type}")
+            
+            elif role in ('主題', '經文章節'):
+                self._create_textbox_with_format(new_slide, shape, self.variables.get(role, ''))
+            
+            elif text:
+                # 內容、小標題、經文：只有在有參數時才顯示
+                self._create_textbox_with_format(new_slide, shape, text)
+        
+        return new_slide
+    
     def _create_textbox_with_format(self, slide, source_shape, text):
         """
         創建文字框並複製格式（支援多段落）
@@ -575,6 +553,14 @@ class PPTGeneratorV2:
             source_shape: 來源形狀（用於複製位置和格式）
             text: 要填入的文字
         """
+        # 相同模板頁、相同文字框、相同文字的結果直接從快取取出
+        cache_key = None
+        if self.slide_cache is not None:
+            cache_key = self._textbox_cache_key(source_shape, text)
+            fragment = self.slide_cache.get(cache_key)
+            if fragment is not None:
+                return self._insert_cached_textbox(slide, fragment)
+        
         # 創建新文字框
         new_shape = slide.shapes.add_textbox(
             source_shape.left,
@@ -620,11 +606,45 @@ class PPTGeneratorV2:
                             target_run.font.bold = source_run.font.bold
                         if source_run.font.name:
                             target_run.font.name = source_run.font.name
-                        if source_run.font.color and source_run.font.color.rgb:
+                        if source_run.font.color.type == MSO_COLOR_TYPE.RGB:
                             target_run.font.color.rgb = source_run.font.color.rgb
         
+        if cache_key is not None:
+            self.slide_cache.put(cache_key, etree.tostring(new_shape._element))
+        
         return new_shape
     
+    def _textbox_cache_key(self, source_shape, text):
+        """
+        文字框快取鍵：模板頁內容雜湊 + 來源文字框 ID + 文字
+        
+        Args:
+            source_shape: 來源形狀（模板頁上的文字框）
+            text: 要填入的文字
+        """
+        template_part = source_shape.part
+        page_hash = self._template_page_hashes.get(template_part)
+        if page_hash is None:
+            page_hash = hashlib.sha256(etree.tostring(template_part._element)).hexdigest()
+            self._template_page_hashes[template_part] = page_hash
+        return make_key(str(SLIDE_CACHE_VERSION), page_hash, str(source_shape.shape_id), text)
+    
+    def _insert_cached_textbox(self, slide, fragment):
+        """
+        將快取的文字框 XML 加入投影片（形狀 ID 與名稱依目標投影片重新配置）
+        
+        Args:
+            slide: 目標投影片
+            fragment: 文字框 XML（bytes）
+        """
+        shapes = slide.shapes
+        sp = parse_xml(fragment)
+        shape_id = shapes._next_shape_id
+        sp.nvSpPr.cNvPr.id = shape_id
+        sp.nvSpPr.cNvPr.name = f"TextBox {shape_id - 1}"
+        shapes._spTree.insert_element_before(sp, 'p:extLst')
+        return shapes._shape_factory(sp)
+    
     def _copy_text_format(self, source_shape, target_shape):
         """
         複製文字格式
@@ -652,127 +672,388 @@ class PPTGeneratorV2:
                     target_run.font.bold = source_run.font.bold
                 if source_run.font.name:
                     target_run.font.name = source_run.font.name
-                if source_run.font.color and source_run.font.color.rgb:
+                if source_run.font.color.type == MSO_COLOR_TYPE.RGB:
                     target_run.font.color.rgb = source_run.font.color.rgb
     
-    def generate(self):
+    def plan_slides(self):
         """
-        根據頁面結構生成 PPT
+        將頁面結構展開成逐張投影片的清單
+        
+        Returns:
+            list: SlideSpec 列表
         """
-        content_index = 0  # 追蹤自動內容頁的當前索引
+        return expand_slides(self.page_structure, self.variables, self.content_lines,
+                             self.insert_title_between_paragraphs)
+    
+    def select_slides(self, specs, numbers):
+        """
+        只保留指定編號的投影片，並顯示各投影片來自哪個頁面結構項目
         
-        for page_type, param in self.page_structure:
-            print(f"生成頁面: {page_type}" + (f" = {param}" if param else ""))
-            
-            if page_type == "封面頁":
-                # 封面頁
-                self.create_cover_page(subtitle=param)
-            
-            elif page_type == "主題頁":
-                # 主題頁
-                self.create_title_page(subtitle=param)
-            
-            elif page_type == "內容頁":
-                # 內文頁（固定內容）
-                if param:
-                    self.create_content_page(param)
-            
-            elif page_type == "禮拜流程頁":
-                # 禮拜流程頁（使用 template 第 2 頁樣式）
-                if param:
-                    self.create_service_flow_page(param)
-            
-            elif page_type == "經文頁":
-                # 經文頁（讀取變數區的經文1, 經文2, ...）
-                verse_num = 1
-                while True:
-                    verse_key = f"經文{verse_num}"
-                    if verse_key not in self.variables:
-                        break
-                    
-                    verse_data = self.variables[verse_key]
-                    # 用 〉 分隔章節和內容
-                    if '〉' in verse_data:
-                        verse_ref, verse_text = verse_data.split('〉', 1)
-                        # 移除 < 或 〈 以及緊跟的一個空格（如果有的話）
-                        verse_ref = verse_ref.lstrip('〈<')
-                        if verse_ref.startswith(' '):
-                            verse_ref = verse_ref[1:]
-                        verse_text = verse_text.strip()
-                        
-                        print(f"  生成經文頁 {verse_num}: {verse_ref}")
-                        self.create_verse_page(verse_ref, verse_text)
-                    
-                    verse_num += 1
-            
-            elif page_type == "自動內容頁":
-                # 自動內容頁（從內容區讀取，每個區塊是一頁）
-                first_paragraph = True  # 追蹤是否為第一個段落
-                while content_index < len(self.content_lines):
-                    block = self.content_lines[content_index]
-                    content_index += 1
-                    
-                    # 如果啟用「段落間插入主題頁」且不是第一個段落，先插入主題頁
-                    if self.insert_title_between_paragraphs and not first_paragraph:
-                        print(f"  生成分隔主題頁")
-                        self.create_title_page(subtitle=None)
-                    
-                    first_paragraph = False
-                    
-                    # 檢查區塊的第一行是否為經文格式
-                    lines_in_block = block.split('\n')
-                    first_line = lines_in_block[0] if lines_in_block else ""
-                    
-                    # 檢查是否為經文格式（單行）
-                    verse_match = self.is_verse_format(first_line)
-                    if verse_match:
-                        # 單行經文格式：〈章節〉內容
-                        verse_ref = verse_match.group(1)
-                        verse_text = verse_match.group(2).strip()
-                        print(f"  生成經文頁: {verse_ref}")
-                        self.create_verse_page(verse_ref, verse_text)
-                    elif first_line.startswith('〈') or first_line.startswith('<'):
-                        # 多行經文格式：第一行是章節，後面是內容
-                        verse_ref = first_line.lstrip('〈<')
-                        # 移除開頭的一個空格（如果有的話）
-                        if verse_ref.startswith(' '):
-                            verse_ref = verse_ref[1:]
-                        # 移除結尾的 > 或 〉 以及前面的一個空格（如果有的話）
-                        verse_ref = verse_ref.rstrip('〉>')
-                        if verse_ref.endswith(' '):
-                            verse_ref = verse_ref[:-1]
-                        verse_text = '\n'.join(lines_in_block[1:]) if len(lines_in_block) > 1 else ""
-                        print(f"  生成經文頁: {verse_ref}")
-                        self.create_verse_page(verse_ref, verse_text)
-                    else:
-                        # 一般內容（整個區塊）
-                        print(f"  生成內文頁")
-                        self.create_content_page(block)
-        
-        # 刪除前面的模板頁（5 頁）
-        print(f"\n刪除模板頁...")
-        for i in range(self.template_page_count - 1, -1, -1):
-            rId = self.output_prs.slides._sldIdLst[i].rId
-            self.output_prs.part.drop_rel(rId)
-            del self.output_prs.slides._sldIdLst[i]
+        Args:
+            specs: SlideSpec 列表（完整簡報）
+            numbers: 投影片編號列表（從 1 開始）
+        
+        Returns:
+            list: 選取的 SlideSpec 列表
+        
+        Raises:
+            ValueError: 編號超出範圍
+        """
+        check_slide_numbers(numbers, len(specs))
+        
+        print(f"🔎 部分生成：第 {format_slide_numbers(numbers)} 張（共 {len(specs)} 張）")
+        selected = []
+        for number in sorted(numbers):
+            spec = specs[number - 1]
+            block = f"（內容區塊 {spec.block + 1}）" if spec.block is not None else ""
+            print(f"  第 {number} 張 ← {spec.label}{block}")
+            selected.append(spec)
+        print()
+        return selected
+    
+    def render_slide(self, spec):
+        """
+        依 SlideSpec 建立一張投影片
+        
+        Args:
+            spec: SlideSpec
+        """
+        if spec.kind == "封面頁":
+            return self.create_cover_page(subtitle=spec.args[0])
+        elif spec.kind == "主題頁":
+            return self.create_title_page(subtitle=spec.args[0])
+        elif spec.kind == "內容頁":
+            return self.create_content_page(spec.args[0])
+        elif spec.kind == "禮拜流程頁":
+            return self.create_service_flow_page(spec.args[0])
+        elif spec.kind == "經文頁":
+            return self.create_verse_page(*spec.args)
+        elif spec.kind in self.template_slides:
+            return self.create_design_page(spec.kind, spec.args[0])
+        raise ValueError(f"未知的頁面類型：{spec.kind}")
+    
+    def append_rendered_slide(self, spec, slide_xml):
+        """
+        將已產生的投影片內容加入輸出簡報（依序加入，rId 與投影片 ID 由主程序配置）
+        
+        Args:
+            spec: SlideSpec
+            slide_xml: 投影片 XML（bytes，子程序產生）或 p:sld 元素（同一程序內複製）
+        """
+        template_slide = self.template_slides[spec.kind]
+        new_slide = self.output_prs.slides.add_slide(template_slide.slide_layout)
+        
+        # 以已產生的內容取代新投影片的內容（版面配置關聯維持不變）
+        if isinstance(slide_xml, bytes):
+            rendered = parse_xml(slide_xml)
+        else:
+            rendered = copy.deepcopy(slide_xml)
+        sld = new_slide._element
+        for child in list(sld):
+            sld.remove(child)
+        for child in list(rendered):
+            sld.append(child)
+        return new_slide
+    
+    def _slide_event(self, spec, number, index, total):
+        """輸出投影片已生成的進度事件"""
+        self.events.progress('slide', index, total, number=number, kind=spec.kind, label=spec.label,
+                             block=spec.block + 1 if spec.block is not None else None)
+    
+    def _render_parallel(self, specs, jobs, numbers):
+        """
+        以多個子程序平行產生投影片，再依原順序合併（相同的投影片只產生一次）
+        
+        Args:
+            specs: SlideSpec 列表
+            jobs: 子程序數量
+            numbers: 各投影片在簡報中的編號
+        
+        Returns:
+            int: 直接複製的重複投影片數量
+        """
+        unique_specs = list(dict.fromkeys((spec.kind, spec.args) for spec in specs))
+        
+        # 切成比子程序數量多的區段，讓較慢的區段不會拖住整體
+        chunk_count = min(len(unique_specs), jobs * 4)
+        chunk_size = -(-len(unique_specs) // chunk_count)
+        chunks = [unique_specs[i:i + chunk_size] for i in range(0, len(unique_specs), chunk_size)]
+        print(f"⚡ 平行生成：{jobs} 個程序，{len(chunks)} 個區段")
+        
+        rendered = {}
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            chunk_specs = [[SlideSpec(kind, args, None, None) for kind, args in chunk] for chunk in chunks]
+            cache_options = None
+            if self.slide_cache is not None:
+                cache_options = (self.slide_cache.directory, self.slide_cache.max_bytes)
+            results = executor.map(stages.render_chunk, repeat(self.template_path),
+                                   repeat(self.variables), chunk_specs, repeat(cache_options))
+            for chunk, (slide_xmls, cache_stats) in zip(chunks, results):
+                rendered.update(zip(chunk, slide_xmls))
+                if cache_stats:
+                    # 子程序的快取統計併入主程序
+                    self.slide_cache.hits += cache_stats['hits']
+                    self.slide_cache.misses += cache_stats['misses']
+                    self.slide_cache.evictions += cache_stats['evictions']
+        
+        for index, (spec, number) in enumerate(zip(specs, numbers), 1):
+            print(f"生成頁面: {spec.label}")
+            self.append_rendered_slide(spec, rendered[(spec.kind, spec.args)])
+            self._slide_event(spec, number, index, len(specs))
+        return len(specs) - len(unique_specs)
+    
+    def _render_sequential(self, specs, numbers):
+        """
+        依序產生投影片（相同的投影片只產生一次，之後直接複製）
+        
+        Args:
+            specs: SlideSpec 列表
+            numbers: 各投影片在簡報中的編號
+        
+        Returns:
+            int: 直接複製的重複投影片數量
+        """
+        rendered = {}
+        cloned = 0
+        for index, (spec, number) in enumerate(zip(specs, numbers), 1):
+            print(f"生成頁面: {spec.label}")
+            key = (spec.kind, spec.args)
+            if key in rendered:
+                self.append_rendered_slide(spec, rendered[key])
+                cloned += 1
+            else:
+                rendered[key] = self.render_slide(spec)._element
+            self._slide_event(spec, number, index, len(specs))
+        return cloned
+    
+    def build(self, jobs=1):
+        """
+        根據頁面結構產生投影片（設定 slide_numbers 時只產生指定的投影片，不儲存）
+        
+        Args:
+            jobs: 平行生成的程序數量（1 表示依序生成）
+        """
+        specs = self.plan_slides()
+        numbers = list(range(1, len(specs) + 1))
+        if self.slide_numbers is not None:
+            specs = self.select_slides(specs, self.slide_numbers)
+            numbers = sorted(self.slide_numbers)
+        
+        if jobs > 1 and len(specs) > 1:
+            cloned = self._render_parallel(specs, jobs, numbers)
+        else:
+            cloned = self._render_sequential(specs, numbers)
+        if cloned:
+            print(f"\n♻️  重複投影片 {cloned} 張，直接複製已產生的內容")
+        if self.slide_cache is not None:
+            stats = self.slide_cache.stats()
+            if stats['hits'] or stats['misses']:
+                print(f"🗂️  文字框快取：命中 {stats['hits']}、未命中 {stats['misses']}"
+                      f"（命中率 {stats['hit_rate']:.0%}，淘汰 {stats['evictions']}）")
+        
+        # 合併重複的媒體檔
+        merged, saved_bytes = dedupe_media_parts(self.output_prs)
+        if merged:
+            print(f"♻️  合併重複媒體 {merged} 個，節省 {saved_bytes / 1024:.1f} KB")
+    
+    def save(self, pkg_file):
+        """
+        儲存簡報（依 reproducible、compress_level、store_media 設定）
+        
+        Args:
+            pkg_file: 輸出路徑或 file-like 物件
+        """
+        if isinstance(pkg_file, (str, os.PathLike)):
+            # 寫入暫存檔後才改名，其他程序不會讀到寫一半的簡報
+            with atomic_write(pkg_file) as f:
+                self.save(f)
+            return
+        save_presentation(self.output_prs, pkg_file, reproducible=self.reproducible,
+                          compress_level=self.compress_level, store_media=self.store_media)
+    
+    def export(self, path):
+        """
+        輸出 JSON 投影片清單（.json）或 HTML 投影片（其他副檔名），不經過 python-pptx
+        
+        Args:
+            path: 輸出路徑
+        
+        Returns:
+            dict: 投影片清單
+        """
+        return exporters.export(self.template_path, self.plan, self.variables, self.content_lines, path)
+    
+    def generate(self, jobs=1):
+        """
+        根據頁面結構生成 PPT 並儲存到輸出路徑
+        
+        Args:
+            jobs: 平行生成的程序數量（1 表示依序生成）
+        """
+        with self.events.stage('build', jobs=jobs) as result:
+            self.build(jobs=jobs)
+            result['slides'] = len(self.output_prs.slides)
         
         # 儲存 PPT
-        self.output_prs.save(self.output_path)
+        with self.events.stage('save', output=self.output_path):
+            self.save(self.output_path)
         print(f"\n✅ PPT 生成完成！")
         print(f"📊 總共生成 {len(self.output_prs.slides)} 張投影片")
         print(f"💾 已儲存到：{self.output_path}")
+        sha256 = None
+        if self.reproducible:
+            with open(self.output_path, 'rb') as f:
+                sha256 = hashlib.sha256(f.read()).hexdigest()
+            print(f"🔑 SHA-256：{sha256}")
+        self.events.emit('output', path=self.output_path, template=self.template_path,
+                         slides=len(self.output_prs.slides), sha256=sha256)
+
+
+def render_slides_xml(template_path, variables, specs, cache_options=None):
+    """
+    在記憶體中依模板產生投影片，回傳每張投影片的 XML（供平行生成的子程序使用）
+    
+    Args:
+        template_path: 模板 PPT 路徑
+        variables: 變數字典
+        specs: SlideSpec 列表
+        cache_options: 文字框快取的 (目錄, 大小上限)，None 表示不使用快取
+    
+    Returns:
+        tuple: (每張投影片的 XML（bytes）列表, 快取統計（未使用快取時為 None）)
+    """
+    generator = PPTGeneratorV2(template_path)
+    generator.variables = variables
+    if cache_options:
+        generator.slide_cache = DiskCache(*cache_options)
+    slide_xmls = [etree.tostring(generator.render_slide(spec)._element) for spec in specs]
+    cache_stats = generator.slide_cache.stats() if generator.slide_cache is not None else None
+    return slide_xmls, cache_stats
+
+
+def render_template(template_path, output_path, plan, variables, content_lines, options):
+    """
+    以另一個模板生成同一份內容並儲存（多模板生成的子程序工作函式，不顯示生成過程）
+    
+    Args:
+        template_path: 模板 PPT 路徑
+        output_path: 輸出 PPT 路徑
+        plan: 生成計畫
+        variables: 變數字典
+        content_lines: 內容區塊列表（已切分）
+        options: reproducible、compress_level、store_media、cache_options、slide_numbers
+    
+    Returns:
+        dict: 生成結果（template、output、slides、seconds、sha256）
+    """
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator = PPTGeneratorV2(template_path)
+        generator.output_path = output_path
+        generator.reproducible = options.get('reproducible', False)
+        generator.compress_level = options.get('compress_level')
+        generator.store_media = options.get('store_media', False)
+        generator.slide_numbers = options.get('slide_numbers')
+        if options.get('cache_options'):
+            generator.slide_cache = DiskCache(*options['cache_options'])
+        generator.apply_build_plan(plan)
+        generator.variables = dict(variables)
+        generator.content_lines = list(content_lines)
+        generator.build()
+        generator.save(output_path)
+    return render_result(generator, time.perf_counter() - start)
+
+
+def render_result(generator, seconds):
+    """整理一份輸出的生成結果"""
+    sha256 = None
+    if generator.reproducible:
+        with open(generator.output_path, 'rb') as f:
+            sha256 = hashlib.sha256(f.read()).hexdigest()
+    return {
+        'template': generator.template_path,
+        'output': generator.output_path,
+        'slides': len(generator.output_prs.slides),
+        'seconds': seconds,
+        'sha256': sha256,
+    }
+
+
+def parse_render_target(value, output_path):
+    """
+    解析 --render 參數
+    
+    Args:
+        value: 「模板」或「模板=輸出」
+        output_path: 主要輸出路徑（沒有指定輸出時用來組成檔名）
+    
+    Returns:
+        tuple: (模板路徑, 輸出路徑)；未指定輸出時為「輸出_模板名稱.pptx」
+    """
+    if '=' in value:
+        template_path, target_output = (part.strip() for part in value.split('=', 1))
+    else:
+        template_path, target_output = value.strip(), None
+    if not target_output:
+        stem = os.path.splitext(output_path)[0]
+        target_output = f"{stem}_{os.path.splitext(os.path.basename(template_path))[0]}.pptx"
+    return template_path, target_output
+
+
+def absolute_render_target(value):
+    """--render 參數中的路徑轉成絕對路徑（切換工作目錄前使用）"""
+    template_path, _, target_output = value.partition('=')
+    template_path = os.path.abspath(template_path.strip())
+    if target_output.strip():
+        return f"{template_path}={os.path.abspath(target_output.strip())}"
+    return template_path
 
 
 def main():
     """主程式"""
-    # 使用預設值
-    template_path = sys.argv[1] if len(sys.argv) >= 2 else "template.pptx"
-    input_path = sys.argv[2] if len(sys.argv) >= 3 else "output.txt"
-    config_path = sys.argv[3] if len(sys.argv) >= 4 else "config.txt"
-    output_path = sys.argv[4] if len(sys.argv) >= 5 else "output.pptx"
+    # 使用預設值（路徑未指定時為 None，切換工作目錄後才套用預設檔名）
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('template', nargs='?', default=None)
+    parser.add_argument('input', nargs='?', default=None)
+    parser.add_argument('config', nargs='?', default=None)
+    parser.add_argument('output', nargs='?', default=None)
+    parser.add_argument('-h', '--help', action='store_true')
+    parser.add_argument('--jobs', type=int, default=1)
+    parser.add_argument('--reproducible', action='store_true')
+    parser.add_argument('--compress-level', type=int, choices=range(10), default=None)
+    parser.add_argument('--store-media', action='store_true')
+    parser.add_argument('--slide-cache-dir', default=None)
+    parser.add_argument('--slide-cache-size', type=int, default=DEFAULT_SLIDE_CACHE_MB)
+    parser.add_argument('--no-slide-cache', action='store_true')
+    parser.add_argument('--render', action='append', default=[])
+    parser.add_argument('--export', action='append', default=[])
+    selection = parser.add_mutually_exclusive_group()
+    selection.add_argument('--slides', default=None)
+    selection.add_argument('--block', type=int, default=None)
+    parser.add_argument('--workdir', default=None)
+    parser.add_argument('--headless', action='store_true')
+    args = parser.parse_args()
+    
+    # --headless：標準輸出只有 NDJSON 事件，其他訊息改寫到標準錯誤
+    events = open_event_stream(args.headless, "2_generate.py")
+    
+    # 獨立的工作目錄：命令列指定的路徑相對於原本的目錄，預設檔名與 error.log 放在工作目錄中
+    workdir = None
+    if args.workdir:
+        args.render = [absolute_render_target(value) for value in args.render]
+        workdir = enter_workdir(args.workdir, args, ('template', 'input', 'config', 'output',
+                                                     'slide_cache_dir', 'export'))
+    
+    template_path = args.template or "template.pptx"
+    input_path = args.input or "output.txt"
+    config_path = args.config or "config.txt"
+    slide_cache_dir = args.slide_cache_dir or DEFAULT_SLIDE_CACHE_DIR
+    # 部分生成時預設輸出到預覽檔，不覆蓋完整的 output.pptx
+    partial = args.slides is not None or args.block is not None
+    output_path = args.output or ("output_preview.pptx" if partial else "output.pptx")
     
     # 顯示使用說明（如果使用 -h 或 --help 參數）
-    if len(sys.argv) >= 2 and sys.argv[1] in ['-h', '--help', 'help']:
+    if args.help or template_path == 'help':
         print("📖 PPT 生成程式 V2")
         print("=" * 70)
         print()
@@ -781,10 +1062,27 @@ def main():
         print()
         print("參數說明（全部可選，使用預設值）：")
         print("  template  - 模板 PPT（預設：template.pptx）")
-        print("  input     - 輸入文字檔（預設：output.txt）")
+        print("  input     - 輸入文字檔或區塊檔（預設：output.txt）")
         print("  config    - 設定檔（預設：config.txt）")
         print("  output    - 輸出 PPT（預設：output.pptx）")
         print()
+        print("選項：")
+        print("  --jobs N            - 使用 N 個程序平行生成投影片（預設：1，依序生成）")
+        print("  --reproducible      - 可重現輸出：相同輸入產生完全相同的檔案（可用雜湊比對）")
+        print("  --compress-level N  - XML 壓縮等級 0-9（1 最快、9 最小，預設 6）")
+        print("  --store-media       - 圖片、字型等已壓縮的媒體不再壓縮（大型簡報儲存更快）")
+        print(f"  --slide-cache-dir 目錄 - 文字框快取位置（預設：{DEFAULT_SLIDE_CACHE_DIR}）")
+        print(f"  --slide-cache-size MB  - 快取大小上限（預設：{DEFAULT_SLIDE_CACHE_MB} MB，超過時刪除最久未用的）")
+        print("  --no-slide-cache    - 不使用文字框快取")
+        print("  --render 模板[=輸出] - 同時以其他模板生成同一份內容（可重複指定）")
+        print("  --export 檔案       - 另外輸出 HTML 投影片或 JSON 投影片清單（依副檔名，可重複指定）")
+        print("  --slides 範圍       - 只生成指定的投影片，例如 12-18 或 1,3,10-12（預設輸出 output_preview.pptx）")
+        print("  --block N           - 只生成第 N 個內容區塊的投影片（包含段落間的分隔主題頁）")
+        print("  --workdir 目錄      - 在獨立的工作目錄中執行：預設檔名、快取與 error.log 都放在此目錄")
+        print("                        （命令列指定的路徑仍相對於目前目錄，可同時執行多個工作）")
+        print("  --headless          - 不等待按鍵，標準輸出改為 NDJSON 進度事件（其他訊息寫到標準錯誤）")
+        print("                        結束碼：0 成功、1 執行錯誤、2 參數或設定錯誤")
+        print()
         print("範例：")
         print("  python 2_generate.py")
         print("    → 使用所有預設值生成 PPT")
@@ -792,6 +1090,18 @@ def main():
         print("  python 2_generate.py my_template.pptx")
         print("    → 使用自訂模板，其他使用預設值")
         print()
+        print("  python 2_generate.py --render template_43.pptx=output_43.pptx --render contrast.pptx")
+        print("    → 同一次執行另外輸出 4:3 版本與 output_contrast.pptx")
+        print()
+        print("  python 2_generate.py --block 5")
+        print("    → 只預覽第 5 個內容區塊的投影片")
+        print()
+        print("  python 2_generate.py --export slides.html --export slides.json")
+        print("    → 另外輸出網頁投影片與投影片清單")
+        print()
+        print("  python 2_generate.py template.pptx --workdir jobs/0105")
+        print("    → 讀取 jobs/0105 中的 output.txt、config.txt，輸出 jobs/0105/output.pptx")
+        print()
         print("=" * 70)
         print()
         print("💡 完整流程：")
@@ -810,41 +1120,147 @@ def main():
     print(f"輸入文字：{input_path}")
     print(f"設定檔案：{config_path}")
     print(f"輸出檔案：{output_path}")
+    if workdir:
+        print(f"工作目錄：{workdir}")
     print("=" * 60)
     print("\n開始生成...\n")
+    events.emit('job_start', template=template_path, input=input_path, config=config_path,
+                output=output_path, workdir=workdir or os.getcwd())
     
     try:
-        # 建立生成器（會先複製 template 到 output）
-        generator = PPTGeneratorV2(template_path, output_path)
-        
-        # 載入變數和內容
-        generator.load_variables_and_content(input_path)
-        
-        # 載入設定
-        generator.load_config(config_path)
+        with events.stage('load', template=template_path, input=input_path, config=config_path):
+            # 建立生成器（輸出檔在生成完成時才寫入）
+            generator = PPTGeneratorV2(template_path, output_path)
+            generator.events = events
+            
+            # 模板文字框對應有問題時提醒（生成的投影片可能缺少文字）
+            errors, _ = analysis_problems(generator.template_analysis)
+            for error in errors:
+                print(f"⚠️  模板：{error}")
+            if errors:
+                print("   請執行 python template_analysis.py validate-template 查看詳細資訊\n")
+            
+            generator.reproducible = args.reproducible
+            generator.compress_level = args.compress_level
+            generator.store_media = args.store_media
+            if not args.no_slide_cache:
+                try:
+                    generator.slide_cache = DiskCache(slide_cache_dir,
+                                                      max_bytes=args.slide_cache_size * 1024 * 1024)
+                except OSError as e:
+                    print(f"⚠️  無法使用快取目錄 {slide_cache_dir}：{e}")
+            
+            # 載入設定（先檢查 config，設定錯誤時不需要讀取內容）
+            generator.load_config(config_path)
+            
+            # 載入變數和內容
+            generator.load_variables_and_content(input_path)
+            
+            # 部分生成：投影片範圍或內容區塊 → 投影片編號（在生成前確認，錯誤時結束碼為 2）
+            try:
+                if args.slides is not None:
+                    generator.slide_numbers = parse_slide_range(args.slides)
+                    check_slide_numbers(generator.slide_numbers, len(generator.plan_slides()))
+                elif args.block is not None:
+                    generator.slide_numbers = block_slide_numbers(generator.plan_slides(), args.block)
+                    if not generator.slide_numbers:
+                        raise ValueError(f"沒有來自內容區塊 {args.block} 的投影片"
+                                         f"（共 {len(generator.content_lines)} 個區塊，需要「自動內容頁」）")
+            except ValueError as e:
+                raise ArgumentError(str(e))
+            
+            # 其他模板：使用同一份設定與內容，在子程序中與主要輸出同時生成
+            targets = [parse_render_target(value, output_path) for value in args.render]
+            outputs = [output_path] + [target_output for _, target_output in targets]
+            if len(set(outputs)) != len(outputs):
+                raise ArgumentError("--render：多個模板使用了相同的輸出檔案")
+            # 模板是命令列參數，問題（無法讀取、缺少頁面設計）以參數錯誤回報，不是 config 的錯誤
+            for target_template, _ in targets:
+                errors = check_template(target_template, generator.plan['page_structure'])
+                if errors:
+                    raise ArgumentError(f"--render {target_template}：" + '；'.join(errors))
+        
+        executor = None
+        futures = []
+        if targets:
+            options = {
+                'reproducible': generator.reproducible,
+                'compress_level': generator.compress_level,
+                'store_media': generator.store_media,
+                'cache_options': None,
+                'slide_numbers': generator.slide_numbers,
+            }
+            if generator.slide_cache is not None:
+                options['cache_options'] = (generator.slide_cache.directory, generator.slide_cache.max_bytes)
+            executor = ProcessPoolExecutor(max_workers=min(len(targets), os.cpu_count() or 1))
+            futures = [executor.submit(stages.render_template, target_template, target_output,
+                                       generator.plan, generator.variables, generator.content_lines, options)
+                       for target_template, target_output in targets]
+        
+        # 輕量輸出（直接讀取模板 XML，不需要等 PPT 生成）
+        for export_path in args.export:
+            export_start = time.perf_counter()
+            with events.stage('export', output=export_path) as result:
+                manifest = generator.export(export_path)
+                result['slides'] = len(manifest['slides'])
+            print(f"🌐 已輸出 {len(manifest['slides'])} 張投影片到：{export_path}"
+                  f"（{(time.perf_counter() - export_start) * 1000:.0f} ms）")
+            events.emit('output', path=export_path, slides=len(manifest['slides']))
+        if args.export:
+            print()
         
         # 生成 PPT
-        generator.generate()
-        
+        start = time.perf_counter()
+        generator.generate(jobs=args.jobs)
+        
+        if executor is not None:
+            results = [render_result(generator, time.perf_counter() - start)]
+            with events.stage('render', targets=len(futures)):
+                try:
+                    results += [future.result() for future in futures]
+                finally:
+                    executor.shutdown()
+            for result in results[1:]:
+                events.emit('output', path=result['output'], template=result['template'],
+                            slides=result['slides'], sha256=result['sha256'])
+            
+            print(f"\n🎨 多模板生成：{len(results)} 份")
+            for result in results:
+                print(f"  {result['template']} → {result['output']}："
+                      f"{result['slides']} 張，{result['seconds']:.2f} 秒")
+                if result['sha256']:
+                    print(f"    🔑 {result['sha256']}")
+            print(f"⏱️  總耗時：{time.perf_counter() - start:.2f} 秒")
+    
+    except ConfigError as e:
+        print(f"❌ 設定錯誤：{e}")
+        events.error(e)
+        sys.exit(events.job_end(EXIT_INVALID))
+    except ArgumentError as e:
+        print(f"❌ 參數錯誤：{e}")
+        events.error(e)
+        sys.exit(events.job_end(EXIT_INVALID))
     except Exception as e:
         print(f"❌ 錯誤：{e}")
         import traceback
         traceback.print_exc()
-        sys.exit(1)
+        events.error(e)
+        sys.exit(events.job_end(EXIT_ERROR))
+    
+    events.job_end(EXIT_OK)
 
 
 if __name__ == "__main__":
+    # 打包成執行檔後，平行生成的子程序需要此呼叫
+    multiprocessing.freeze_support()
+    # --headless：不等待按鍵，由結束碼與事件串流回報結果
+    headless = '--headless' in sys.argv[1:]
     try:
         main()
     except Exception as e:
-        # 記錄錯誤到檔案
+        # 記錄錯誤到檔案（使用 --workdir 時在工作目錄中）
         try:
-            with open('error.log', 'a', encoding='utf-8') as f:
-                f.write(f"\n{'='*60}\n")
-                f.write(f"錯誤時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"程式: 2_generate.py\n")
-                f.write(f"錯誤訊息: {str(e)}\n")
-                f.write(f"詳細資訊:\n{traceback.format_exc()}\n")
+            write_error_log("2_generate.py", e, traceback.format_exc())
         except:
             pass
         
@@ -855,5 +1271,7 @@ if __name__ == "__main__":
         print(f"\n錯誤詳細資訊已記錄到 error.log")
         print(f"請將 error.log 提供給開發者協助除錯")
         print(f"{'='*60}")
+        sys.exit(EXIT_ERROR)
     finally:
-        input("\n按 Enter 鍵退出...")
+        if not headless:
+            input("\n按 Enter 鍵退出...")
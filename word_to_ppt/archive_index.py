@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+講章索引 - 將大量 Word 講章的變數與藍色文字區塊建立 SQLite 索引，快速搜尋經文與內容
+
+使用方式：
+    python archive_index.py update 講章目錄 [更多目錄或檔案...] [--index archive.db]
+    python archive_index.py search 避難所 [--limit 20] [--json]
+    python archive_index.py verse 詩篇46篇 [--json]
+
+update 只重新提取新增或內容有變動的檔案（先比對大小與修改時間，再比對內容雜湊），
+已刪除的檔案會從索引移除。目錄中只索引 .docx；也可直接指定 output.txt 或區塊檔。
+
+內容區塊存在 FTS5 全文索引（trigram 分詞，適合中文的任意子字串搜尋）；
+SQLite 不支援 trigram 或搜尋詞少於 3 個字時改用 LIKE 逐筆比對。
+經文章節（經文章節變數、經文變數與區塊開頭的〈章節〉）經 convert_verse_reference
+轉換並拆成書卷、章、節，「詩46:1」、「詩篇46篇1節」、「詩篇46章」都能找到同一處。
+"""
+
+import os
+import re
+import io
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import contextlib
+
+from blockfile import read_content
+from verse_reference import BOOK_NAMES, convert_verse_reference
+import stages
+
+
+DEFAULT_INDEX = 'archive.db'
+
+# 索引結構版本（結構改變時遞增，舊的索引會重建）
+SCHEMA_VERSION = 1
+
+# trigram 分詞的最短搜尋詞
+TRIGRAM_MIN_LENGTH = 3
+
+# 搜尋結果摘要的前後字數
+SNIPPET_CONTEXT = 20
+
+# 章節：書卷 + 章（章、篇或冒號）+ 節（可選，範圍只取開頭）
+REFERENCE_PATTERN = re.compile(r'^\s*([^\d\s]+?)\s*(\d+)\s*(?:章|篇|:|：)?\s*(?:(\d+)\s*節?)?')
+DATE_PATTERN = re.compile(r'(\d{4})年(\d{1,2})月(\d{1,2})日')
+BLOCK_REFERENCE_PATTERN = re.compile(r'^[〈<]([^〉>]+)[〉>]')
+FULL_BOOK_NAMES = set(BOOK_NAMES.values())
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER,
+    mtime_ns INTEGER,
+    digest TEXT,
+    extractor TEXT,
+    date TEXT,
+    date_key TEXT,
+    service_type TEXT,
+    title TEXT,
+    verse_refs TEXT,
+    block_count INTEGER
+);
+CREATE TABLE IF NOT EXISTS verses (
+    document_id INTEGER NOT NULL,
+    position INTEGER,
+    book TEXT NOT NULL,
+    chapter INTEGER NOT NULL,
+    verse INTEGER,
+    reference TEXT
+);
+CREATE INDEX IF NOT EXISTS verses_lookup ON verses (book, chapter, verse);
+CREATE INDEX IF NOT EXISTS verses_document ON verses (document_id);
+"""
+
+
+def parse_reference(text):
+    """
+    將經文章節拆成 (書卷, 章, 節)
+    
+    詩46:1、詩篇46篇1節、〈太 2:13-14〉 → ('詩篇', 46, 1)、('詩篇', 46, 1)、('馬太福音', 2, 13)
+    
+    Returns:
+        tuple: (書卷完整名稱, 章, 節或 None)；不是經文章節時回傳 None
+    """
+    text = convert_verse_reference(text.strip().strip('〈〉<>【】').strip())
+    match = REFERENCE_PATTERN.match(text)
+    if not match:
+        return None
+    book, chapter, verse = match.groups()
+    book = BOOK_NAMES.get(book, book)
+    if book not in FULL_BOOK_NAMES:
+        return None
+    return book, int(chapter), int(verse) if verse else None
+
+
+def format_reference(book, chapter, verse):
+    """(書卷, 章, 節) → 統一格式（詩篇46章1節）"""
+    return f"{book}{chapter}章{verse}節" if verse else f"{book}{chapter}章"
+
+
+def document_references(variables, content_lines):
+    """
+    文件中的經文章節
+    
+    Returns:
+        list: (區塊位置（變數為 None）, 書卷, 章, 節)
+    """
+    references = []
+    for part in re.split(r'[、，,;；]', variables.get('經文章節', '').strip('【】')):
+        parsed = parse_reference(part) if part.strip() else None
+        if parsed:
+            references.append((None,) + parsed)
+    for key, value in variables.items():
+        if key.startswith('經文') and key[2:].isdigit():
+            match = BLOCK_REFERENCE_PATTERN.match(value)
+            parsed = parse_reference(match.group(1)) if match else None
+            if parsed:
+                references.append((None,) + parsed)
+    for position, text in enumerate(content_lines, 1):
+        match = BLOCK_REFERENCE_PATTERN.match(text)
+        parsed = parse_reference(match.group(1)) if match else None
+        if parsed:
+            references.append((position,) + parsed)
+    # 同一處經文只記錄一次（保留第一次出現的位置）
+    return list({reference[1:]: reference for reference in reversed(references)}.values())[::-1]
+
+
+def date_key(date):
+    """2026年1月5日 → 2026-01-05（排序用，無法解析時為空字串）"""
+    match = DATE_PATTERN.search(date or '')
+    if not match:
+        return ''
+    year, month, day = match.groups()
+    return f"{year}-{int(month):02d}-{int(day):02d}"
+
+
+def _snippet(text, terms):
+    """區塊中第一個搜尋詞前後的文字"""
+    text = text.replace('\n', ' / ')
+    index = min((text.find(term) for term in terms if term in text), default=0)
+    start = max(0, index - SNIPPET_CONTEXT)
+    end = index + SNIPPET_CONTEXT + max(len(term) for term in terms)
+    return ('...' if start else '') + text[start:end] + ('...' if end < len(text) else '')
+
+
+class ArchiveIndex:
+    """講章索引（SQLite）"""
+    
+    def __init__(self, path=DEFAULT_INDEX):
+        """
+        Args:
+            path: 索引檔路徑（不存在時建立）
+        """
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.fts = self._open_schema()
+    
+    def close(self):
+        """關閉索引"""
+        self.db.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def _open_schema(self):
+        """建立資料表，回傳內容區塊是否使用 FTS5 全文索引"""
+        try:
+            version = self.db.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        except sqlite3.OperationalError:
+            version = None
+        if version is not None and int(version[0]) != SCHEMA_VERSION:
+            # 結構版本不同：重建索引（下次 update 會重新提取所有檔案）
+            with self.db:
+                for table in ('meta', 'documents', 'verses', 'blocks'):
+                    self.db.execute(f"DROP TABLE IF EXISTS {table}")
+        
+        with self.db:
+            self.db.executescript(SCHEMA)
+            row = self.db.execute("SELECT value FROM meta WHERE key = 'fts'").fetchone()
+            if row is None:
+                try:
+                    self.db.execute("CREATE VIRTUAL TABLE blocks USING fts5("
+                                    "text, document_id UNINDEXED, position UNINDEXED, tokenize='trigram')")
+                    fts = True
+                except sqlite3.OperationalError:
+                    # 沒有 FTS5 或 trigram 分詞（SQLite 3.34 以前），以一般資料表 + LIKE 搜尋
+                    self.db.execute("CREATE TABLE blocks (text TEXT, document_id INTEGER, position INTEGER)")
+                    self.db.execute("CREATE INDEX blocks_document ON blocks (document_id)")
+                    fts = False
+                self.db.execute("INSERT INTO meta VALUES ('fts', ?)", ('trigram' if fts else 'like',))
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+            else:
+                fts = row[0] == 'trigram'
+        return fts
+    
+    def update(self, sources, extractor_factory=None):
+        """
+        更新索引：只提取新增或有變動的檔案，移除已刪除的檔案
+        
+        Args:
+            sources: 目錄或檔案路徑列表（目錄中遞迴尋找 .docx）
+            extractor_factory: 建立 BlueTextExtractor 的函式（預設為藍色、容差 50）
+        
+        Returns:
+            dict: 統計（added、updated、unchanged、removed、failed）
+        """
+        module = stages.extract_stage()
+        if extractor_factory is None:
+            extractor_factory = module.BlueTextExtractor
+        signature = f"v{module.EXTRACTOR_VERSION}:{extractor_factory().target_color}"
+        stats = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0, 'failed': 0}
+        
+        roots = []
+        seen = set()
+        for source in sources:
+            if os.path.isdir(source):
+                roots.append(os.path.abspath(source))
+                paths = sorted(os.path.join(directory, name)
+                               for directory, _, names in os.walk(source) for name in names
+                               if name.lower().endswith('.docx') and not name.startswith('~$'))
+            else:
+                paths = [source]
+            for path in paths:
+                path = os.path.abspath(path)
+                seen.add(path)
+                try:
+                    result = self._update_file(path, signature, extractor_factory, module)
+                except Exception as e:
+                    print(f"⚠️  無法索引 {path}：{e}")
+                    stats['failed'] += 1
+                    continue
+                stats[result] += 1
+                if result != 'unchanged':
+                    print(f"  {'＋' if result == 'added' else '～'} {path}")
+        
+        # 掃描的目錄中已不存在的檔案
+        for row in self.db.execute("SELECT id, path FROM documents").fetchall():
+            path = row['path']
+            if path not in seen and not os.path.exists(path) and \
+                    any(path.startswith(root + os.sep) for root in roots):
+                with self.db:
+                    self._delete_document(row['id'])
+                    self.db.execute("DELETE FROM documents WHERE id = ?", (row['id'],))
+                print(f"  － {path}")
+                stats['removed'] += 1
+        return stats
+    
+    def _update_file(self, path, signature, extractor_factory, module):
+        """更新單一檔案，回傳 added、updated 或 unchanged"""
+        stat = os.stat(path)
+        row = self.db.execute("SELECT id, size, mtime_ns, digest, extractor FROM documents WHERE path = ?",
+                              (path,)).fetchone()
+        if row is not None and row['extractor'] == signature and \
+                (row['size'], row['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            return 'unchanged'
+        
+        digest = module.docx_digest(path).hex()
+        if row is not None and row['extractor'] == signature and row['digest'] == digest:
+            # 只有修改時間改變（例如複製檔案），內容相同不需重新提取
+            with self.db:
+                self.db.execute("UPDATE documents SET size = ?, mtime_ns = ? WHERE id = ?",
+                                (stat.st_size, stat.st_mtime_ns, row['id']))
+            return 'unchanged'
+        
+        if path.lower().endswith('.docx'):
+            extractor = extractor_factory()
+            with contextlib.redirect_stdout(io.StringIO()):
+                extractor.extract_from_docx(path)
+            # 只記錄文件中找到的變數（不使用預設值）
+            variables, content_lines = dict(extractor.variables), list(extractor.extracted_text)
+        else:
+            variables, content_lines = read_content(path)
+        
+        with self.db:
+            if row is not None:
+                document_id = row['id']
+                self._delete_document(document_id)
+            else:
+                document_id = self.db.execute("INSERT INTO documents (path) VALUES (?)", (path,)).lastrowid
+            date = variables.get('日期', '')
+            self.db.execute(
+                "UPDATE documents SET size = ?, mtime_ns = ?, digest = ?, extractor = ?, date = ?, date_key = ?, "
+                "service_type = ?, title = ?, verse_refs = ?, block_count = ? WHERE id = ?",
+                (stat.st_size, stat.st_mtime_ns, digest, signature, date, date_key(date),
+                 variables.get('禮拜類型', ''), variables.get('主題', ''), variables.get('經文章節', ''),
+                 len(content_lines), document_id))
+            self.db.executemany("INSERT INTO blocks (text, document_id, position) VALUES (?, ?, ?)",
+                                [(text, document_id, position) for position, text in enumerate(content_lines, 1)])
+            self.db.executemany(
+                "INSERT INTO verses (document_id, position, book, chapter, verse, reference) VALUES (?, ?, ?, ?, ?, ?)",
+                [(document_id, position, book, chapter, verse, format_reference(book, chapter, verse))
+                 for position, book, chapter, verse in document_references(variables, content_lines)])
+        return 'updated' if row is not None else 'added'
+    
+    def _delete_document(self, document_id):
+        """刪除文件的區塊與經文記錄"""
+        self.db.execute("DELETE FROM blocks WHERE document_id = ?", (document_id,))
+        self.db.execute("DELETE FROM verses WHERE document_id = ?", (document_id,))
+    
+    def search(self, query, limit=20):
+        """
+        搜尋內容區塊（以空白分隔的多個詞需全部出現）
+        
+        Returns:
+            list: 每個符合的區塊 {path, date, service_type, title, position, text, snippet}（新的日期在前）
+        """
+        terms = query.split()
+        if not terms:
+            return []
+        conditions = []
+        params = []
+        fts_terms = [term for term in terms if self.fts and len(term) >= TRIGRAM_MIN_LENGTH]
+        if fts_terms:
+            conditions.append("blocks MATCH ?")
+            params.append(' AND '.join('"' + term.replace('"', '""') + '"' for term in fts_terms))
+        for term in terms:
+            if term not in fts_terms:
+                conditions.append("blocks.text LIKE ? ESCAPE '\\'")
+                params.append('%' + re.sub(r'([\\%_])', r'\\\1', term) + '%')
+        
+        rows = self.db.execute(
+            "SELECT documents.path, documents.date, documents.service_type, documents.title, "
+            "blocks.position, blocks.text FROM blocks JOIN documents ON documents.id = blocks.document_id "
+            f"WHERE {' AND '.join(conditions)} "
+            "ORDER BY documents.date_key DESC, documents.path, blocks.position LIMIT ?",
+            params + [limit]).fetchall()
+        return [dict(row, snippet=_snippet(row['text'], terms)) for row in rows]
+    
+    def find_verse(self, reference):
+        """
+        找出使用指定經文的聚會（詩篇46篇 → 詩篇 46 章的任一節；詩46:1 → 只找第 1 節）
+        
+        Returns:
+            list: 每份文件 {path, date, service_type, title, references: [{reference, position}]}（新的日期在前）
+        
+        Raises:
+            ValueError: 無法解析經文章節
+        """
+        parsed = parse_reference(reference)
+        if parsed is None:
+            raise ValueError(f"無法解析經文章節：{reference}")
+        book, chapter, verse = parsed
+        sql = ("SELECT documents.id, documents.path, documents.date, documents.service_type, documents.title, "
+               "verses.reference, verses.position FROM verses JOIN documents ON documents.id = verses.document_id "
+               "WHERE verses.book = ? AND verses.chapter = ?")
+        params = [book, chapter]
+        if verse is not None:
+            sql += " AND (verses.verse = ? OR verses.verse IS NULL)"
+            params.append(verse)
+        sql += " ORDER BY documents.date_key DESC, documents.path, verses.position"
+        
+        results = {}
+        for row in self.db.execute(sql, params):
+            entry = results.setdefault(row['id'], {key: row[key] for key in
+                                                   ('path', 'date', 'service_type', 'title')})
+            entry.setdefault('references', []).append({'reference': row['reference'], 'position': row['position']})
+        return list(results.values())
+    
+    def document_count(self):
+        """索引中的文件數量"""
+        return self.db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+
+def _describe_reference(item):
+    """經文出現的位置（經文章節變數或第幾段）"""
+    if item['position'] is None:
+        return item['reference']
+    return f"{item['reference']}（第 {item['position']} 段）"
+
+
+def main():
+    """主程式"""
+    parser = argparse.ArgumentParser(description="講章索引：建立與搜尋提取結果")
+    parser.add_argument('--index', default=DEFAULT_INDEX, help=f"索引檔（預設：{DEFAULT_INDEX}）")
+    commands = parser.add_subparsers(dest='command', required=True)
+    update_parser = commands.add_parser('update', help="索引目錄中的 .docx（只處理新增或變動的檔案）")
+    update_parser.add_argument('sources', nargs='+', help="目錄、.docx、output.txt 或區塊檔")
+    search_parser = commands.add_parser('search', help="搜尋內容區塊")
+    search_parser.add_argument('query', nargs='+', help="搜尋詞（多個詞需全部出現）")
+    search_parser.add_argument('--limit', type=int, default=20, help="最多顯示幾筆（預設 20）")
+    search_parser.add_argument('--json', action='store_true', help="以 JSON 輸出")
+    verse_parser = commands.add_parser('verse', help="找出使用指定經文的聚會")
+    verse_parser.add_argument('reference', help="經文章節，例如 詩篇46篇、詩46:1")
+    verse_parser.add_argument('--json', action='store_true', help="以 JSON 輸出")
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    with ArchiveIndex(args.index) as index:
+        if args.command == 'update':
+            print(f"📚 更新索引：{args.index}")
+            stats = index.update(args.sources)
+            print(f"✅ 新增 {stats['added']}、更新 {stats['updated']}、未變動 {stats['unchanged']}、"
+                  f"移除 {stats['removed']}、失敗 {stats['failed']}"
+                  f"（共 {index.document_count()} 份，{time.perf_counter() - start:.2f} 秒）")
+            return 1 if stats['failed'] else 0
+        
+        if args.command == 'search':
+            query = ' '.join(args.query)
+            results = index.search(query, limit=args.limit)
+            elapsed = time.perf_counter() - start
+            if args.json:
+                print(json.dumps(results, ensure_ascii=False, indent=2))
+                return 0 if results else 1
+            print(f"🔍 「{query}」：{len(results)} 筆（{elapsed * 1000:.0f} ms）")
+            for result in results:
+                print(f"  {result['date'] or '（沒有日期）'} {result['service_type']} {result['title']}"
+                      f"｜第 {result['position']} 段")
+                print(f"      {result['snippet']}")
+                print(f"      {result['path']}")
+            return 0 if results else 1
+        
+        try:
+            results = index.find_verse(args.reference)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 2
+        elapsed = time.perf_counter() - start
+        if args.json:
+            print(json.dumps(results, ensure_ascii=False, indent=2))
+            return 0 if results else 1
+        print(f"📖 {format_reference(*parse_reference(args.reference))}：{len(results)} 場聚會"
+              f"（{elapsed * 1000:.0f} ms）")
+        for result in results:
+            references = '、'.join(_describe_reference(item) for item in result['references'])
+            print(f"  {result['date'] or '（沒有日期）'} {result['service_type']} {result['title']}：{references}")
+            print(f"      {result['path']}")
+        return 0 if results else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批次轉換 - 大量檔案的提取與生成，以進度日誌記錄完成的檔案，中斷後重新執行即可續跑
+
+使用方式：
+    python batch.py run 講章目錄 [更多目錄或檔案...] --out-dir 輸出目錄 [--workers 4] [--txt]
+    python batch.py extract 講章目錄 --out-dir 文字目錄
+    python batch.py generate 文字目錄 --out-dir 簡報目錄
+    
+    run       Word → PPT（--txt 同時輸出 output.txt 格式的文字檔）
+    extract   Word → output.txt 格式的文字檔
+    generate  output.txt 格式的文字檔或區塊檔 → PPT
+
+輸出檔放在 --out-dir 中，保留輸入目錄內的相對路徑（只換副檔名）。
+
+進度日誌（預設為輸出目錄中的 batch.journal.jsonl）每行一筆 JSON，只附加不修改：
+    done    完成（input、input_sha256、settings：模板、config 與選項的雜湊、outputs：輸出路徑與雜湊）
+    failed  失敗（input、attempt、error、retry_in：幾秒後重試，null 表示放棄）
+重新執行時，日誌中已完成、輸入檔與設定沒變、輸出檔雜湊也相符的檔案直接略過；
+失敗的檔案以指數退避重試（--retries、--backoff）。剩餘的工作依檔案大小由大到小排序，
+程序池每做完一個才領下一個（不預先分段），續跑時只分配還沒完成的工作。
+"""
+
+import os
+import sys
+import json
+import time
+import heapq
+import hashlib
+import argparse
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from build_plan import load_build_plan, ConfigError
+from blockfile import read_content
+from workspace import atomic_write
+from events import open_event_stream, EXIT_OK, EXIT_ERROR, EXIT_INVALID
+import stages
+
+
+DEFAULT_JOURNAL = 'batch.journal.jsonl'
+
+# 每個檔案失敗後的重試次數
+DEFAULT_RETRIES = 3
+# 第一次重試前等待的秒數（之後每次加倍）
+DEFAULT_BACKOFF = 2.0
+# 重試等待的上限
+MAX_BACKOFF = 60.0
+
+# 各模式的輸入副檔名
+MODES = {
+    'run': ('.docx',),
+    'extract': ('.docx',),
+    'generate': ('.txt', '.blk'),
+}
+
+# 各模式的名稱與輸出種類
+MODE_NAMES = {'run': '轉換', 'extract': '提取', 'generate': '生成'}
+MODE_OUTPUTS = {'run': ['pptx'], 'extract': ['txt'], 'generate': ['pptx']}
+
+
+def file_sha256(path):
+    """檔案內容的 SHA-256（分段讀取）"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def settings_digest(mode, template_path, config_path, options):
+    """
+    影響輸出內容的設定雜湊（模板、config、選項與提取器版本），設定改變時已完成的檔案要重做
+    
+    Args:
+        mode: 批次模式
+        template_path: 模板 PPT 路徑
+        config_path: config 檔案路徑
+        options: Pipeline 選項
+    """
+    settings = {
+        'mode': mode,
+        'extractor': stages.extract_stage().EXTRACTOR_VERSION,
+        'template': file_sha256(template_path),
+        'config': file_sha256(config_path),
+        'options': options,
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# 子程序
+# ---------------------------------------------------------------------------
+
+_worker_pipeline = None
+
+
+def _init_worker(template_path, config_path, options):
+    """子程序初始化：每個子程序只載入一次生成計畫"""
+    global _worker_pipeline
+    from pipeline import Pipeline
+    _worker_pipeline = Pipeline(template_path, config_path, **options)
+
+
+def _process(mode, input_path, outputs):
+    """
+    子程序工作：處理一個輸入檔並寫出輸出檔（先寫暫存檔再改名）
+    
+    Args:
+        mode: 批次模式
+        input_path: 輸入檔路徑
+        outputs: 輸出種類 → 路徑（txt、pptx）
+    
+    Returns:
+        dict: input_sha256、outputs（輸出種類 → {path, sha256}）、seconds
+    """
+    start = time.perf_counter()
+    with open(input_path, 'rb') as f:
+        data = f.read()
+    input_sha256 = hashlib.sha256(data).hexdigest()
+    for path in outputs.values():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    
+    if mode == 'generate':
+        variables, blocks = read_content(input_path)
+    else:
+        extractor = _worker_pipeline.extract(data)
+        variables, blocks = extractor.output_variables(), extractor.extracted_text
+        if 'txt' in outputs:
+            with atomic_write(outputs['txt'], 'w', encoding='utf-8') as f:
+                f.write(extractor.format_output_text())
+    if 'pptx' in outputs:
+        pptx_bytes = _worker_pipeline.generate(variables, blocks)
+        with atomic_write(outputs['pptx']) as f:
+            f.write(pptx_bytes)
+    
+    return {
+        'input_sha256': input_sha256,
+        'outputs': {kind: {'path': path, 'sha256': file_sha256(path)} for kind, path in outputs.items()},
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+# ---------------------------------------------------------------------------
+# 進度日誌
+# ---------------------------------------------------------------------------
+
+class BatchJournal:
+    """只附加的進度日誌（每行一筆 JSON，每筆寫入後 fsync）"""
+    
+    def __init__(self, path):
+        """
+        開啟日誌並讀取已有的記錄
+        
+        Args:
+            path: 日誌檔路徑
+        """
+        self.path = path
+        self.completed = {}
+        self.failed = {}
+        self.records = 0
+        needs_newline = False
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    needs_newline = not line.endswith('\n')
+                    self._load(line)
+        self._file = open(path, 'a', encoding='utf-8')
+        # 中斷時寫到一半的最後一行：補上換行，之後的記錄才不會接在後面
+        if needs_newline:
+            self._file.write('\n')
+    
+    def _load(self, line):
+        try:
+            self._remember(json.loads(line))
+        except ValueError:
+            pass
+    
+    def _remember(self, record):
+        input_path = record.get('input')
+        if record.get('event') == 'done':
+            self.completed[input_path] = record
+            self.failed.pop(input_path, None)
+        elif record.get('event') == 'failed':
+            self.failed[input_path] = record
+        self.records += 1
+    
+    def append(self, event, **fields):
+        """寫入一筆記錄"""
+        record = {'event': event, 'time': round(time.time(), 3)}
+        record.update(fields)
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._remember(record)
+    
+    def is_complete(self, item, settings):
+        """
+        檔案是否已完成：日誌中有完成記錄，輸入檔、設定與輸出路徑都沒變，輸出檔雜湊相符
+        
+        Args:
+            item: BatchItem
+            settings: settings_digest 的結果
+        """
+        record = self.completed.get(item.input)
+        if record is None or record.get('settings') != settings:
+            return False
+        outputs = record.get('outputs', {})
+        if {kind: output['path'] for kind, output in outputs.items()} != item.outputs:
+            return False
+        try:
+            if file_sha256(item.input) != record.get('input_sha256'):
+                return False
+            return all(file_sha256(output['path']) == output['sha256'] for output in outputs.values())
+        except OSError:
+            return False
+    
+    def close(self):
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---------------------------------------------------------------------------
+# 工作分配
+# ---------------------------------------------------------------------------
+
+class BatchItem:
+    """一個輸入檔"""
+    
+    def __init__(self, input_path, outputs):
+        self.input = input_path
+        self.outputs = outputs
+        self.size = os.path.getsize(input_path)
+        self.attempts = 0
+
+
+def collect_items(sources, mode, out_dir, txt=False):
+    """
+    收集輸入檔並決定輸出路徑（目錄中遞迴尋找，保留相對路徑）
+    
+    Args:
+        sources: 目錄或檔案路徑列表
+        mode: 批次模式
+        out_dir: 輸出目錄
+        txt: run 模式是否同時輸出文字檔
+    
+    Returns:
+        list: BatchItem 列表
+    """
+    kinds = MODE_OUTPUTS[mode] + (['txt'] if txt and mode == 'run' else [])
+    out_dir = os.path.abspath(out_dir)
+    items = []
+    seen = set()
+    claimed = {}
+    for source in sources:
+        if os.path.isdir(source):
+            root = os.path.abspath(source)
+            paths = sorted(os.path.join(directory, name)
+                           for directory, _, names in os.walk(root) for name in names
+                           if name.lower().endswith(MODES[mode]) and not name.startswith('~$'))
+        elif os.path.isfile(source):
+            root = os.path.dirname(os.path.abspath(source))
+            paths = [os.path.abspath(source)]
+        else:
+            raise FileNotFoundError(f"找不到檔案或目錄 '{source}'")
+        for path in paths:
+            # 輸出目錄在輸入目錄中時，不把上次的輸出當成輸入
+            if path.startswith(out_dir + os.sep):
+                continue
+            stem = os.path.splitext(os.path.relpath(path, root))[0]
+            outputs = {kind: os.path.join(out_dir, f"{stem}.{kind}") for kind in kinds}
+            for output in outputs.values():
+                if output in claimed and claimed[output] != path:
+                    raise ValueError(f"{claimed[output]} 與 {path} 的輸出檔相同：{output}")
+                claimed[output] = path
+            if path not in seen:
+                seen.add(path)
+                items.append(BatchItem(path, outputs))
+    return items
+
+
+def backoff_delay(attempt, backoff):
+    """第 attempt 次失敗後的等待秒數（指數退避）"""
+    return min(MAX_BACKOFF, backoff * 2 ** (attempt - 1))
+
+
+def run_batch(items, mode, journal, settings, pool_args, workers, retries, backoff, events):
+    """
+    以程序池處理檔案：一次只分配 workers 個，做完一個才分配下一個；
+    失敗的檔案等待退避時間後重新排入，子程序異常結束時重建程序池
+    
+    Returns:
+        dict: 統計（done、failed）
+    """
+    pending = deque(sorted(items, key=lambda item: item.size, reverse=True))
+    delayed = []
+    running = {}
+    stats = {'done': 0, 'failed': 0}
+    total = len(items)
+    
+    def new_pool():
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=pool_args)
+    
+    if not pending:
+        return stats
+    executor = new_pool()
+    try:
+        while pending or delayed or running:
+            now = time.monotonic()
+            while delayed and delayed[0][0] <= now:
+                pending.append(heapq.heappop(delayed)[2])
+            while pending and len(running) < workers:
+                item = pending.popleft()
+                item.attempts += 1
+                running[executor.submit(_process, mode, item.input, item.outputs)] = item
+            
+            timeout = max(0, delayed[0][0] - now) if delayed else None
+            if not running:
+                time.sleep(timeout)
+                continue
+            finished, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            
+            broken = False
+            for future in finished:
+                item = running.pop(future)
+                index = stats['done'] + stats['failed'] + 1
+                try:
+                    result = future.result()
+                except Exception as e:
+                    broken = broken or isinstance(e, BrokenProcessPool)
+                    error = f"{type(e).__name__}: {e}"
+                    retry_in = backoff_delay(item.attempts, backoff) if item.attempts <= retries else None
+                    journal.append('failed', mode=mode, input=item.input, attempt=item.attempts,
+                                   error=error, retry_in=retry_in)
+                    if retry_in is None:
+                        stats['failed'] += 1
+                        print(f"❌ [{index}/{total}] {item.input}：{error}（已失敗 {item.attempts} 次，放棄）")
+                        events.progress('item', index, total, input=item.input, status='failed',
+                                        attempt=item.attempts, error=error)
+                    else:
+                        print(f"⚠️  {item.input}：{error}（第 {item.attempts} 次失敗，{retry_in:g} 秒後重試）")
+                        events.emit('retry', input=item.input, attempt=item.attempts, error=error,
+                                    retry_in=retry_in)
+                        heapq.heappush(delayed, (time.monotonic() + retry_in, id(item), item))
+                    continue
+                
+                journal.append('done', mode=mode, input=item.input, input_sha256=result['input_sha256'],
+                               settings=settings, outputs=result['outputs'], attempt=item.attempts,
+                               seconds=result['seconds'])
+                stats['done'] += 1
+                print(f"✅ [{index}/{total}] {item.input}（{result['seconds']:.2f} 秒）")
+                events.progress('item', index, total, input=item.input, status='ok', attempt=item.attempts,
+                                seconds=result['seconds'],
+                                outputs=[output['path'] for output in result['outputs'].values()])
+            
+            if broken:
+                # 子程序異常結束（例如記憶體不足被終止）：程序池無法再使用，
+                # 其他執行中的工作也會以 BrokenProcessPool 失敗，重建程序池後依退避重試
+                print("⚠️  子程序異常結束，重新建立程序池")
+                executor.shutdown(wait=False)
+                executor = new_pool()
+    except BaseException:
+        # 中斷時不等待執行中的工作（已完成的都已寫入日誌）
+        executor.shutdown(wait=False)
+        raise
+    executor.shutdown()
+    return stats
+
+
+def main():
+    """
+    主程式
+    
+    Returns:
+        int: 結束碼
+    """
+    parser = argparse.ArgumentParser(description="批次提取與生成（以進度日誌支援中斷後續跑）")
+    parser.add_argument('mode', choices=sorted(MODES), help="run：Word → PPT、extract：Word → 文字檔、generate：文字檔 → PPT")
+    parser.add_argument('sources', nargs='+', help="輸入目錄或檔案（目錄中遞迴尋找）")
+    parser.add_argument('--out-dir', required=True, help="輸出目錄（保留輸入目錄內的相對路徑）")
+    parser.add_argument('--template', default='template.pptx', help="模板 PPT（預設：template.pptx）")
+    parser.add_argument('--config', default='config.txt', help="設定檔（預設：config.txt）")
+    parser.add_argument('--txt', action='store_true', help="run 模式同時輸出文字檔")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="程序數量（預設為 CPU 核心數）")
+    parser.add_argument('--journal', default=None, help=f"進度日誌（預設：輸出目錄中的 {DEFAULT_JOURNAL}）")
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES, help=f"失敗後的重試次數（預設 {DEFAULT_RETRIES}）")
+    parser.add_argument('--backoff', type=float, default=DEFAULT_BACKOFF,
+                        help=f"第一次重試前等待的秒數，之後每次加倍（預設 {DEFAULT_BACKOFF:g}）")
+    parser.add_argument('--reproducible', action='store_true', help="可重現輸出")
+    parser.add_argument('--compress-level', type=int, choices=range(10), default=None, help="XML 壓縮等級 0-9")
+    parser.add_argument('--store-media', action='store_true', help="已壓縮的媒體不再壓縮")
+    parser.add_argument('--headless', action='store_true', help="標準輸出改為 NDJSON 進度事件")
+    args = parser.parse_args()
+    
+    events = open_event_stream(args.headless, 'batch')
+    options = {
+        'reproducible': args.reproducible,
+        'compress_level': args.compress_level,
+        'store_media': args.store_media,
+    }
+    
+    try:
+        items = collect_items(args.sources, args.mode, args.out_dir, txt=args.txt)
+        # config 有誤時在啟動程序池前就回報
+        load_build_plan(args.config, args.template)
+        settings = settings_digest(args.mode, args.template, args.config, options)
+    except (OSError, ValueError, ConfigError) as e:
+        print(f"❌ 錯誤：{e}")
+        events.error(e)
+        return events.job_end(EXIT_INVALID)
+    if not items:
+        print(f"❌ 錯誤：找不到 {'、'.join(MODES[args.mode])} 檔案")
+        events.error(FileNotFoundError("沒有輸入檔"))
+        return events.job_end(EXIT_INVALID)
+    
+    os.makedirs(args.out_dir, exist_ok=True)
+    journal_path = args.journal or os.path.join(args.out_dir, DEFAULT_JOURNAL)
+    pool_args = (os.path.abspath(args.template), os.path.abspath(args.config), options)
+    
+    with BatchJournal(journal_path) as journal:
+        with events.stage('verify', journal=journal_path, records=journal.records) as result:
+            remaining = [item for item in items if not journal.is_complete(item, settings)]
+            result['skipped'] = len(items) - len(remaining)
+        
+        print("\n" + "=" * 60)
+        print(f"📦 批次{MODE_NAMES[args.mode]}")
+        print("=" * 60)
+        print(f"輸入檔案：{len(items)} 個")
+        print(f"已完成：{len(items) - len(remaining)} 個（略過）")
+        print(f"待處理：{len(remaining)} 個，{args.workers} 個程序")
+        print(f"進度日誌：{journal_path}")
+        print("=" * 60 + "\n")
+        events.emit('job_start', mode=args.mode, inputs=len(items), skipped=len(items) - len(remaining),
+                    pending=len(remaining), workers=args.workers, journal=journal_path)
+        
+        start = time.perf_counter()
+        try:
+            with events.stage('process', workers=args.workers) as result:
+                stats = run_batch(remaining, args.mode, journal, settings, pool_args, args.workers,
+                                  args.retries, args.backoff, events)
+                result.update(stats)
+        except KeyboardInterrupt:
+            print("\n⏹️  已中斷，重新執行同一個指令即可從中斷處繼續")
+            return events.job_end(EXIT_ERROR)
+    
+    print(f"\n{'✅' if not stats['failed'] else '⚠️ '} 完成 {stats['done']} 個、失敗 {stats['failed']} 個，"
+          f"略過 {len(items) - len(remaining)} 個（{time.perf_counter() - start:.2f} 秒）")
+    if stats['failed']:
+        print(f"失敗原因記錄在 {journal_path}，重新執行即可重試失敗的檔案")
+        return events.job_end(EXIT_ERROR)
+    return events.job_end(EXIT_OK)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+區塊檔 - output.txt 的二進位索引格式，可用 mmap 直接讀取任一內容區塊
+
+使用方式：
+    python blockfile.py output.txt output.blk      # output.txt → 區塊檔
+    python blockfile.py output.blk output.txt      # 區塊檔 → output.txt
+    python blockfile.py output.blk --block 140     # 顯示第 140 個區塊
+
+格式（數值皆為 little-endian）：
+    檔頭      magic "W2PB"、版本（uint16）、保留（uint16）、變數長度（uint32）、區塊數 N（uint32）
+    變數      UTF-8 JSON 物件（保留順序）
+    索引表    N + 1 個 uint64，第 i 個區塊為檔案中 [offset[i], offset[i+1]) 的位元組
+    區塊內容  UTF-8 文字
+
+內容與 output.txt 讀取後的結果相同，兩種格式互轉不會遺失資料。
+"""
+
+import sys
+import mmap
+import json
+import struct
+import argparse
+
+from build_plan import parse_content_text, format_content_text
+from workspace import atomic_write
+
+
+MAGIC = b'W2PB'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+OFFSET = struct.Struct('<Q')
+
+
+def write_blockfile(path, variables, content_lines):
+    """
+    寫入區塊檔（先寫暫存檔再改名，讀取中的程序不會讀到寫一半的內容）
+    
+    Args:
+        path: 輸出路徑
+        variables: 變數字典
+        content_lines: 內容區塊列表
+    """
+    variables_data = json.dumps(variables, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    payloads = [text.encode('utf-8') for text in content_lines]
+    
+    offsets = []
+    position = HEADER.size + len(variables_data) + OFFSET.size * (len(payloads) + 1)
+    for payload in payloads:
+        offsets.append(position)
+        position += len(payload)
+    offsets.append(position)
+    
+    with atomic_write(path) as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(variables_data), len(payloads)))
+        f.write(variables_data)
+        f.write(b''.join(OFFSET.pack(offset) for offset in offsets))
+        f.writelines(payloads)
+
+
+def is_blockfile(path):
+    """檔案是否為區塊檔（檢查檔頭）"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class BlockFile:
+    """
+    以 mmap 開啟的區塊檔（只讀取用到的區塊）
+    
+    with BlockFile('output.blk') as blocks:
+        blocks.variables      # 變數字典
+        len(blocks)           # 區塊數
+        blocks[139]           # 第 140 個區塊
+    """
+    
+    def __init__(self, path):
+        """
+        Args:
+            path: 區塊檔路徑
+        
+        Raises:
+            ValueError: 不是區塊檔或版本不支援
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空檔案無法 mmap
+            self._file.close()
+            raise ValueError(f"不是區塊檔：{path}")
+        
+        try:
+            magic, version, _, variables_length, count = HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            magic, version = None, None
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"不是區塊檔：{path}")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"不支援的區塊檔版本 {version}：{path}")
+        
+        start = HEADER.size
+        self.variables = json.loads(self._map[start:start + variables_length].decode('utf-8'))
+        self._offsets_start = start + variables_length
+        self._count = count
+    
+    def __len__(self):
+        return self._count
+    
+    def __getitem__(self, index):
+        """第 index 個區塊（從 0 開始，可用負數）"""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(f"區塊 {index} 超出範圍（共 {self._count} 個）")
+        begin, end = struct.unpack_from('<QQ', self._map, self._offsets_start + OFFSET.size * index)
+        return self._map[begin:end].decode('utf-8')
+    
+    def __iter__(self):
+        for index in range(self._count):
+            yield self[index]
+    
+    def close(self):
+        """關閉檔案"""
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_content(path):
+    """
+    讀取 output.txt 或區塊檔（依檔頭判斷）
+    
+    Returns:
+        tuple: (變數字典, 內容區塊列表)
+    """
+    if is_blockfile(path):
+        with BlockFile(path) as blocks:
+            return dict(blocks.variables), list(blocks)
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_content_text(f.read())
+
+
+def convert(input_path, output_path):
+    """
+    output.txt 與區塊檔互轉（輸入是區塊檔時輸出 output.txt，否則輸出區塊檔）
+    
+    Returns:
+        int: 區塊數
+    """
+    variables, content_lines = read_content(input_path)
+    if is_blockfile(input_path):
+        with atomic_write(output_path, 'w', encoding='utf-8') as f:
+            f.write(format_content_text(variables, content_lines))
+    else:
+        write_blockfile(output_path, variables, content_lines)
+    return len(content_lines)
+
+
+def main():
+    """主程式"""
+    parser = argparse.ArgumentParser(description="output.txt 與區塊檔互轉")
+    parser.add_argument('input', help="output.txt 或區塊檔")
+    parser.add_argument('output', nargs='?', help="輸出檔案")
+    parser.add_argument('--block', type=int, help="顯示第 N 個區塊（從 1 開始）")
+    args = parser.parse_args()
+    
+    if args.block is not None:
+        if not is_blockfile(args.input):
+            print(f"❌ 不是區塊檔：{args.input}")
+            return 1
+        with BlockFile(args.input) as blocks:
+            if not 1 <= args.block <= len(blocks):
+                print(f"❌ 區塊 {args.block} 超出範圍（共 {len(blocks)} 個）")
+                return 1
+            print(blocks[args.block - 1])
+        return 0
+    
+    if not args.output:
+        parser.error("請指定輸出檔案")
+    count = convert(args.input, args.output)
+    print(f"✅ 已轉換 {count} 個區塊：{args.input} → {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,700 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Config 編譯器 - 將 config.txt 編譯成可重複使用的生成計畫（build plan）
+
+使用方式：
+    python build_plan.py [config] [template]
+
+功能：
+    - 一次解析 [顏色設定]、[一般設定]、[頁面結構] 三個區段
+    - 檢查頁面類型、參數與模板頁面設計，設定錯誤時在生成任何投影片前就停止
+    - 輸出 JSON 格式的生成計畫（含內容雜湊），雜湊相符時直接載入，不再解析
+"""
+
+import sys
+import os
+import json
+import hashlib
+import zipfile
+import re
+from collections import namedtuple
+
+from workspace import atomic_write
+
+
+# 生成計畫格式版本（格式變更時遞增，舊的計畫檔會自動重新編譯）
+PLAN_VERSION = 1
+
+# 頁面類型與參數規則：
+#   optional - 可有可無（例如小標題）
+#   required - 必須有參數
+#   none     - 不接受參數
+PAGE_TYPES = {
+    '封面頁': 'optional',
+    '主題頁': 'optional',
+    '內容頁': 'required',
+    '禮拜流程頁': 'required',
+    '經文頁': 'none',
+    '自動內容頁': 'none',
+}
+
+# 其他名稱為模板中自訂的頁面設計（例如「聖餐頁」），參數可有可無
+DESIGN_PAGE_RULE = 'optional'
+
+# [一般設定] 可用的設定與允許值
+GENERAL_SETTINGS = {
+    '段落間插入主題頁': ('是', '否'),
+}
+
+SECTIONS = ('[顏色設定]', '[一般設定]', '[頁面結構]')
+
+# 單行經文格式：〈章節〉內容
+VERSE_PATTERN = re.compile(r'^[〈<]([^〉>]+)[〉>](.+)$')
+
+# 展開後的單張投影片：
+#   kind  - 使用的頁面類型（封面頁、主題頁、內容頁、禮拜流程頁、經文頁或模板中的頁面設計名稱）
+#   args  - 頁面參數 tuple（封面頁/主題頁：(小標題,)、內容頁/禮拜流程頁/自訂設計：(文字,)、經文頁：(章節, 內容)）
+#   label - 顯示用的說明文字
+#   block - 來源內容區塊索引（只有自動內容頁產生的投影片才有）
+SlideSpec = namedtuple('SlideSpec', ['kind', 'args', 'label', 'block'])
+
+
+class ConfigError(ValueError):
+    """Config 檔案內容錯誤（包含所有發現的問題）"""
+    
+    def __init__(self, config_path, errors):
+        self.config_path = config_path
+        self.errors = list(errors)
+        message = f"{config_path} 有 {len(self.errors)} 個錯誤：\n" + '\n'.join(
+            f"  - {error}" for error in self.errors
+        )
+        super().__init__(message)
+
+
+class ArgumentError(ValueError):
+    """命令列參數錯誤（格式錯誤，或與設定、內容不符，例如投影片編號超出範圍）"""
+
+
+def parse_color(value):
+    """
+    解析顏色設定值
+    
+    Args:
+        value: "R,G,B" 或 "#RRGGBB"
+    
+    Returns:
+        tuple: (r, g, b)
+    """
+    value = value.strip()
+    if value.startswith('#'):
+        if not re.match(r'^#[0-9A-Fa-f]{6}$', value):
+            raise ValueError(f"16進位色碼格式錯誤：{value}")
+        hex_color = value.lstrip('#')
+        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+    
+    try:
+        rgb = tuple(int(c.strip()) for c in value.split(','))
+    except ValueError:
+        raise ValueError(f"RGB 格式錯誤：{value}")
+    if len(rgb) != 3 or not all(0 <= c <= 255 for c in rgb):
+        raise ValueError(f"RGB 必須是三個 0-255 的數字：{value}")
+    return rgb
+
+
+def parse_color_setting(key, value, line):
+    """
+    解析 [顏色設定] 區段的一行
+    
+    Args:
+        key: 設定名稱
+        value: 設定值（沒有 = 時為 None）
+        line: 原始內容（錯誤訊息用）
+    
+    Returns:
+        tuple: (r, g, b)
+    
+    Raises:
+        ValueError: 不是「提取文字顏色 = 顏色」或顏色格式錯誤
+    """
+    if key != '提取文字顏色' or value is None:
+        raise ValueError(f"未知的顏色設定「{line}」")
+    return parse_color(value)
+
+
+def _split_setting(line):
+    """「名稱 = 值」→ (名稱, 值)；沒有 = 時值為 None"""
+    if '=' in line:
+        key, value = line.split('=', 1)
+        return key.strip(), value.strip()
+    return line, None
+
+
+def read_target_color(config_path):
+    """
+    只讀取 [顏色設定] 的提取文字顏色（其他區段的錯誤不影響提取）
+    
+    Args:
+        config_path: config 檔案路徑（或已編譯的 .plan.json）
+    
+    Returns:
+        tuple: (r, g, b)；沒有設定時為 None
+    
+    Raises:
+        ConfigError: 顏色設定有誤
+    """
+    if config_path.endswith('.plan.json'):
+        plan = read_build_plan(config_path)
+        if plan is None:
+            raise ConfigError(config_path, ["不是有效的生成計畫檔（格式錯誤或版本不符）"])
+        return tuple(plan['target_color']) if plan['target_color'] else None
+    
+    with open(config_path, 'rb') as f:
+        text = f.read().decode('utf-8-sig')
+    
+    errors = []
+    target_color = None
+    section = None
+    for line_no, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('[') and line.endswith(']'):
+            section = line
+            continue
+        if section == '[顏色設定]':
+            try:
+                target_color = parse_color_setting(*_split_setting(line), line)
+            except ValueError as e:
+                errors.append(f"第 {line_no} 行：{e}")
+    
+    if errors:
+        raise ConfigError(config_path, errors)
+    return target_color
+
+
+def compute_plan_hash(config_bytes):
+    """計算生成計畫的內容雜湊（config 內容 + 計畫格式版本）"""
+    digest = hashlib.sha256()
+    digest.update(f"plan-v{PLAN_VERSION}\n".encode('utf-8'))
+    digest.update(config_bytes)
+    return digest.hexdigest()
+
+
+def compute_template_hash(template_path):
+    """計算模板檔案的內容雜湊"""
+    digest = hashlib.sha256()
+    with open(template_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def check_template(template_path, page_structure=()):
+    """
+    檢查模板是否符合生成計畫的需求（內建頁面設計齊全、config 使用的自訂設計存在）
+    
+    Args:
+        template_path: 模板 PPT 路徑
+        page_structure: [(頁面類型, 參數), ...]
+    
+    Returns:
+        list: 錯誤訊息（沒有錯誤時為空）
+    """
+    # template_analysis 會用到本模組，在這裡才匯入以避免循環匯入
+    from template_analysis import DEFAULT_DESIGNS, load_template_analysis
+    
+    try:
+        designs = load_template_analysis(template_path)['designs']
+    except (OSError, KeyError, zipfile.BadZipFile, SyntaxError) as e:
+        return [f"無法讀取模板 {template_path}：{e}"]
+    
+    errors = [f"模板缺少「{kind}」頁面設計" for kind in DEFAULT_DESIGNS if kind not in designs]
+    for page_type in dict.fromkeys(page_type for page_type, _ in page_structure):
+        if page_type not in PAGE_TYPES and page_type not in designs:
+            errors.append(f"未知的頁面類型「{page_type}」（模板中也沒有這個名稱的頁面設計）")
+    return errors
+
+
+def compile_config(config_path, template_path=None, config_bytes=None):
+    """
+    編譯 config 檔案為生成計畫
+    
+    Args:
+        config_path: config 檔案路徑
+        template_path: 模板 PPT 路徑（可選，提供時會檢查模板的頁面設計）
+        config_bytes: 已讀取的 config 內容（可選）
+    
+    Returns:
+        dict: 生成計畫
+    
+    Raises:
+        ConfigError: config 內容有誤
+    """
+    if config_bytes is None:
+        with open(config_path, 'rb') as f:
+            config_bytes = f.read()
+    
+    errors = []
+    target_color = None
+    settings = {'段落間插入主題頁': False}
+    page_structure = []
+    section = None
+    
+    text = config_bytes.decode('utf-8-sig')
+    for line_no, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        
+        # 跳過空行和註解
+        if not line or line.startswith('#'):
+            continue
+        
+        # 區段標題
+        if line.startswith('[') and line.endswith(']'):
+            if line not in SECTIONS:
+                errors.append(f"第 {line_no} 行：未知的區段 {line}")
+            section = line
+            continue
+        
+        key, value = _split_setting(line)
+        
+        if section == '[顏色設定]':
+            try:
+                target_color = parse_color_setting(key, value, line)
+            except ValueError as e:
+                errors.append(f"第 {line_no} 行：{e}")
+        
+        elif section == '[一般設定]':
+            if key not in GENERAL_SETTINGS:
+                errors.append(f"第 {line_no} 行：未知的一般設定「{key}」")
+            elif value not in GENERAL_SETTINGS[key]:
+                allowed = '/'.join(GENERAL_SETTINGS[key])
+                errors.append(f"第 {line_no} 行：「{key}」的值必須是 {allowed}，目前是「{value}」")
+            else:
+                settings[key] = (value == '是')
+        
+        elif section == '[頁面結構]':
+            # 不是內建類型的名稱視為模板的頁面設計（有模板時由 check_template 確認）
+            rule = PAGE_TYPES.get(key, DESIGN_PAGE_RULE)
+            if value == '':
+                value = None
+            if rule == 'required' and not value:
+                errors.append(f"第 {line_no} 行：「{key}」必須指定內容，例如「{key} = 內容」")
+                continue
+            if rule == 'none' and value:
+                errors.append(f"第 {line_no} 行：「{key}」不接受參數「{value}」")
+                continue
+            page_structure.append([key, value])
+        
+        else:
+            errors.append(f"第 {line_no} 行：設定「{line}」不在任何區段內")
+    
+    if template_path:
+        errors.extend(check_template(template_path, page_structure))
+    
+    if errors:
+        raise ConfigError(config_path, errors)
+    
+    return {
+        'version': PLAN_VERSION,
+        'hash': compute_plan_hash(config_bytes),
+        'template_hash': compute_template_hash(template_path) if template_path else None,
+        'target_color': list(target_color) if target_color else None,
+        'settings': settings,
+        'page_structure': page_structure,
+    }
+
+
+def parse_content_text(text):
+    """
+    解析 output.txt 格式的文字（變數區 + 以空行分隔的內容區塊）
+    
+    Args:
+        text: 檔案內容
+    
+    Returns:
+        tuple: (變數字典, 內容區塊列表)
+    """
+    lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    
+    variables = {}
+    content_lines = []
+    in_variables = False
+    in_content = False
+    current_block = []
+    
+    for line in lines:
+        # 檢查變數區開始
+        if line.strip() == '[變數]':
+            in_variables = True
+            continue
+        
+        # 檢查變數區結束
+        if line.strip() == '[變數結束]':
+            in_variables = False
+            in_content = True
+            continue
+        
+        # 讀取變數
+        if in_variables and '=' in line:
+            key, value = line.split('=', 1)
+            variables[key.strip()] = value.strip()
+        
+        # 讀取內容（使用空行分隔不同頁面）
+        elif in_content:
+            if line.strip():
+                # 有內容的行，加入當前區塊
+                current_block.append(line.strip())
+            else:
+                # 空行，表示一個區塊結束
+                if current_block:
+                    # 將區塊合併成一個項目（用換行符連接）
+                    content_lines.append('\n'.join(current_block))
+                    current_block = []
+    
+    # 處理最後一個區塊（如果檔案結尾沒有空行）
+    if current_block:
+        content_lines.append('\n'.join(current_block))
+    
+    return variables, content_lines
+
+
+def format_content_text(variables, content_lines):
+    """
+    產生 output.txt 格式的文字（parse_content_text 的反向）
+    
+    Args:
+        variables: 變數字典（依寫入順序）
+        content_lines: 內容區塊列表
+    
+    Returns:
+        str: 檔案內容
+    """
+    lines = ["[變數]\n"]
+    for key, value in variables.items():
+        lines.append(f"{key}={value}\n")
+    lines.append("[變數結束]\n\n")
+    
+    for text in content_lines:
+        lines.append(f"{text}\n\n")
+    return ''.join(lines)
+
+
+def split_content_blocks(blocks):
+    """
+    將內容區塊切分成與讀取 output.txt 相同的區塊（每行去除空白，空行視為區塊分隔）
+    
+    Args:
+        blocks: 內容區塊列表（例如 BlueTextExtractor.extracted_text）
+    
+    Returns:
+        list: 內容區塊列表
+    """
+    content_lines = []
+    for block in blocks:
+        current_block = []
+        for line in block.replace('\r\n', '\n').replace('\r', '\n').split('\n'):
+            if line.strip():
+                current_block.append(line.strip())
+            elif current_block:
+                content_lines.append('\n'.join(current_block))
+                current_block = []
+        if current_block:
+            content_lines.append('\n'.join(current_block))
+    return content_lines
+
+
+def split_verse_variable(verse_data):
+    """
+    拆解變數區的經文（〈章節〉內容）
+    
+    Returns:
+        tuple: (章節, 內容)；格式不符時回傳 None
+    """
+    if '〉' not in verse_data:
+        return None
+    verse_ref, verse_text = verse_data.split('〉', 1)
+    # 移除 < 或 〈 以及緊跟的一個空格（如果有的話）
+    verse_ref = verse_ref.lstrip('〈<')
+    if verse_ref.startswith(' '):
+        verse_ref = verse_ref[1:]
+    return verse_ref, verse_text.strip()
+
+
+def classify_block(block):
+    """
+    判斷內容區塊的頁面類型
+    
+    Returns:
+        tuple: ('經文頁', (章節, 內容)) 或 ('內容頁', (區塊文字,))
+    """
+    lines_in_block = block.split('\n')
+    first_line = lines_in_block[0] if lines_in_block else ""
+    
+    # 單行經文格式：〈章節〉內容
+    verse_match = VERSE_PATTERN.match(first_line)
+    if verse_match:
+        return '經文頁', (verse_match.group(1), verse_match.group(2).strip())
+    
+    if first_line.startswith('〈') or first_line.startswith('<'):
+        # 多行經文格式：第一行是章節，後面是內容
+        verse_ref = first_line.lstrip('〈<')
+        # 移除開頭的一個空格（如果有的話）
+        if verse_ref.startswith(' '):
+            verse_ref = verse_ref[1:]
+        # 移除結尾的 > 或 〉 以及前面的一個空格（如果有的話）
+        verse_ref = verse_ref.rstrip('〉>')
+        if verse_ref.endswith(' '):
+            verse_ref = verse_ref[:-1]
+        verse_text = '\n'.join(lines_in_block[1:]) if len(lines_in_block) > 1 else ""
+        return '經文頁', (verse_ref, verse_text)
+    
+    # 一般內容（整個區塊）
+    return '內容頁', (block,)
+
+
+def expand_slides(page_structure, variables, content_lines, insert_title_between_paragraphs=False):
+    """
+    將頁面結構展開成逐張投影片的清單（經文頁、自動內容頁會展開成多張）
+    
+    Args:
+        page_structure: [(頁面類型, 參數), ...]
+        variables: 變數字典
+        content_lines: 內容區塊列表
+        insert_title_between_paragraphs: 自動內容頁段落間是否插入主題頁
+    
+    Returns:
+        list: SlideSpec 列表（依投影片順序）
+    """
+    specs = []
+    content_index = 0  # 追蹤自動內容頁的當前索引
+    
+    for page_type, param in page_structure:
+        if page_type in ('封面頁', '主題頁'):
+            label = page_type + (f" = {param}" if param else "")
+            specs.append(SlideSpec(page_type, (param,), label, None))
+        
+        elif page_type in ('內容頁', '禮拜流程頁'):
+            if param:
+                specs.append(SlideSpec(page_type, (param,), f"{page_type} = {param}", None))
+        
+        elif page_type == '經文頁':
+            # 讀取變數區的經文1, 經文2, ...
+            verse_num = 1
+            while f"經文{verse_num}" in variables:
+                verse = split_verse_variable(variables[f"經文{verse_num}"])
+                if verse:
+                    specs.append(SlideSpec('經文頁', verse, f"經文頁 {verse_num}: {verse[0]}", None))
+                verse_num += 1
+        
+        elif page_type == '自動內容頁':
+            # 從內容區讀取，每個區塊是一頁
+            first_paragraph = True
+            while content_index < len(content_lines):
+                block_index = content_index
+                block = content_lines[content_index]
+                content_index += 1
+                
+                # 如果啟用「段落間插入主題頁」且不是第一個段落，先插入主題頁
+                if insert_title_between_paragraphs and not first_paragraph:
+                    specs.append(SlideSpec('主題頁', (None,), "自動內容頁：分隔主題頁", block_index))
+                first_paragraph = False
+                
+                kind, args = classify_block(block)
+                if kind == '經文頁':
+                    label = f"自動內容頁：經文頁 {args[0]}"
+                else:
+                    label = "自動內容頁：內文頁"
+                specs.append(SlideSpec(kind, args, label, block_index))
+        
+        else:
+            # 模板中自訂的頁面設計
+            label = page_type + (f" = {param}" if param else "")
+            specs.append(SlideSpec(page_type, (param,), label, None))
+    
+    return specs
+
+
+def parse_slide_range(text):
+    """
+    解析投影片範圍
+    
+    Args:
+        text: 例如 "12-18"、"5" 或 "1,3,10-12"（投影片編號從 1 開始）
+    
+    Returns:
+        list: 排序後的投影片編號
+    
+    Raises:
+        ValueError: 格式錯誤
+    """
+    numbers = set()
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if '-' in part:
+                start, end = (int(value) for value in part.split('-', 1))
+            else:
+                start = end = int(part)
+        except ValueError:
+            raise ValueError(f"投影片範圍格式錯誤：{text}（例如 12-18 或 1,3,10-12）")
+        if start < 1 or end < start:
+            raise ValueError(f"投影片範圍錯誤：{part}（編號從 1 開始，結尾不可小於開頭）")
+        numbers.update(range(start, end + 1))
+    if not numbers:
+        raise ValueError(f"投影片範圍格式錯誤：{text}（例如 12-18 或 1,3,10-12）")
+    return sorted(numbers)
+
+
+def check_slide_numbers(numbers, total):
+    """
+    確認投影片編號都在簡報範圍內
+    
+    Args:
+        numbers: 投影片編號列表（從 1 開始）
+        total: 簡報的投影片數量
+    
+    Raises:
+        ValueError: 編號超出範圍
+    """
+    missing = [number for number in numbers if not 1 <= number <= total]
+    if missing:
+        raise ValueError(f"投影片 {format_slide_numbers(missing)} 超出範圍（共 {total} 張）")
+
+
+def format_slide_numbers(numbers):
+    """投影片編號列表 → 範圍文字，例如 [1, 2, 3, 7] → 1-3, 7"""
+    ranges = []
+    for number in sorted(numbers):
+        if ranges and number == ranges[-1][1] + 1:
+            ranges[-1][1] = number
+        else:
+            ranges.append([number, number])
+    return ', '.join(str(start) if start == end else f"{start}-{end}" for start, end in ranges)
+
+
+def block_slide_numbers(specs, block):
+    """
+    第 block 個內容區塊（從 1 開始）產生的投影片編號（包含段落間插入的分隔主題頁）
+    
+    Args:
+        specs: expand_slides 的結果
+        block: 內容區塊編號
+    
+    Returns:
+        list: 投影片編號（從 1 開始）
+    """
+    return [number for number, spec in enumerate(specs, 1) if spec.block == block - 1]
+
+
+def default_plan_path(config_path):
+    """config.txt → config.plan.json"""
+    return os.path.splitext(config_path)[0] + '.plan.json'
+
+
+def read_build_plan(plan_path):
+    """
+    讀取已編譯的生成計畫
+    
+    Returns:
+        dict: 生成計畫；檔案不存在、格式錯誤或版本不符時回傳 None
+    """
+    try:
+        with open(plan_path, 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(plan, dict) or plan.get('version') != PLAN_VERSION:
+        return None
+    return plan
+
+
+def write_build_plan(plan, plan_path):
+    """儲存生成計畫（JSON，先寫暫存檔再改名，共用同一個 config 的工作不會讀到寫一半的計畫）"""
+    with atomic_write(plan_path, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+
+
+def load_build_plan(config_path, template_path=None, plan_path=None):
+    """
+    載入生成計畫：計畫檔雜湊與 config 相符時直接使用，否則重新編譯並儲存
+    
+    Args:
+        config_path: config 檔案路徑（若為 .plan.json 則直接讀取計畫）
+        template_path: 模板 PPT 路徑（可選）
+        plan_path: 計畫檔路徑（預設與 config 同目錄的 .plan.json）
+    
+    Returns:
+        dict: 生成計畫
+    
+    Raises:
+        ConfigError: config 內容有誤
+    """
+    if config_path.endswith('.plan.json'):
+        plan = read_build_plan(config_path)
+        if plan is None:
+            raise ConfigError(config_path, ["不是有效的生成計畫檔（格式錯誤或版本不符）"])
+        return plan
+    
+    with open(config_path, 'rb') as f:
+        config_bytes = f.read()
+    
+    if plan_path is None:
+        plan_path = default_plan_path(config_path)
+    
+    plan = read_build_plan(plan_path)
+    if plan is not None and plan.get('hash') == compute_plan_hash(config_bytes):
+        if not template_path:
+            return plan
+        # config 未變更，只需確認模板（模板也相同時完全不用檢查）
+        template_hash = compute_template_hash(template_path)
+        if plan.get('template_hash') == template_hash:
+            return plan
+        errors = check_template(template_path, plan['page_structure'])
+        if errors:
+            raise ConfigError(config_path, errors)
+        plan['template_hash'] = template_hash
+    else:
+        plan = compile_config(config_path, template_path, config_bytes=config_bytes)
+    
+    try:
+        write_build_plan(plan, plan_path)
+    except OSError:
+        # 計畫檔只是快取，無法寫入時不影響生成
+        pass
+    return plan
+
+
+def main():
+    """主程式：編譯並檢查 config"""
+    config_path = sys.argv[1] if len(sys.argv) >= 2 else "config.txt"
+    template_path = sys.argv[2] if len(sys.argv) >= 3 else None
+    
+    if config_path in ['-h', '--help', 'help']:
+        print("使用方式：")
+        print("  python build_plan.py [config] [template]")
+        print()
+        print("檢查 config 並輸出生成計畫（config.plan.json）")
+        return 0
+    
+    if template_path is None and os.path.exists("template.pptx"):
+        template_path = "template.pptx"
+    
+    try:
+        plan = compile_config(config_path, template_path)
+    except ConfigError as e:
+        print(f"❌ {e}")
+        return 1
+    
+    plan_path = default_plan_path(config_path)
+    write_build_plan(plan, plan_path)
+    print(f"✅ Config 檢查通過：{len(plan['page_structure'])} 頁")
+    print(f"📝 生成計畫已儲存到：{plan_path}")
+    print(f"🔑 雜湊：{plan['hash']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+磁碟快取 - 以內容雜湊為鍵的持久快取，依總大小做 LRU 淘汰
+
+每個項目是快取目錄下的一個檔案（zlib 壓縮），讀取時更新檔案時間，
+超過大小上限時刪除最久未使用的項目。
+"""
+
+import os
+import zlib
+import hashlib
+import tempfile
+
+
+def make_key(*parts):
+    """
+    由多個部分組成快取鍵（SHA-256）
+    
+    Args:
+        *parts: bytes 或 str
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        digest.update(len(part).to_bytes(8, 'little'))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """以檔案儲存的 LRU 快取"""
+    
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            directory: 快取目錄（不存在時自動建立）
+            max_bytes: 快取總大小上限
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._total_bytes = None  # 第一次寫入時才計算
+        os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.z')
+    
+    def get(self, key):
+        """
+        讀取快取
+        
+        Returns:
+            bytes: 快取內容；沒有快取時回傳 None
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            self.misses += 1
+            return None
+        # 更新使用時間（LRU）
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+    
+    def put(self, key, data):
+        """
+        寫入快取（先寫暫存檔再改名，其他程序不會讀到寫一半的內容）
+        
+        Args:
+            key: 快取鍵
+            data: 內容（bytes）
+        """
+        if self._total_bytes is None:
+            self._total_bytes = self.size()
+        
+        path = self._path(key)
+        compressed = zlib.compress(data)
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        
+        self._total_bytes += len(compressed) - old_size
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+    
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.z'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+    
+    def evict(self):
+        """超過大小上限時，從最久未使用的項目開始刪除"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._total_bytes = total
+    
+    def size(self):
+        """快取目前的總大小（位元組）"""
+        return sum(size for _, size, _ in self._entries())
+    
+    def stats(self):
+        """命中統計"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+        }
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+簡報比較 - 比較兩份 PPTX，列出新增、刪除與修改的投影片
+
+使用方式：
+    python deck_diff.py old.pptx new.pptx [--json]
+
+直接讀取壓縮檔中的投影片 XML（不使用 python-pptx），每張投影片計算一個內容雜湊：
+正規化的 XML 加上關聯目標的內容（版面配置、圖片等以壓縮檔記錄的 CRC 與大小代表，
+不需要讀取媒體檔；超連結等外部關聯以網址代表）。雜湊相同表示投影片內容相同，也可用來只同步有變動的投影片。
+
+結束碼：0 完全相同、1 有差異、2 無法讀取檔案
+"""
+
+import sys
+import json
+import time
+import zipfile
+import difflib
+import hashlib
+import argparse
+from lxml import etree
+
+from template_analysis import NS, part_rels, external_rels
+
+
+R_ID = f"{{{NS['r']}}}id"
+
+# 不影響投影片內容的關聯（備忘稿）
+IGNORED_RELS = ('notesSlide',)
+
+# 報告中顯示的文字長度
+PREVIEW_LENGTH = 40
+
+
+def _part_identity(zf, partname):
+    """關聯目標的內容代表值（壓縮檔記錄的 CRC 與大小）"""
+    try:
+        info = zf.getinfo(partname)
+    except KeyError:
+        return 'missing'
+    return f"{info.CRC:08x}-{info.file_size}"
+
+
+def slide_text(sld):
+    """投影片上的文字（段落以 / 分隔）"""
+    paragraphs = []
+    for p in sld.iter(f"{{{NS['a']}}}p"):
+        text = ''.join(t.text or '' for t in p.iter(f"{{{NS['a']}}}t")).strip()
+        if text:
+            paragraphs.append(text)
+    return ' / '.join(paragraphs)
+
+
+def slide_entries(path):
+    """
+    依投影片順序計算每張投影片的內容雜湊
+    
+    Args:
+        path: PPTX 路徑
+    
+    Returns:
+        list: 每張投影片的 {number, part, hash, text}
+    """
+    entries = []
+    with zipfile.ZipFile(path) as zf:
+        presentation = etree.fromstring(zf.read('ppt/presentation.xml'))
+        pres_rels = part_rels(zf, 'ppt/presentation.xml')
+        for number, sld_id in enumerate(presentation.iterfind('p:sldIdLst/p:sldId', NS), 1):
+            partname = pres_rels[sld_id.get(R_ID)][1]
+            sld = etree.fromstring(zf.read(partname))
+            
+            # 關聯 ID 換成「類型:目標內容」（外部連結為「類型:網址」），
+            # 不同簡報中編號不同但內容相同的關聯視為相同
+            identities = {rid: (kind, f"{kind}:{_part_identity(zf, target)}")
+                          for rid, (kind, target) in part_rels(zf, partname).items()}
+            identities.update({rid: (kind, f"{kind}:{url}")
+                               for rid, (kind, url) in external_rels(zf, partname).items()})
+            for attribute in sld.xpath('//@r:*', namespaces=NS):
+                if attribute in identities:
+                    attribute.getparent().set(attribute.attrname, identities[attribute][1])
+            digest = hashlib.sha256(etree.tostring(sld))
+            for identity in sorted(identity for kind, identity in identities.values() if kind not in IGNORED_RELS):
+                digest.update(identity.encode('utf-8'))
+            
+            entries.append({
+                'number': number,
+                'part': partname,
+                'hash': digest.hexdigest(),
+                'text': slide_text(sld),
+            })
+    return entries
+
+
+def diff_decks(old_entries, new_entries):
+    """
+    比較兩份簡報的投影片（依雜湊序列對齊）
+    
+    Returns:
+        list: 變動清單，每項為 {op: changed/added/removed, old, new, text, old_text}
+              （old、new 為投影片編號，沒有時為 None）
+    """
+    old_hashes = [entry['hash'] for entry in old_entries]
+    new_hashes = [entry['hash'] for entry in new_entries]
+    changes = []
+    
+    def change(op, old=None, new=None):
+        old_entry = old_entries[old] if old is not None else None
+        new_entry = new_entries[new] if new is not None else None
+        changes.append({
+            'op': op,
+            'old': old_entry['number'] if old_entry else None,
+            'new': new_entry['number'] if new_entry else None,
+            'text': (new_entry or old_entry)['text'],
+            'old_text': old_entry['text'] if old_entry and new_entry else None,
+        })
+    
+    matcher = difflib.SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        # 取代的範圍：對應的位置視為修改，多出來的是新增或刪除
+        paired = min(i2 - i1, j2 - j1) if tag == 'replace' else 0
+        for k in range(paired):
+            change('changed', i1 + k, j1 + k)
+        for i in range(i1 + paired, i2):
+            change('removed', old=i)
+        for j in range(j1 + paired, j2):
+            change('added', new=j)
+    return changes
+
+
+def _preview(text):
+    text = text or '（沒有文字）'
+    return text[:PREVIEW_LENGTH] + "..." if len(text) > PREVIEW_LENGTH else text
+
+
+def main():
+    """主程式"""
+    parser = argparse.ArgumentParser(description="比較兩份 PPTX 的投影片")
+    parser.add_argument('old', help="舊的簡報")
+    parser.add_argument('new', help="新的簡報")
+    parser.add_argument('--json', action='store_true', help="以 JSON 輸出（包含每張投影片的雜湊）")
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    try:
+        old_entries = slide_entries(args.old)
+        new_entries = slide_entries(args.new)
+    except (OSError, KeyError, zipfile.BadZipFile, etree.XMLSyntaxError) as e:
+        print(f"❌ 無法讀取簡報：{e}")
+        return 2
+    changes = diff_decks(old_entries, new_entries)
+    elapsed = time.perf_counter() - start
+    
+    if args.json:
+        print(json.dumps({'old': old_entries, 'new': new_entries, 'changes': changes},
+                         ensure_ascii=False, indent=2))
+        return 1 if changes else 0
+    
+    print(f"📊 比較 {args.old}（{len(old_entries)} 張）→ {args.new}（{len(new_entries)} 張）")
+    for item in changes:
+        if item['op'] == 'changed':
+            print(f"  ～ 第 {item['old']} 張 → 第 {item['new']} 張 已修改")
+            print(f"      舊：{_preview(item['old_text'])}")
+            print(f"      新：{_preview(item['text'])}")
+        elif item['op'] == 'added':
+            print(f"  ＋ 第 {item['new']} 張 新增：{_preview(item['text'])}")
+        else:
+            print(f"  － 第 {item['old']} 張 刪除：{_preview(item['text'])}")
+    
+    counts = {op: sum(1 for item in changes if item['op'] == op) for op in ('changed', 'added', 'removed')}
+    unchanged = len(old_entries) - counts['changed'] - counts['removed']
+    summary = (f"相同 {unchanged} 張，修改 {counts['changed']} 張，新增 {counts['added']} 張，"
+               f"刪除 {counts['removed']} 張（{elapsed * 1000:.0f} ms）")
+    print(f"{'⚠️ ' if changes else '✅'} {summary}")
+    return 1 if changes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Word 文件串流讀取 - 直接開啟 docx 壓縮檔，只讀取主文件 XML
+
+python-docx 會把整份 document.xml 建成 XML 樹，並把文件中的圖片等媒體都讀進記憶體；
+掃描檔彙整的講章常有數百 MB 的圖片，提取時卻只需要文字。這裡以 iterparse
+逐段讀取 word/document.xml（解壓縮也是串流），處理完的段落立即釋放，
+完全不讀取媒體檔，記憶體用量與文件大小無關。
+
+段落與 run 的文字、字體大小、顏色與 python-docx 的 Document.paragraphs 相同
+（只有本文的段落，不含表格與文字方塊內的段落；大小與顏色為 run 直接設定的格式）。
+"""
+
+import sys
+import zipfile
+import posixpath
+from collections import namedtuple
+from lxml import etree
+
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+OFFICE_DOCUMENT_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+DEFAULT_DOCUMENT_PART = 'word/document.xml'
+
+# 段落與 run（size：字體大小 pt，未設定為 None；color：RGB 顏色 (r, g, b)，非 RGB 顏色為 None；
+# bold：粗體 True/False，未設定為 None；style：段落樣式 ID，未指定為空字串）
+DocxRun = namedtuple('DocxRun', ['text', 'size', 'color', 'bold'])
+DocxParagraph = namedtuple('DocxParagraph', ['text', 'runs', 'style'])
+
+_P = f'{{{W_NS}}}p'
+_R = f'{{{W_NS}}}r'
+_BODY = f'{{{W_NS}}}body'
+_HYPERLINK = f'{{{W_NS}}}hyperlink'
+_RPR = f'{{{W_NS}}}rPr'
+_PSTYLE = f'{{{W_NS}}}pPr/{{{W_NS}}}pStyle'
+_VAL = f'{{{W_NS}}}val'
+
+# run 內容元素 → 文字（與 python-docx 的 Run.text 相同）
+_RUN_TEXT = {
+    f'{{{W_NS}}}tab': '\t',
+    f'{{{W_NS}}}ptab': '\t',
+    f'{{{W_NS}}}cr': '\n',
+    f'{{{W_NS}}}noBreakHyphen': '-',
+}
+_T = f'{{{W_NS}}}t'
+_BR = f'{{{W_NS}}}br'
+_BR_TYPE = f'{{{W_NS}}}type'
+
+# 開關屬性的否定值（w:b 等）
+_OFF_VALUES = ('0', 'false', 'off')
+
+
+def document_part_name(zf):
+    """主文件在壓縮檔中的名稱（由 _rels/.rels 找出，沒有時使用 word/document.xml）"""
+    try:
+        rels = etree.fromstring(zf.read('_rels/.rels'))
+    except KeyError:
+        return DEFAULT_DOCUMENT_PART
+    for rel in rels.iter(f'{{{REL_NS}}}Relationship'):
+        if rel.get('Type') == OFFICE_DOCUMENT_REL and rel.get('TargetMode') != 'External':
+            return posixpath.normpath(rel.get('Target').lstrip('/'))
+    return DEFAULT_DOCUMENT_PART
+
+
+def _run_text(r):
+    """run 的文字（換行、定位字元與 python-docx 相同）"""
+    parts = []
+    for child in r:
+        tag = child.tag
+        if tag == _T:
+            parts.append(child.text or '')
+        elif tag == _BR:
+            # 分頁、分欄不算文字
+            if child.get(_BR_TYPE, 'textWrapping') == 'textWrapping':
+                parts.append('\n')
+        elif tag in _RUN_TEXT:
+            parts.append(_RUN_TEXT[tag])
+    return ''.join(parts)
+
+
+def _run_format(r):
+    """run 直接設定的字體大小（pt）、RGB 顏色與粗體"""
+    rpr = r.find(_RPR)
+    if rpr is None:
+        return None, None, None
+    size = None
+    sz = rpr.find(f'{{{W_NS}}}sz')
+    if sz is not None and sz.get(_VAL):
+        size = int(sz.get(_VAL)) / 2
+    color = None
+    c = rpr.find(f'{{{W_NS}}}color')
+    if c is not None and c.get(f'{{{W_NS}}}themeColor') is None:
+        val = c.get(_VAL)
+        if val and val != 'auto':
+            color = tuple(int(val[i:i + 2], 16) for i in (0, 2, 4))
+    bold = None
+    b = rpr.find(f'{{{W_NS}}}b')
+    if b is not None:
+        bold = b.get(_VAL, 'true') not in _OFF_VALUES
+    return size, color, bold
+
+
+def read_paragraph(p):
+    """
+    將 w:p 元素轉成 DocxParagraph
+    
+    Args:
+        p: w:p 元素
+    
+    Returns:
+        DocxParagraph: 段落文字（包含超連結文字）、run 列表（不含超連結內的 run）與段落樣式
+    """
+    runs = []
+    texts = []
+    for child in p:
+        if child.tag == _R:
+            text = _run_text(child)
+            runs.append(DocxRun(text, *_run_format(child)))
+            texts.append(text)
+        elif child.tag == _HYPERLINK:
+            texts.extend(_run_text(r) for r in child.iterchildren(_R))
+    style = p.find(_PSTYLE)
+    return DocxParagraph(''.join(texts), runs, style.get(_VAL, '') if style is not None else '')
+
+
+def iter_paragraphs(source):
+    """
+    逐段讀取 Word 文件本文的段落
+    
+    Args:
+        source: 檔案路徑或 file-like 物件（需可 seek）
+    
+    Yields:
+        DocxParagraph
+    """
+    with zipfile.ZipFile(source) as zf:
+        with zf.open(document_part_name(zf)) as stream:
+            for _, element in etree.iterparse(stream, events=('end',), tag=(_P, f'{{{W_NS}}}tbl',
+                                                                         f'{{{W_NS}}}sectPr')):
+                parent = element.getparent()
+                if parent is None or parent.tag != _BODY:
+                    # 表格內的段落，等整個表格結束後一起釋放
+                    continue
+                if element.tag == _P:
+                    yield read_paragraph(element)
+                # 釋放已處理的本文元素
+                element.clear()
+                while element.getprevious() is not None:
+                    del parent[0]
+
+
+def coalesce_runs(paragraph):
+    """
+    合併格式相同的相鄰 run（Word 常因拼字檢查、修訂記錄把同一段文字拆成許多 run）
+    
+    Args:
+        paragraph: DocxParagraph
+    
+    Returns:
+        DocxParagraph: 段落文字不變；相鄰且字體大小、顏色、粗體都相同的 run 合併成一個
+                       （各種格式的字數不變，段落特徵的結果相同）
+    """
+    runs = paragraph.runs
+    if len(runs) < 2:
+        return paragraph
+    
+    merged = []
+    current = runs[0]
+    texts = [current.text]
+    for run in runs[1:]:
+        if run[1:] == current[1:]:
+            texts.append(run.text)
+        else:
+            merged.append(current._replace(text=''.join(texts)))
+            current = run
+            texts = [run.text]
+    merged.append(current._replace(text=''.join(texts)))
+    if len(merged) == len(runs):
+        return paragraph
+    return paragraph._replace(runs=merged)
+
+
+def paragraphs_from_document(doc):
+    """
+    將已開啟的 python-docx Document 轉成 DocxParagraph 列表
+    
+    Args:
+        doc: docx Document 物件
+    """
+    return [read_paragraph(paragraph._p) for paragraph in doc.paragraphs]
+
+
+def peak_memory_mb():
+    """
+    目前程序的記憶體使用峰值（MB），無法取得時回傳 None
+    """
+    try:
+        import resource
+    except ImportError:
+        return _windows_peak_memory_mb()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 的單位是 bytes，Linux 是 KB
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def _windows_peak_memory_mb():
+    """Windows：GetProcessMemoryInfo 的 PeakWorkingSetSize"""
+    try:
+        import ctypes
+        from ctypes import wintypes
+        
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage',
+                    'QuotaPagedPoolUsage', 'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage',
+                    'PagefileUsage', 'PeakPagefileUsage')
+            ]
+        
+        get_current_process = ctypes.windll.kernel32.GetCurrentProcess
+        get_current_process.restype = wintypes.HANDLE
+        get_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo
+        get_memory_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+        
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        if not get_memory_info(get_current_process(), ctypes.byref(counters), counters.cb):
+            return None
+        return counters.PeakWorkingSetSize / 1024 / 1024
+    except (ImportError, AttributeError, OSError):
+        return None
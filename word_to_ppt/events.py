@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+事件串流 - --headless 模式的機器可讀進度輸出
+
+每行一個 JSON 物件（NDJSON）寫到標準輸出，原本給人看的訊息改寫到標準錯誤，
+排程程式可以即時追蹤大量工作的進度、速度與失敗。
+
+每個事件都有 event（類型）、program、time（Unix 時間）與 elapsed（工作開始後的秒數）：
+    job_start    工作開始（輸入、輸出路徑）
+    stage_start  階段開始（stage）
+    stage_end    階段結束（stage、status：ok 或 error、seconds，以及階段的結果）
+    slide        投影片已生成（index、total、number：簡報中的編號、kind、label、block、eta：剩餘秒數估計）
+    output       已寫入輸出檔（path 等）
+    error        發生錯誤（type、message、stage：發生錯誤的階段）
+    job_end      工作結束（status、exit_code、seconds）
+
+結束碼：0 成功、1 執行時發生錯誤、2 參數、設定或輸入檔有誤（與 argparse 相同）
+"""
+
+import sys
+import json
+import time
+import contextlib
+
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_INVALID = 2
+
+
+class EventStream:
+    """NDJSON 事件串流（沒有指定輸出時不輸出任何事件）"""
+    
+    def __init__(self, stream=None, program=None):
+        """
+        Args:
+            stream: 事件輸出（None 表示停用）
+            program: 程式名稱
+        """
+        self.stream = stream
+        self.program = program
+        self.start = time.perf_counter()
+        self.failed_stage = None
+        self._stage_start = self.start
+    
+    @property
+    def enabled(self):
+        return self.stream is not None
+    
+    def emit(self, event, **fields):
+        """輸出一個事件"""
+        if self.stream is None:
+            return
+        record = {
+            'event': event,
+            'program': self.program,
+            'time': round(time.time(), 3),
+            'elapsed': round(time.perf_counter() - self.start, 3),
+        }
+        record.update(fields)
+        # 只輸出 ASCII（非 ASCII 字元以 \u 跳脫），不受主控台編碼影響
+        self.stream.write(json.dumps(record) + '\n')
+        self.stream.flush()
+    
+    @contextlib.contextmanager
+    def stage(self, name, **fields):
+        """
+        階段：開始與結束時各輸出一個事件
+        
+        with events.stage('extract', input=path) as result:
+            ...
+            result['blocks'] = 18     # 加入 stage_end 事件
+        """
+        previous_start = self._stage_start
+        self._stage_start = time.perf_counter()
+        self.emit('stage_start', stage=name, **fields)
+        result = {}
+        status = 'error'
+        try:
+            yield result
+            status = 'ok'
+        finally:
+            if status == 'error' and self.failed_stage is None:
+                self.failed_stage = name
+            self.emit('stage_end', stage=name, status=status,
+                      seconds=round(time.perf_counter() - self._stage_start, 3), **result)
+            self._stage_start = previous_start
+    
+    def progress(self, event, index, total, **fields):
+        """進度事件（第 index 個，共 total 個；依目前階段的速度估計剩餘秒數）"""
+        elapsed = time.perf_counter() - self._stage_start
+        eta = round(elapsed / index * (total - index), 3) if index else None
+        self.emit(event, index=index, total=total, eta=eta, **fields)
+    
+    def error(self, error, stage=None):
+        """錯誤事件（stage 預設為最近失敗的階段）"""
+        self.emit('error', type=type(error).__name__, message=str(error), stage=stage or self.failed_stage)
+    
+    def job_end(self, exit_code):
+        """
+        工作結束事件
+        
+        Returns:
+            int: exit_code（可直接傳給 sys.exit）
+        """
+        self.emit('job_end', status='ok' if exit_code == EXIT_OK else 'error', exit_code=exit_code,
+                  seconds=round(time.perf_counter() - self.start, 3))
+        return exit_code
+
+
+def open_event_stream(headless, program):
+    """
+    建立事件串流：headless 時事件寫到標準輸出，原本的訊息改寫到標準錯誤
+    
+    Args:
+        headless: 是否為 --headless 模式
+        program: 程式名稱
+    """
+    if not headless:
+        return EventStream(program=program)
+    events = EventStream(sys.stdout, program)
+    sys.stdout = sys.stderr
+    return events
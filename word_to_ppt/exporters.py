@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+輕量輸出 - 不經過 python-pptx，直接由生成計畫輸出 JSON 投影片清單或 HTML 投影片
+
+使用方式：
+    python exporters.py [template] [input] [config] [output]
+    
+    output 副檔名為 .json 時輸出投影片清單，其他（預設 output.html）輸出 HTML
+
+功能：
+    - 與 2_generate.py 使用相同的生成計畫、頁面展開與文字框角色，投影片順序與內容一致
+    - 直接讀取模板 XML：文字框位置、字型、顏色，以及主題的色彩與字型
+    - JSON：每張投影片的頁面類型、各文字框的角色、文字與格式（位置以投影片寬高的比例表示）
+    - HTML：單一檔案的投影片播放頁（方向鍵或點擊切換），不含圖片，適合網頁預覽與直播字幕
+"""
+
+import sys
+import os
+import json
+import html
+import time
+import zipfile
+from lxml import etree
+
+from build_plan import load_build_plan, expand_slides, ConfigError
+from blockfile import read_content
+from template_analysis import NS, load_template_analysis, part_rels
+from verse_reference import convert_verse_reference
+from workspace import atomic_write
+
+
+# 投影片清單格式版本
+MANIFEST_VERSION = 1
+
+# 經文頁的文字顏色與章節段後間距（與 2_generate.py 的 create_verse_page 相同）
+VERSE_REFERENCE_COLOR = '#799BC1'
+VERSE_TEXT_COLOR = '#1B366A'
+VERSE_REFERENCE_SPACE_AFTER = 12
+
+# 主題色彩的別名（文字/背景 → 深色/淺色）
+SCHEME_COLOR_ALIASES = {'tx1': 'dk1', 'bg1': 'lt1', 'tx2': 'dk2', 'bg2': 'lt2'}
+
+# 段落對齊與文字框垂直對齊 → CSS
+ALIGNMENTS = {'l': 'left', 'ctr': 'center', 'r': 'right', 'just': 'justify', 'dist': 'justify'}
+ANCHORS = {'t': 'flex-start', 'ctr': 'center', 'b': 'flex-end'}
+
+# 沒有指定字體大小時使用的預設值（pt）
+DEFAULT_FONT_SIZE = 18
+
+EMU_PER_POINT = 12700
+
+
+def _related_part(zf, partname, rel_type):
+    """取得指定類型的第一個關聯目標（沒有時回傳 None）"""
+    for kind, target in part_rels(zf, partname).values():
+        if kind == rel_type:
+            return target
+    return None
+
+
+def read_theme(zf, theme_part):
+    """
+    讀取主題的色彩與字型
+    
+    Returns:
+        dict: colors（dk1、lt1、accent1…→ #RRGGBB）、fonts（major/minor 的 latin、ea）
+    """
+    root = etree.fromstring(zf.read(theme_part))
+    colors = {}
+    scheme = root.find('a:themeElements/a:clrScheme', NS)
+    for child in scheme if scheme is not None else []:
+        name = etree.QName(child).localname
+        for color in child:
+            value = color.get('val') if etree.QName(color).localname == 'srgbClr' else color.get('lastClr')
+            if value:
+                colors[name] = '#' + value.upper()
+    
+    fonts = {}
+    for kind in ('major', 'minor'):
+        font = root.find(f'a:themeElements/a:fontScheme/a:{kind}Font', NS)
+        fonts[kind] = {
+            script: (font.find(f'a:{script}', NS).get('typeface') or '') if font is not None
+            and font.find(f'a:{script}', NS) is not None else ''
+            for script in ('latin', 'ea')
+        }
+    return {'colors': colors, 'fonts': fonts}
+
+
+def _fill_color(element, colors):
+    """元素內 a:solidFill 的顏色（srgbClr 或主題色彩），沒有時回傳 None"""
+    if element is None:
+        return None
+    fill = element.find('a:solidFill', NS)
+    if fill is None:
+        return None
+    srgb = fill.find('a:srgbClr', NS)
+    if srgb is not None:
+        return '#' + srgb.get('val').upper()
+    scheme = fill.find('a:schemeClr', NS)
+    if scheme is not None:
+        name = scheme.get('val')
+        return colors.get(SCHEME_COLOR_ALIASES.get(name, name))
+    return None
+
+
+def _background_color(slds, colors):
+    """依投影片 → 版面配置 → 母片的順序找出純色背景（圖片背景回傳 None）"""
+    for sld in slds:
+        bg = sld.find('p:cSld/p:bg', NS)
+        if bg is None:
+            continue
+        bg_pr = bg.find('p:bgPr', NS)
+        if bg_pr is not None:
+            return _fill_color(bg_pr, colors)
+        bg_ref = bg.find('p:bgRef', NS)
+        if bg_ref is not None:
+            scheme = bg_ref.find('a:schemeClr', NS)
+            if scheme is not None:
+                name = scheme.get('val')
+                return colors.get(SCHEME_COLOR_ALIASES.get(name, name))
+        return None
+    return None
+
+
+def _font_name(typeface, fonts):
+    """字型名稱（+mn-lt、+mj-ea 等主題字型代號換成實際字型）"""
+    if not typeface or not typeface.startswith('+'):
+        return typeface or None
+    kind = 'major' if typeface[1:3] == 'mj' else 'minor'
+    script = 'ea' if typeface.endswith('-ea') else 'latin'
+    return fonts[kind].get(script) or None
+
+
+def _box_style(sp, theme):
+    """
+    讀取模板文字框的位置與格式（與 _create_textbox_with_format 複製的項目相同：
+    對齊、大小、粗體、字型、RGB 顏色，格式取自每段的第一個 run）
+    """
+    off = sp.find('p:spPr/a:xfrm/a:off', NS)
+    ext = sp.find('p:spPr/a:xfrm/a:ext', NS)
+    body_pr = sp.find('p:txBody/a:bodyPr', NS)
+    
+    paragraphs = []
+    for p in sp.iterfind('p:txBody/a:p', NS):
+        p_pr = p.find('a:pPr', NS)
+        style = {
+            'align': ALIGNMENTS.get(p_pr.get('algn')) if p_pr is not None else None,
+            'size': None,
+            'bold': None,
+            'font': None,
+            'color': None,
+        }
+        r_pr = p.find('a:r/a:rPr', NS)
+        if p.find('a:r', NS) is not None and r_pr is not None:
+            if r_pr.get('sz'):
+                style['size'] = int(r_pr.get('sz')) / 100
+            if r_pr.get('b') is not None:
+                style['bold'] = r_pr.get('b') in ('1', 'true')
+            latin = r_pr.find('a:latin', NS)
+            if latin is not None:
+                style['font'] = _font_name(latin.get('typeface'), theme['fonts'])
+            srgb = r_pr.find('a:solidFill/a:srgbClr', NS)
+            if srgb is not None:
+                style['color'] = '#' + srgb.get('val').upper()
+        paragraphs.append(style)
+    
+    return {
+        'x': int(off.get('x')) if off is not None else 0,
+        'y': int(off.get('y')) if off is not None else 0,
+        'cx': int(ext.get('cx')) if ext is not None else 0,
+        'cy': int(ext.get('cy')) if ext is not None else 0,
+        'anchor': ANCHORS.get(body_pr.get('anchor'), 'flex-start') if body_pr is not None else 'flex-start',
+        'wrap': body_pr is None or body_pr.get('wrap') != 'none',
+        'paragraphs': paragraphs or [{'align': None, 'size': None, 'bold': None, 'font': None, 'color': None}],
+    }
+
+
+def read_template_style(template_path):
+    """
+    讀取模板的投影片大小、主題與各頁面設計的文字框格式
+    
+    Returns:
+        dict: width、height（EMU）、theme、designs（設計名稱 → background、theme、boxes）
+    """
+    analysis = load_template_analysis(template_path)
+    with zipfile.ZipFile(template_path) as zf:
+        presentation = etree.fromstring(zf.read('ppt/presentation.xml'))
+        sld_sz = presentation.find('p:sldSz', NS)
+        pres_rels = part_rels(zf, 'ppt/presentation.xml')
+        slide_parts = [pres_rels[sld_id.get(f"{{{NS['r']}}}id")][1]
+                       for sld_id in presentation.iterfind('p:sldIdLst/p:sldId', NS)]
+        
+        themes = {}
+        
+        def theme_for(theme_part):
+            if theme_part not in themes:
+                themes[theme_part] = read_theme(zf, theme_part)
+            return themes[theme_part]
+        
+        designs = {}
+        for design, index in analysis['designs'].items():
+            slide_part = slide_parts[index]
+            layout_part = _related_part(zf, slide_part, 'slideLayout')
+            master_part = _related_part(zf, layout_part, 'slideMaster')
+            theme = theme_for(_related_part(zf, master_part, 'theme'))
+            slds = [etree.fromstring(zf.read(part)) for part in (slide_part, layout_part, master_part)]
+            
+            shapes = {int(sp.find('p:nvSpPr/p:cNvPr', NS).get('id')): sp
+                      for sp in slds[0].iterfind('p:cSld/p:spTree/p:sp', NS)}
+            boxes = []
+            for shape_id, role in analysis['slides'][index]['roles'].items():
+                box = _box_style(shapes[int(shape_id)], theme)
+                box['role'] = role
+                boxes.append(box)
+            
+            designs[design] = {
+                'background': _background_color(slds, theme['colors']) or theme['colors'].get('lt1'),
+                'theme': theme,
+                'boxes': boxes,
+            }
+        
+        presentation_theme = _related_part(zf, 'ppt/presentation.xml', 'theme')
+        theme = theme_for(presentation_theme) if presentation_theme else next(iter(themes.values()))
+    
+    return {
+        'width': int(sld_sz.get('cx')),
+        'height': int(sld_sz.get('cy')),
+        'theme': theme,
+        'designs': designs,
+    }
+
+
+def role_texts(spec, variables):
+    """
+    各角色的文字（與 2_generate.py 的 create_*_page 相同；沒有的角色不建立文字框）
+    
+    Args:
+        spec: SlideSpec
+        variables: 變數字典
+    
+    Returns:
+        dict: 角色 → 文字（經文頁的「經文」為 (章節, 內容)）
+    """
+    date = variables.get('日期', '')
+    service_type = variables.get('禮拜類型', '')
+    kind = spec.kind
+    
+    if kind == '經文頁':
+        verse_ref, verse_text = spec.args
+        return {'經文': (f"【{convert_verse_reference(verse_ref)}】", verse_text)}
+    if kind in ('內容頁', '禮拜流程頁'):
+        return {'內容': spec.args[0]}
+    
+    texts = {
+        '日期禮拜類型': f"{date}\n\n{service_type}" if kind == '封面頁' else f"{date} {service_type}",
+        '經文章節': variables.get('經文章節', ''),
+    }
+    if kind != '封面頁':
+        texts['主題'] = variables.get('主題', '')
+    subtitle = spec.args[0]
+    if subtitle:
+        texts['小標題'] = subtitle
+        if kind not in ('封面頁', '主題頁'):
+            # 自訂設計：內容、經文也填入參數文字
+            texts['內容'] = subtitle
+            texts['經文'] = subtitle
+    return texts
+
+
+def _styled_paragraphs(lines, styles):
+    """每段套用模板對應段落的格式（模板段落不夠時使用最後一段）"""
+    return [dict(styles[min(i, len(styles) - 1)], text=line) for i, line in enumerate(lines)]
+
+
+def build_manifest(template_path, plan, variables, content_lines, style=None):
+    """
+    產生投影片清單
+    
+    Args:
+        template_path: 模板 PPT 路徑
+        plan: 生成計畫
+        variables: 變數字典
+        content_lines: 內容區塊列表
+        style: read_template_style 的結果（已讀取時傳入）
+    
+    Returns:
+        dict: 投影片清單（可直接輸出成 JSON）
+    """
+    style = style or read_template_style(template_path)
+    specs = expand_slides(plan['page_structure'], variables, content_lines,
+                          plan['settings']['段落間插入主題頁'])
+    
+    slides = []
+    for number, spec in enumerate(specs, 1):
+        design = style['designs'][spec.kind]
+        texts = role_texts(spec, variables)
+        boxes = []
+        for box in design['boxes']:
+            text = texts.get(box['role'])
+            if text is None:
+                continue
+            if isinstance(text, tuple):
+                # 經文頁：第一段章節、第二段經文內容（模板只有一段時都用第一段的格式）
+                styles = box['paragraphs']
+                reference = dict(styles[0], text=text[0], color=VERSE_REFERENCE_COLOR,
+                                 space_after=VERSE_REFERENCE_SPACE_AFTER)
+                content = dict(styles[min(1, len(styles) - 1)], text=text[1], color=VERSE_TEXT_COLOR)
+                paragraphs = [reference, content]
+            else:
+                paragraphs = _styled_paragraphs(text.split('\n'), box['paragraphs'])
+            boxes.append({
+                'role': box['role'],
+                'x': round(box['x'] / style['width'], 4),
+                'y': round(box['y'] / style['height'], 4),
+                'width': round(box['cx'] / style['width'], 4),
+                'height': round(box['cy'] / style['height'], 4),
+                'anchor': box['anchor'],
+                'wrap': box['wrap'],
+                'paragraphs': paragraphs,
+            })
+        slides.append({
+            'number': number,
+            'kind': spec.kind,
+            'label': spec.label,
+            'block': spec.block,
+            'background': design['background'],
+            'boxes': boxes,
+        })
+    
+    return {
+        'version': MANIFEST_VERSION,
+        'template': os.path.basename(template_path),
+        'width': style['width'],
+        'height': style['height'],
+        'theme': style['theme'],
+        'variables': variables,
+        'slides': slides,
+    }
+
+
+def _css_font_family(font, theme):
+    """字型清單：文字框字型 → 主題內文字型（中文、英文）→ 系統字型"""
+    names = [font, theme['fonts']['minor'].get('ea'), theme['fonts']['minor'].get('latin')]
+    families = [f'"{name}"' for name in dict.fromkeys(filter(None, names))]
+    return ', '.join(families + ['sans-serif'])
+
+
+def render_html(manifest):
+    """
+    產生單一檔案的 HTML 投影片播放頁
+    
+    Args:
+        manifest: build_manifest 的結果
+    
+    Returns:
+        str: HTML
+    """
+    ratio = manifest['width'] / manifest['height']
+    width_pt = manifest['width'] / EMU_PER_POINT
+    theme = manifest['theme']
+    text_color = theme['colors'].get('dk1', '#000000')
+    
+    sections = []
+    for slide in manifest['slides']:
+        boxes = []
+        for box in slide['boxes']:
+            paragraphs = []
+            for p in box['paragraphs']:
+                size = p['size'] or DEFAULT_FONT_SIZE
+                styles = [
+                    f"font-size:calc(var(--u) * {size / width_pt * 100:.3f})",
+                    f"font-family:{html.escape(_css_font_family(p['font'], theme), quote=True)}",
+                    f"color:{p['color'] or text_color}",
+                ]
+                if p['align']:
+                    styles.append(f"text-align:{p['align']}")
+                if p['bold']:
+                    styles.append("font-weight:bold")
+                if p.get('space_after'):
+                    styles.append(f"margin-bottom:calc(var(--u) * {p['space_after'] / width_pt * 100:.3f})")
+                # 空段落保留一行高度（與 PowerPoint 相同）
+                text = '<br>'.join(html.escape(line) for line in p['text'].split('\n')) or '<br>'
+                paragraphs.append(f'<p style="{";".join(styles)}">{text}</p>')
+            boxes.append(
+                f'<div class="box" data-role="{html.escape(box["role"])}" style="'
+                f'left:{box["x"] * 100:.2f}%;top:{box["y"] * 100:.2f}%;'
+                f'width:{box["width"] * 100:.2f}%;height:{box["height"] * 100:.2f}%;'
+                f'justify-content:{box["anchor"]};white-space:{"pre-wrap" if box["wrap"] else "pre"}">'
+                + ''.join(paragraphs) + '</div>'
+            )
+        sections.append(
+            f'<section class="slide" data-kind="{html.escape(slide["kind"])}" '
+            f'style="background:{slide["background"] or "#FFFFFF"}">' + ''.join(boxes) + '</section>'
+        )
+    
+    title = html.escape(manifest['variables'].get('主題') or manifest['template'])
+    return f"""<!DOCTYPE html>
+<html lang="zh-Hant">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+html, body {{ margin: 0; height: 100%; background: #000; overflow: hidden; }}
+body {{ --u: min(1vw, calc(1vh * {ratio:.5f})); }}
+.slide {{ display: none; position: absolute; left: 50%; top: 50%; transform: translate(-50%, -50%);
+          width: calc(var(--u) * 100); height: calc(var(--u) * 100 / {ratio:.5f}); overflow: hidden; }}
+.slide.current {{ display: block; }}
+.box {{ position: absolute; display: flex; flex-direction: column; box-sizing: border-box; }}
+.box p {{ margin: 0; line-height: 1.2; }}
+#counter {{ position: fixed; right: 8px; bottom: 6px; color: #888; font: 12px sans-serif; }}
+</style>
+</head>
+<body>
+{chr(10).join(sections)}
+<div id="counter"></div>
+<script>
+var slides = document.querySelectorAll('.slide');
+var current = 0;
+function show(n) {{
+  current = Math.max(0, Math.min(slides.length - 1, n));
+  slides.forEach(function (s, i) {{ s.classList.toggle('current', i === current); }});
+  document.getElementById('counter').textContent = (current + 1) + ' / ' + slides.length;
+  history.replaceState(null, '', '#' + (current + 1));
+}}
+document.addEventListener('keydown', function (e) {{
+  if (['ArrowRight', 'ArrowDown', 'PageDown', ' ', 'Enter'].indexOf(e.key) >= 0) show(current + 1);
+  else if (['ArrowLeft', 'ArrowUp', 'PageUp', 'Backspace'].indexOf(e.key) >= 0) show(current - 1);
+  else if (e.key === 'Home') show(0);
+  else if (e.key === 'End') show(slides.length - 1);
+}});
+document.addEventListener('click', function () {{ show(current + 1); }});
+show((parseInt(location.hash.slice(1), 10) || 1) - 1);
+</script>
+</body>
+</html>
+"""
+
+
+def export(template_path, plan, variables, content_lines, output_path):
+    """
+    輸出 JSON 投影片清單（.json）或 HTML 投影片（其他副檔名）
+    
+    Returns:
+        dict: 投影片清單
+    """
+    manifest = build_manifest(template_path, plan, variables, content_lines)
+    if output_path.lower().endswith('.json'):
+        data = json.dumps(manifest, ensure_ascii=False, indent=2)
+    else:
+        data = render_html(manifest)
+    with atomic_write(output_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    return manifest
+
+
+def main():
+    """主程式"""
+    args = sys.argv[1:]
+    if args and args[0] in ['-h', '--help', 'help']:
+        print("使用方式：")
+        print("  python exporters.py [template] [input] [config] [output]")
+        print()
+        print("參數說明（全部可選，使用預設值）：")
+        print("  template  - 模板 PPT（預設：template.pptx）")
+        print("  input     - 輸入文字檔或區塊檔（預設：output.txt）")
+        print("  config    - 設定檔（預設：config.txt）")
+        print("  output    - 輸出檔案，.json 為投影片清單，其他為 HTML（預設：output.html）")
+        return 0
+    
+    template_path = args[0] if len(args) >= 1 else "template.pptx"
+    input_path = args[1] if len(args) >= 2 else "output.txt"
+    config_path = args[2] if len(args) >= 3 else "config.txt"
+    output_path = args[3] if len(args) >= 4 else "output.html"
+    
+    start = time.perf_counter()
+    try:
+        plan = load_build_plan(config_path, template_path)
+    except ConfigError as e:
+        print(f"❌ 設定錯誤：{e}")
+        return 1
+    variables, content_lines = read_content(input_path)
+    
+    manifest = export(template_path, plan, variables, content_lines, output_path)
+    elapsed = time.perf_counter() - start
+    print(f"✅ 已輸出 {len(manifest['slides'])} 張投影片到：{output_path}（{elapsed * 1000:.0f} ms）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PPTX 封裝處理 - 儲存前整理簡報檔案內的 part
+
+功能：
+    - 合併內容完全相同的媒體檔（圖片、字型等），多個關聯共用同一個 part
+    - 可重現輸出：固定 zip 時間戳記、part 順序與壓縮等級，相同輸入產生完全相同的檔案
+    - 可設定壓縮方式：已壓縮的媒體直接存入，XML 的 deflate 等級可調整
+"""
+
+import hashlib
+import time
+import zipfile
+
+from pptx.opc.serialized import PackageWriter
+
+
+# 媒體檔所在的目錄
+MEDIA_PREFIXES = ('/ppt/media/', '/ppt/fonts/', '/ppt/embeddings/')
+
+# 可重現輸出使用的固定設定
+REPRODUCIBLE_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+REPRODUCIBLE_COMPRESS_LEVEL = 6
+
+# 固定排在最前面的 part（其餘依名稱排序）
+LEADING_MEMBERS = ('[Content_Types].xml', '_rels/.rels')
+
+# 本身已壓縮的媒體格式（store_media 時不再壓縮）
+STORED_EXTENSIONS = (
+    '.png', '.jpg', '.jpeg', '.gif', '.ttf', '.otf', '.fntdata',
+    '.wdp', '.mp3', '.mp4', '.m4a',
+)
+
+
+def dedupe_media_parts(prs):
+    """
+    合併內容相同的媒體 part：所有關聯改指向同一個 part，重複的 part 儲存時就不會寫入
+    
+    Args:
+        prs: python-pptx Presentation 物件
+    
+    Returns:
+        tuple: (合併的 part 數量, 節省的位元組數)
+    """
+    package = prs.part.package
+    parts = list(package.iter_parts())
+    
+    # 依內容雜湊找出重複的媒體 part（保留第一次出現的 part）
+    canonical = {}
+    replacements = {}
+    saved_bytes = 0
+    for part in parts:
+        if not str(part.partname).startswith(MEDIA_PREFIXES):
+            continue
+        digest = hashlib.sha256(part.blob).digest()
+        original = canonical.setdefault((part.content_type, digest), part)
+        if original is not part:
+            replacements[part] = original
+            saved_bytes += len(part.blob)
+    
+    if not replacements:
+        return 0, 0
+    
+    # 將指向重複 part 的關聯改指向保留的 part（關聯物件會快取目標，所以建立新的關聯取代）
+    for part in parts:
+        rels = part.rels
+        for rel in list(rels):
+            if not rel.is_external and rel.target_part in replacements:
+                rels._rels[rel.rId] = type(rel)(
+                    rel._base_uri, rel.rId, rel.reltype, rel._target_mode,
+                    replacements[rel.target_part]
+                )
+    
+    return len(replacements), saved_bytes
+
+
+class _ZipPartWriter(object):
+    """收集所有 part，關閉時依設定的順序、時間戳記與壓縮方式寫入 zip"""
+    
+    def __init__(self, pkg_file, reproducible=False, compress_level=None, store_media=False):
+        self._pkg_file = pkg_file
+        self._reproducible = reproducible
+        self._compress_level = compress_level
+        self._store_media = store_media
+        self._members = {}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        if exc_type is None:
+            self.close()
+    
+    def write(self, pack_uri, blob):
+        self._members[pack_uri.membername] = blob
+    
+    def close(self):
+        names = list(self._members)
+        if self._reproducible:
+            names = [name for name in LEADING_MEMBERS if name in self._members]
+            names += sorted(name for name in self._members if name not in LEADING_MEMBERS)
+            date_time = REPRODUCIBLE_DATE_TIME
+        else:
+            date_time = time.localtime(time.time())[:6]
+        
+        compress_level = self._compress_level
+        if compress_level is None and self._reproducible:
+            compress_level = REPRODUCIBLE_COMPRESS_LEVEL
+        
+        with zipfile.ZipFile(self._pkg_file, 'w') as zf:
+            for name in names:
+                info = zipfile.ZipInfo(name, date_time=date_time)
+                info.create_system = 0
+                info.external_attr = 0
+                if self._store_media and name.lower().endswith(STORED_EXTENSIONS):
+                    # 已壓縮的媒體再壓縮只會浪費時間，直接存入
+                    info.compress_type = zipfile.ZIP_STORED
+                    zf.writestr(info, self._members[name])
+                else:
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    zf.writestr(info, self._members[name], compresslevel=compress_level)
+
+
+class _ConfigurablePackageWriter(PackageWriter):
+    """python-pptx 的 PackageWriter，改用可設定的 zip 寫入方式"""
+    
+    def __init__(self, pkg_file, pkg_rels, parts, **options):
+        super().__init__(pkg_file, pkg_rels, parts)
+        self._options = options
+    
+    def _write(self):
+        with _ZipPartWriter(self._pkg_file, **self._options) as phys_writer:
+            self._write_content_types_stream(phys_writer)
+            self._write_pkg_rels(phys_writer)
+            self._write_parts(phys_writer)
+
+
+def save_presentation(prs, pkg_file, reproducible=False, compress_level=None, store_media=False):
+    """
+    儲存簡報
+    
+    Args:
+        prs: python-pptx Presentation 物件
+        pkg_file: 輸出路徑或 file-like 物件
+        reproducible: 是否使用可重現輸出（固定時間戳記、part 順序、壓縮等級）
+        compress_level: XML 等 part 的 deflate 壓縮等級（0-9，None 為預設）
+        store_media: 已壓縮的媒體檔（png、jpg、字型等）不再壓縮，直接存入
+    """
+    if not (reproducible or compress_level is not None or store_media):
+        prs.save(pkg_file)
+        return
+    
+    package = prs.part.package
+    writer = _ConfigurablePackageWriter(
+        pkg_file, package._rels, tuple(package.iter_parts()),
+        reproducible=reproducible, compress_level=compress_level, store_media=store_media
+    )
+    writer._write()
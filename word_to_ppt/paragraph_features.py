@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+段落特徵表 - 一次走訪文件段落，建立每段的特徵（以 array 儲存），供日期、主題、經文偵測查詢
+
+每段一列：主要字體大小（字數最多的大小）、字體大小範圍、粗體比例、主要顏色、段落樣式，
+以及標記（有文字、日期、〈章節〉標記、「經文：」標籤、主題結束關鍵字）。
+字體大小的門檻由文件本身的字體大小分布決定，不依賴固定的 16pt、17pt。
+"""
+
+from array import array
+from collections import Counter
+
+
+# 標記（flags 欄位的位元）
+HAS_TEXT = 1          # 去除空白後有文字
+HAS_RUNS = 2          # 有 run
+HAS_SIZE = 4          # 至少一個 run 設定了字體大小
+DATE = 8              # 同時包含「年」「月」「日」
+VERSE_MARKER = 16     # 〈章節〉開頭的經文
+SCRIPTURE_LABEL = 32  # 「經文:」或「經文：」標籤
+TITLE_STOP = 64       # 經文標籤、〈、【（主題到此結束）
+
+TITLE_STOP_KEYWORDS = ['經文:', '經文：', '〈', '【']
+
+# 字體大小比較的容差（pt）
+SIZE_TOLERANCE = 0.5
+
+# 沒有 RGB 顏色
+NO_COLOR = -1
+
+
+class ParagraphFeatures:
+    """段落特徵表（每個欄位是一個 array，第 i 個元素對應第 i 段）"""
+    
+    def __init__(self, paragraphs):
+        """
+        Args:
+            paragraphs: DocxParagraph 列表或迭代器
+        """
+        self.texts = []               # 去除空白後的段落文字
+        self.size = array('f')        # 主要字體大小（沒有設定為 0）
+        self.min_size = array('f')    # 最小字體大小
+        self.max_size = array('f')    # 最大字體大小
+        self.bold = array('f')        # 粗體字數比例
+        self.color = array('l')       # 主要顏色 0xRRGGBB（沒有 RGB 顏色為 NO_COLOR）
+        self.style = array('H')       # 段落樣式（styles 的索引，0 表示未指定）
+        self.flags = array('B')
+        self.styles = ['']
+        self.size_histogram = Counter()  # 字體大小 → 字數（整份文件）
+        
+        style_index = {'': 0}
+        for paragraph in paragraphs:
+            self._add(paragraph, style_index)
+    
+    def _add(self, paragraph, style_index):
+        text = paragraph.text.strip()
+        sizes = Counter()
+        colors = Counter()
+        chars = 0
+        bold_chars = 0
+        for run in paragraph.runs:
+            length = len(run.text)
+            chars += length
+            if run.size:
+                sizes[run.size] += length
+            if run.color is not None:
+                colors[run.color] += length
+            if run.bold:
+                bold_chars += length
+        
+        flags = 0
+        if text:
+            flags |= HAS_TEXT
+        if paragraph.runs:
+            flags |= HAS_RUNS
+        if sizes:
+            flags |= HAS_SIZE
+        if '年' in text and '月' in text and '日' in text:
+            flags |= DATE
+        if text.startswith('〈') and '〉' in text:
+            flags |= VERSE_MARKER
+        if '經文:' in text or '經文：' in text:
+            flags |= SCRIPTURE_LABEL
+        if any(keyword in text for keyword in TITLE_STOP_KEYWORDS):
+            flags |= TITLE_STOP
+        
+        if paragraph.style not in style_index:
+            style_index[paragraph.style] = len(self.styles)
+            self.styles.append(paragraph.style)
+        
+        if sizes:
+            self.size.append(sizes.most_common(1)[0][0])
+            self.min_size.append(min(sizes))
+            self.max_size.append(max(sizes))
+        else:
+            self.size.append(0)
+            self.min_size.append(0)
+            self.max_size.append(0)
+        self.size_histogram.update(sizes)
+        
+        if colors:
+            r, g, b = colors.most_common(1)[0][0]
+            self.color.append((r << 16) | (g << 8) | b)
+        else:
+            self.color.append(NO_COLOR)
+        
+        self.bold.append(bold_chars / chars if chars else 0)
+        self.style.append(style_index[paragraph.style])
+        self.flags.append(flags)
+        self.texts.append(text)
+    
+    def __len__(self):
+        return len(self.flags)
+    
+    def has(self, index, flag):
+        """第 index 段是否有指定的標記（多個標記用 | 組合時需全部符合）"""
+        return self.flags[index] & flag == flag
+    
+    def find(self, flag, start=0):
+        """
+        從 start 開始找第一個有指定標記的段落
+        
+        Returns:
+            int: 段落索引；找不到時回傳 None
+        """
+        for index in range(start, len(self.flags)):
+            if self.flags[index] & flag == flag:
+                return index
+        return None
+    
+    def body_size(self):
+        """內文字體大小（整份文件中字數最多的字體大小，沒有設定字體大小時回傳 None）"""
+        if not self.size_histogram:
+            return None
+        return self.size_histogram.most_common(1)[0][0]
+    
+    def is_uniform(self, index, size):
+        """第 index 段所有設定的字體大小是否都是 size（容許 SIZE_TOLERANCE 誤差）"""
+        return (self.has(index, HAS_SIZE) and
+                abs(self.min_size[index] - size) < SIZE_TOLERANCE and
+                abs(self.max_size[index] - size) < SIZE_TOLERANCE)
+    
+    def style_id(self, index):
+        """第 index 段的段落樣式 ID（未指定時為空字串）"""
+        return self.styles[self.style[index]]
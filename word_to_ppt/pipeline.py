@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Word 轉 PPT 流程 API - 在同一個程序內串接提取與生成（不經過 output.txt）
+
+使用方式：
+    from pipeline import Pipeline, run_pipeline
+    
+    pptx_bytes = run_pipeline(docx_bytes, 'template.pptx', 'config.txt')
+    
+    # 多次執行時重複使用同一個 Pipeline（config 只載入一次）
+    pipeline = Pipeline('template.pptx', 'config.txt')
+    pptx_bytes = pipeline.run(docx_bytes)
+"""
+
+import io
+import contextlib
+
+from build_plan import load_build_plan
+from cache_store import DiskCache
+from workspace import atomic_write
+from events import EventStream
+import stages
+
+
+class Pipeline:
+    """提取 + 生成流程"""
+    
+    def __init__(self, template_path="template.pptx", config_path="config.txt", tolerance=50,
+                 jobs=1, quiet=True, reproducible=False, compress_level=None, store_media=False,
+                 cache_dir=None, cache_mb=64, slide_cache_dir=None, slide_cache_mb=32, events=None):
+        """
+        初始化流程（載入生成計畫，config 有誤時立即拋出 ConfigError）
+        
+        Args:
+            template_path: 模板 PPT 路徑
+            config_path: config 檔案路徑（或已編譯的 .plan.json）
+            tolerance: 顏色容差（0-255）
+            jobs: 平行生成的程序數量
+            quiet: 是否隱藏提取與生成過程的訊息
+            reproducible: 是否使用可重現輸出
+            compress_level: XML 壓縮等級（0-9，None 為預設）
+            store_media: 已壓縮的媒體檔不再壓縮
+            cache_dir: 提取結果快取目錄（None 表示不使用快取）
+            cache_mb: 提取結果快取大小上限（MB）
+            slide_cache_dir: 文字框快取目錄（None 表示不使用快取）
+            slide_cache_mb: 文字框快取大小上限（MB）
+            events: 進度事件（EventStream，None 表示不輸出）
+        """
+        self.template_path = template_path
+        self.plan = load_build_plan(config_path, template_path)
+        self.tolerance = tolerance
+        self.jobs = jobs
+        self.quiet = quiet
+        self.save_options = {
+            'reproducible': reproducible,
+            'compress_level': compress_level,
+            'store_media': store_media,
+        }
+        self.cache = DiskCache(cache_dir, max_bytes=cache_mb * 1024 * 1024) if cache_dir else None
+        self.slide_cache = None
+        if slide_cache_dir:
+            self.slide_cache = DiskCache(slide_cache_dir, max_bytes=slide_cache_mb * 1024 * 1024)
+        self.events = events or EventStream()
+    
+    def _output(self):
+        """quiet 時丟棄 print 輸出"""
+        if self.quiet:
+            return contextlib.redirect_stdout(io.StringIO())
+        return contextlib.nullcontext()
+    
+    def extract(self, docx):
+        """
+        從 Word 文件提取變數和文字區塊
+        
+        Args:
+            docx: docx 內容（bytes）、檔案路徑或 file-like 物件
+        
+        Returns:
+            BlueTextExtractor: 已完成提取的提取器（variables、extracted_text）
+        """
+        target_color = tuple(self.plan['target_color']) if self.plan['target_color'] else None
+        extractor = stages.extract_stage().BlueTextExtractor(target_color=target_color,
+                                                             tolerance=self.tolerance,
+                                                             cache=self.cache)
+        with self._output(), self.events.stage('extract') as result:
+            extractor.extract_from_docx(docx)
+            result['blocks'] = len(extractor.extracted_text)
+        if not extractor.extracted_text:
+            raise ValueError("文件中沒有找到指定顏色的文字")
+        return extractor
+    
+    def generate(self, variables, blocks):
+        """
+        以變數和文字區塊生成 PPT
+        
+        Args:
+            variables: 變數字典
+            blocks: 內容區塊列表
+        
+        Returns:
+            bytes: PPTX 檔案內容
+        """
+        generator = stages.generate_stage().PPTGeneratorV2(self.template_path)
+        generator.reproducible = self.save_options['reproducible']
+        generator.compress_level = self.save_options['compress_level']
+        generator.store_media = self.save_options['store_media']
+        generator.slide_cache = self.slide_cache
+        generator.events = self.events
+        
+        buffer = io.BytesIO()
+        with self._output(), self.events.stage('build', jobs=self.jobs) as result:
+            generator.apply_build_plan(self.plan)
+            generator.set_variables_and_content(variables, blocks)
+            generator.build(jobs=self.jobs)
+            generator.save(buffer)
+            result['slides'] = len(generator.output_prs.slides)
+        return buffer.getvalue()
+    
+    def run(self, docx, debug_txt_path=None):
+        """
+        Word 文件 → PPTX
+        
+        Args:
+            docx: docx 內容（bytes）、檔案路徑或 file-like 物件
+            debug_txt_path: 同時輸出 output.txt 格式的除錯檔（可選）
+        
+        Returns:
+            bytes: PPTX 檔案內容
+        """
+        extractor = self.extract(docx)
+        if debug_txt_path:
+            with atomic_write(debug_txt_path, 'w', encoding='utf-8') as f:
+                f.write(extractor.format_output_text())
+        return self.generate(extractor.output_variables(), extractor.extracted_text)
+
+
+def run_pipeline(docx, template_path="template.pptx", config_path="config.txt", **options):
+    """
+    Word 文件 → PPTX（單次執行）
+    
+    Args:
+        docx: docx 內容（bytes）、檔案路徑或 file-like 物件
+        template_path: 模板 PPT 路徑
+        config_path: config 檔案路徑
+        **options: Pipeline 的其他參數（debug_txt_path 會傳給 Pipeline.run）
+    
+    Returns:
+        bytes: PPTX 檔案內容
+    """
+    debug_txt_path = options.pop('debug_txt_path', None)
+    return Pipeline(template_path, config_path, **options).run(docx, debug_txt_path=debug_txt_path)
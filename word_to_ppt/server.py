@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Word 轉 PPT 本機 HTTP 服務 - 上傳 docx、排隊生成、下載 PPTX
+
+使用方式：
+    python server.py [--host 127.0.0.1] [--port 8000] [--workers 2] [--queue 16]
+                     [--template template.pptx] [--config config.txt]
+
+API：
+    GET  /                  上傳表單
+    POST /jobs              上傳 docx（multipart 欄位 docx，或直接以 body 傳送），回傳工作編號
+    POST /jobs?wait=1       上傳後等待完成，直接回傳 PPTX
+    GET  /jobs/<id>         工作狀態
+    GET  /jobs/<id>/result  下載 PPTX
+    GET  /metrics           佇列長度、處理中數量、每個工作的耗時
+
+範例（curl）：
+    # 上傳並等待完成，直接存成 PPTX
+    curl --data-binary @input.docx "http://127.0.0.1:8000/jobs?wait=1" -o output.pptx
+    
+    # 上傳後取得工作編號（回應 202：{"id": "...", "status": "queued", ...}）
+    curl -F docx=@input.docx http://127.0.0.1:8000/jobs
+    # 查詢狀態，直到 status 為 done（或 failed，錯誤訊息在 error 欄位）
+    curl http://127.0.0.1:8000/jobs/<id>
+    # 下載結果
+    curl http://127.0.0.1:8000/jobs/<id>/result -o output.pptx
+
+完全離線執行，只使用 Python 標準函式庫；提取與生成在程序池中執行（python-pptx 為 CPU 密集）。
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urlsplit, parse_qs, quote
+
+from build_plan import load_build_plan, ConfigError
+
+
+# 單一上傳檔案的大小上限
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+# 保留在記憶體中的已完成工作數量（超過時移除最舊的）
+MAX_FINISHED_JOBS = 100
+# 計算耗時統計使用的最近工作數量
+LATENCY_WINDOW = 200
+# 回傳 PPTX 時每次寫入的大小
+STREAM_CHUNK_SIZE = 64 * 1024
+
+PPTX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+
+STATUS_TEXT = {
+    200: 'OK',
+    202: 'Accepted',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    409: 'Conflict',
+    411: 'Length Required',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+UPLOAD_FORM = """<!DOCTYPE html>
+<html lang="zh-Hant">
+<head><meta charset="utf-8"><title>Word 轉 PPT</title></head>
+<body>
+<h1>Word 轉 PPT</h1>
+<form action="/jobs?wait=1" method="post" enctype="multipart/form-data">
+  <input type="file" name="docx" accept=".docx" required>
+  <button type="submit">生成 PPT</button>
+</form>
+</body>
+</html>
+"""
+
+
+# ---------------------------------------------------------------------------
+# 子程序工作
+# ---------------------------------------------------------------------------
+
+_worker_pipeline = None
+
+
+def _init_worker(template_path, config_path):
+    """子程序初始化：每個子程序只載入一次生成計畫"""
+    global _worker_pipeline
+    from pipeline import Pipeline
+    _worker_pipeline = Pipeline(template_path, config_path)
+
+
+def _run_job(docx_bytes):
+    """子程序工作：docx → pptx，回傳 (pptx bytes, 執行秒數)"""
+    start = time.perf_counter()
+    pptx_bytes = _worker_pipeline.run(docx_bytes)
+    return pptx_bytes, time.perf_counter() - start
+
+
+# ---------------------------------------------------------------------------
+# 工作與佇列
+# ---------------------------------------------------------------------------
+
+class Job:
+    """一個生成工作"""
+    
+    def __init__(self, filename, docx_bytes):
+        self.id = uuid.uuid4().hex[:12]
+        self.filename = filename
+        self.docx_bytes = docx_bytes
+        self.status = 'queued'
+        self.error = None
+        self.result = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.run_seconds = None
+        self.done = asyncio.Event()
+    
+    @property
+    def result_filename(self):
+        return os.path.splitext(self.filename or 'output')[0] + '.pptx'
+    
+    def to_dict(self):
+        info = {
+            'id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'submitted_at': self.submitted_at,
+        }
+        if self.started_at:
+            info['wait_seconds'] = round(self.started_at - self.submitted_at, 4)
+        if self.finished_at:
+            info['total_seconds'] = round(self.finished_at - self.submitted_at, 4)
+            info['run_seconds'] = round(self.run_seconds or 0, 4)
+        if self.error:
+            info['error'] = self.error
+        if self.result is not None:
+            info['result'] = f"/jobs/{self.id}/result"
+            info['size'] = len(self.result)
+        return info
+
+
+class JobQueue:
+    """有上限的工作佇列 + 程序池"""
+    
+    def __init__(self, template_path, config_path, workers=2, max_queue=16):
+        self.workers = workers
+        self.template_path = template_path
+        self.config_path = config_path
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.jobs = OrderedDict()
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.executor = self._new_executor()
+        self._dispatchers = []
+    
+    def _new_executor(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker,
+            initargs=(self.template_path, self.config_path)
+        )
+    
+    def start(self):
+        for _ in range(self.workers):
+            self._dispatchers.append(asyncio.ensure_future(self._dispatch()))
+    
+    async def stop(self):
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self.executor.shutdown(wait=False)
+    
+    def submit(self, filename, docx_bytes):
+        """加入工作；佇列已滿時回傳 None"""
+        job = Job(filename, docx_bytes)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return None
+        self.jobs[job.id] = job
+        return job
+    
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            job.status = 'running'
+            job.started_at = time.time()
+            self.running += 1
+            executor = self.executor
+            try:
+                job.result, job.run_seconds = await loop.run_in_executor(
+                    executor, _run_job, job.docx_bytes
+                )
+                job.status = 'done'
+                self.completed += 1
+            except BrokenProcessPool:
+                # 子程序異常結束（記憶體不足、被系統終止）：只有執行中的工作失敗，
+                # 重新建立程序池，佇列中的工作繼續處理
+                job.status = 'failed'
+                job.error = "子程序異常結束"
+                self.failed += 1
+                if self.executor is executor:
+                    print("⚠️  子程序異常結束，重新建立程序池")
+                    executor.shutdown(wait=False)
+                    self.executor = self._new_executor()
+            except Exception as e:
+                job.status = 'failed'
+                job.error = str(e)
+                self.failed += 1
+            finally:
+                self.running -= 1
+                job.finished_at = time.time()
+                job.docx_bytes = None
+                self.latencies.append((job.finished_at - job.submitted_at, job.run_seconds or 0))
+                job.done.set()
+                self.queue.task_done()
+                self._evict_finished()
+    
+    def _evict_finished(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done.is_set()]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+    
+    def metrics(self):
+        """佇列與耗時統計"""
+        totals = sorted(total for total, _ in self.latencies)
+        runs = sorted(run for _, run in self.latencies)
+        
+        def percentile(values, p):
+            if not values:
+                return None
+            return round(values[min(len(values) - 1, int(len(values) * p))], 4)
+        
+        return {
+            'queue_depth': self.queue.qsize(),
+            'queue_limit': self.queue.maxsize,
+            'running': self.running,
+            'workers': self.workers,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'latency_seconds': {
+                'total_p50': percentile(totals, 0.5),
+                'total_p95': percentile(totals, 0.95),
+                'run_p50': percentile(runs, 0.5),
+                'run_p95': percentile(runs, 0.95),
+            },
+            'jobs': [job.to_dict() for job in list(self.jobs.values())[-20:]],
+        }
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_multipart(body, content_type):
+    """
+    解析 multipart/form-data，回傳第一個上傳檔案 (檔名, 內容)
+    
+    Args:
+        body: 請求內容（bytes）
+        content_type: Content-Type 標頭
+    """
+    boundary = None
+    for item in content_type.split(';')[1:]:
+        key, _, value = item.strip().partition('=')
+        if key.lower() == 'boundary':
+            boundary = value.strip('"')
+    if not boundary:
+        raise HTTPError(400, "multipart 缺少 boundary")
+    
+    delimiter = b'--' + boundary.encode('latin-1')
+    for section in body.split(delimiter)[1:]:
+        if section.startswith(b'--'):
+            break
+        header_blob, _, content = section.partition(b'\r\n\r\n')
+        headers = header_blob.decode('utf-8', 'replace')
+        if 'filename=' not in headers:
+            continue
+        filename = headers.split('filename=', 1)[1].split('\r\n', 1)[0].split(';', 1)[0].strip().strip('"')
+        if content.endswith(b'\r\n'):
+            content = content[:-2]
+        return os.path.basename(filename), content
+    raise HTTPError(400, "沒有找到上傳的檔案")
+
+
+async def read_request(reader):
+    """讀取 HTTP 請求，回傳 (method, path, query, headers, body)"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, _ = lines[0].split(' ', 2)
+    except ValueError:
+        raise HTTPError(400, "請求格式錯誤")
+    
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            key, value = line.split(':', 1)
+            headers[key.strip().lower()] = value.strip()
+    
+    body = b''
+    if method == 'POST':
+        if 'content-length' not in headers:
+            raise HTTPError(411, "需要 Content-Length")
+        length = int(headers['content-length'])
+        if length > MAX_UPLOAD_BYTES:
+            raise HTTPError(413, f"檔案超過上限 {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+        body = await reader.readexactly(length)
+    
+    url = urlsplit(target)
+    return method, url.path, parse_qs(url.query), headers, body
+
+
+async def send_response(writer, status, body, content_type='application/json; charset=utf-8',
+                        extra_headers=None):
+    """送出回應（大型內容分段寫入）"""
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body, ensure_ascii=False).encode('utf-8')
+    elif isinstance(body, str):
+        body = body.encode('utf-8')
+    
+    lines = [
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(body)}",
+        "Connection: close",
+    ]
+    for key, value in (extra_headers or {}).items():
+        lines.append(f"{key}: {value}")
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8'))
+    
+    view = memoryview(body)
+    for offset in range(0, len(body), STREAM_CHUNK_SIZE):
+        writer.write(view[offset:offset + STREAM_CHUNK_SIZE])
+        await writer.drain()
+    await writer.drain()
+
+
+async def send_result(writer, job):
+    """回傳工作結果（PPTX）"""
+    filename = job.result_filename.encode('utf-8')
+    await send_response(writer, 200, job.result, PPTX_CONTENT_TYPE, {
+        'Content-Disposition': f"attachment; filename*=UTF-8''{quote(filename)}",
+        'X-Job-Id': job.id,
+        'X-Run-Seconds': f"{job.run_seconds:.4f}",
+    })
+
+
+class GenerationServer:
+    """HTTP 請求處理"""
+    
+    def __init__(self, job_queue):
+        self.job_queue = job_queue
+    
+    async def handle(self, reader, writer):
+        try:
+            try:
+                method, path, query, headers, body = await read_request(reader)
+                await self.route(writer, method, path, query, headers, body)
+            except HTTPError as e:
+                await send_response(writer, e.status, {'error': str(e)})
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                pass
+            except Exception as e:
+                await send_response(writer, 500, {'error': str(e)})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    async def route(self, writer, method, path, query, headers, body):
+        parts = [part for part in path.split('/') if part]
+        
+        if method == 'GET' and not parts:
+            return await send_response(writer, 200, UPLOAD_FORM, 'text/html; charset=utf-8')
+        
+        if method == 'GET' and parts == ['metrics']:
+            return await send_response(writer, 200, self.job_queue.metrics())
+        
+        if parts[:1] == ['jobs'] and len(parts) == 1:
+            if method != 'POST':
+                raise HTTPError(405, "請使用 POST 上傳 docx")
+            return await self.submit(writer, query, headers, body)
+        
+        if method == 'GET' and parts[:1] == ['jobs'] and len(parts) in (2, 3):
+            job = self.job_queue.jobs.get(parts[1])
+            if job is None:
+                raise HTTPError(404, "找不到工作")
+            if len(parts) == 2:
+                return await send_response(writer, 200, job.to_dict())
+            if parts[2] == 'result':
+                if job.status != 'done':
+                    raise HTTPError(409, f"工作尚未完成（{job.status}）")
+                return await send_result(writer, job)
+        
+        raise HTTPError(404, "找不到頁面")
+    
+    async def submit(self, writer, query, headers, body):
+        content_type = headers.get('content-type', '')
+        if content_type.startswith('multipart/form-data'):
+            filename, docx_bytes = parse_multipart(body, content_type)
+        else:
+            filename, docx_bytes = query.get('filename', ['input.docx'])[0], body
+        if not docx_bytes:
+            raise HTTPError(400, "上傳的檔案是空的")
+        
+        job = self.job_queue.submit(filename, docx_bytes)
+        if job is None:
+            raise HTTPError(503, "佇列已滿，請稍後再試")
+        
+        if query.get('wait', ['0'])[0] not in ('1', 'true'):
+            return await send_response(writer, 202, job.to_dict(), extra_headers={
+                'Location': f"/jobs/{job.id}",
+            })
+        
+        await job.done.wait()
+        if job.status != 'done':
+            raise HTTPError(500, job.error or "生成失敗")
+        return await send_result(writer, job)
+
+
+async def serve(host, port, template_path, config_path, workers, max_queue):
+    job_queue = JobQueue(template_path, config_path, workers=workers, max_queue=max_queue)
+    job_queue.start()
+    server = await asyncio.start_server(GenerationServer(job_queue).handle, host, port)
+    print(f"🌐 服務已啟動：http://{host}:{port}/")
+    print(f"⚙️  子程序：{workers} 個，佇列上限：{max_queue}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await job_queue.stop()
+
+
+def main():
+    """主程式"""
+    parser = argparse.ArgumentParser(description="Word 轉 PPT 本機 HTTP 服務")
+    parser.add_argument('--host', default='127.0.0.1', help="監聽位址（預設 127.0.0.1）")
+    parser.add_argument('--port', type=int, default=8000, help="監聽埠號（預設 8000）")
+    parser.add_argument('--workers', type=int, default=2, help="生成用的子程序數量（預設 2）")
+    parser.add_argument('--queue', type=int, default=16, help="等待中工作的上限（預設 16）")
+    parser.add_argument('--template', default='template.pptx', help="模板 PPT")
+    parser.add_argument('--config', default='config.txt', help="設定檔")
+    args = parser.parse_args()
+    
+    # 啟動前先檢查設定，避免每個工作都失敗
+    try:
+        load_build_plan(args.config, args.template)
+    except ConfigError as e:
+        print(f"❌ 設定錯誤：{e}")
+        return 1
+    except OSError as e:
+        print(f"❌ 錯誤：{e}")
+        return 1
+    
+    try:
+        asyncio.run(serve(args.host, args.port, os.path.abspath(args.template),
+                          os.path.abspath(args.config), args.workers, args.queue))
+    except KeyboardInterrupt:
+        print("\n👋 服務已停止")
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+載入 1_extract.py / 2_generate.py 兩個程式模組
+
+兩個程式的檔名以數字開頭，無法直接 import，這裡統一用 importlib 載入，
+並提供給子程序（multiprocessing）使用的工作函式。
+"""
+
+import os
+import sys
+import importlib.util
+
+
+STAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+EXTRACT_STAGE = '1_extract.py'
+GENERATE_STAGE = '2_generate.py'
+
+
+def load_stage(filename):
+    """
+    載入程式模組（同一個程序內只載入一次）
+    
+    Args:
+        filename: 程式檔名，例如 '2_generate.py'
+    
+    Returns:
+        module: 載入的模組
+    """
+    # 目前執行的主程式就是要載入的模組時直接使用（包含打包後的執行檔與子程序）
+    main_module = sys.modules.get('__main__')
+    main_file = getattr(main_module, '__file__', None)
+    if main_file and os.path.basename(main_file) == filename:
+        return main_module
+    
+    name = '_stage_' + os.path.splitext(filename)[0]
+    module = sys.modules.get(name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(STAGE_DIR, filename))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+def extract_stage():
+    """載入 1_extract.py"""
+    return load_stage(EXTRACT_STAGE)
+
+
+def generate_stage():
+    """載入 2_generate.py"""
+    return load_stage(GENERATE_STAGE)
+
+
+def render_chunk(template_path, variables, specs, cache_options=None):
+    """
+    子程序工作函式：依模板產生一段投影片的 XML
+    
+    Args:
+        template_path: 模板 PPT 路徑
+        variables: 變數字典
+        specs: SlideSpec 列表
+        cache_options: 文字框快取的 (目錄, 大小上限)，None 表示不使用快取
+    
+    Returns:
+        tuple: (每張投影片的 XML（bytes）列表, 快取統計)
+    """
+    return generate_stage().render_slides_xml(template_path, variables, specs, cache_options)
+
+
+def render_template(template_path, output_path, plan, variables, content_lines, options):
+    """
+    子程序工作函式：以另一個模板生成同一份內容並儲存
+    
+    Returns:
+        dict: 生成結果（見 2_generate.render_template）
+    """
+    return generate_stage().render_template(template_path, output_path, plan, variables,
+                                            content_lines, options)
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模板分析 - 找出模板每一頁的文字框各自負責哪個欄位（角色）
+
+使用方式：
+    python template_analysis.py validate-template [template]
+
+功能：
+    - 直接讀取 pptx 內的 XML（不需載入 python-pptx），一次分析所有模板頁
+    - 模板頁以投影片名稱或 {{頁面:聖餐頁}} 標記命名，config 可直接使用這些頁面設計；
+      沒有命名時，第 1-5 頁依序為封面頁、禮拜流程頁、主題頁、內容頁、經文頁
+    - 文字框可用名稱、替代文字或框內的 {{日期}} 等標記指定角色
+    - 沒有指定角色的文字框，依位置判斷（日期禮拜類型、主題、經文章節、小標題…）
+    - 回報找不到對應的文字框、對應到多個角色的文字框、以及缺少的角色
+    - 分析結果以模板雜湊快取（template.analysis.json），生成時直接查表
+"""
+
+import sys
+import os
+import json
+import time
+import zipfile
+import re
+import posixpath
+from lxml import etree
+
+from build_plan import compute_template_hash
+from workspace import atomic_write
+
+
+# 分析結果格式版本（格式或判斷規則變更時遞增，舊的分析檔會自動重新分析）
+ANALYSIS_VERSION = 3
+
+# 內建頁面類型預設使用的模板頁索引（模板中沒有以該名稱命名的頁面時使用）
+DEFAULT_DESIGNS = {
+    '封面頁': 0,
+    '禮拜流程頁': 1,
+    '主題頁': 2,
+    '內容頁': 3,
+    '經文頁': 4,
+}
+
+# 各頁面類型的文字框角色
+PAGE_ROLES = {
+    '封面頁': ['日期禮拜類型', '小標題', '經文章節'],
+    '禮拜流程頁': ['內容'],
+    '主題頁': ['日期禮拜類型', '主題', '經文章節', '小標題'],
+    '內容頁': ['內容'],
+    '經文頁': ['經文'],
+}
+
+# 標記（{{日期}}、文字框名稱、替代文字）對應的角色
+TOKEN_ROLES = {
+    '日期': '日期禮拜類型',
+    '禮拜類型': '日期禮拜類型',
+    '日期禮拜類型': '日期禮拜類型',
+    '主題': '主題',
+    '經文章節': '經文章節',
+    '小標題': '小標題',
+    '內容': '內容',
+    '經文': '經文',
+}
+
+TOKEN_PATTERN = re.compile(r'\{\{\s*(.+?)\s*\}\}')
+
+# 模板頁名稱標記（寫在文字框名稱、替代文字或文字中）：{{頁面:聖餐頁}}
+DESIGN_TAG_PATTERN = re.compile(r'\{\{\s*頁面\s*[:：]\s*(.+?)\s*\}\}')
+
+# 沒有以標記指定角色時，依位置判斷角色的模板頁：(角色, 文字框上緣位置（英吋）)，依序比對，先符合的優先
+POSITION_ROLES = {
+    '封面頁': [
+        ('日期禮拜類型', 1.23),
+        ('小標題', 4.30),
+        ('經文章節', 3.40),
+    ],
+    '主題頁': [
+        ('日期禮拜類型', 0.51),
+        ('主題', 1.72),
+        ('經文章節', 3.76),
+        ('小標題', 4.46),
+    ],
+}
+
+# 沒有以標記指定角色時，使用第一個文字框的模板頁
+FIRST_TEXTBOX_ROLES = {
+    '禮拜流程頁': '內容',
+    '內容頁': '內容',
+    '經文頁': '經文',
+}
+
+# 角色來源的說明文字
+SOURCE_LABELS = {
+    'name': '名稱',
+    'alt': '替代文字',
+    'token': '標記',
+    'position': '位置',
+    'first': '第一個文字框',
+}
+
+# 位置比對的容差（英吋）
+POSITION_TOLERANCE = 0.1
+
+EMU_PER_INCH = 914400
+
+NS = {
+    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
+    'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+}
+
+
+def _read_rels(zf, partname):
+    """讀取 part 的關聯元素（沒有關聯檔時為空列表）"""
+    rels_name = posixpath.join(posixpath.dirname(partname), '_rels', posixpath.basename(partname) + '.rels')
+    try:
+        root = etree.fromstring(zf.read(rels_name))
+    except KeyError:
+        return []
+    return root.findall('rel:Relationship', NS)
+
+
+def part_rels(zf, partname):
+    """
+    讀取 part 的關聯（不含外部連結）
+    
+    Returns:
+        dict: rId → (關聯類型（最後一段，例如 slideLayout）, 目標 part 名稱)
+    """
+    rels = {}
+    for rel in _read_rels(zf, partname):
+        if rel.get('TargetMode') == 'External':
+            continue
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(partname), rel.get('Target')))
+        rels[rel.get('Id')] = (rel.get('Type').rsplit('/', 1)[-1], target)
+    return rels
+
+
+def external_rels(zf, partname):
+    """
+    讀取 part 的外部連結關聯（超連結等）
+    
+    Returns:
+        dict: rId → (關聯類型（最後一段，例如 hyperlink）, 連結網址)
+    """
+    return {rel.get('Id'): (rel.get('Type').rsplit('/', 1)[-1], rel.get('Target'))
+            for rel in _read_rels(zf, partname) if rel.get('TargetMode') == 'External'}
+
+
+def read_template_slides(template_path):
+    """
+    依投影片順序讀取模板每一頁的 XML
+    
+    Args:
+        template_path: 模板 PPT 路徑
+    
+    Returns:
+        list: 每一頁的 p:sld 元素
+    """
+    with zipfile.ZipFile(template_path) as zf:
+        presentation = etree.fromstring(zf.read('ppt/presentation.xml'))
+        rels = etree.fromstring(zf.read('ppt/_rels/presentation.xml.rels'))
+        targets = {rel.get('Id'): rel.get('Target') for rel in rels.iterfind('rel:Relationship', NS)}
+        
+        slides = []
+        for sld_id in presentation.iterfind('p:sldIdLst/p:sldId', NS):
+            target = targets[sld_id.get(f"{{{NS['r']}}}id")]
+            slides.append(etree.fromstring(zf.read(posixpath.normpath(posixpath.join('ppt', target)))))
+    return slides
+
+
+def list_text_boxes(sld):
+    """
+    列出投影片上的文字框（與 python-pptx 相同，只看最上層的 p:sp）
+    
+    Returns:
+        list: dict（id、name、descr（替代文字）、top（英吋，沒有位置時為 None）、text）
+    """
+    boxes = []
+    for sp in sld.iterfind('p:cSld/p:spTree/p:sp', NS):
+        c_nv_pr = sp.find('p:nvSpPr/p:cNvPr', NS)
+        off = sp.find('p:spPr/a:xfrm/a:off', NS)
+        boxes.append({
+            'id': int(c_nv_pr.get('id')),
+            'name': c_nv_pr.get('name', ''),
+            'descr': ' '.join(filter(None, [c_nv_pr.get('title'), c_nv_pr.get('descr')])),
+            'top': int(off.get('y')) / EMU_PER_INCH if off is not None else None,
+            'text': '\n'.join(''.join(t.text or '' for t in p.iterfind('.//a:t', NS))
+                              for p in sp.iterfind('p:txBody/a:p', NS)),
+        })
+    return boxes
+
+
+def design_tag(sld, boxes):
+    """
+    模板頁的設計名稱：投影片名稱（cSld name）或 {{頁面:名稱}} 標記
+    
+    Returns:
+        tuple: (名稱（沒有命名時為 None）, 標記所在的文字框 ID 集合)
+    """
+    tag_ids = set()
+    tag_name = None
+    for box in boxes:
+        for value in (box['name'], box['descr'], box['text']):
+            match = DESIGN_TAG_PATTERN.search(value)
+            if match:
+                tag_ids.add(box['id'])
+                tag_name = tag_name or match.group(1)
+                break
+    name = (sld.find('p:cSld', NS).get('name') or '').strip()
+    return name or tag_name, tag_ids
+
+
+def tagged_roles(box):
+    """
+    文字框以標記指定的角色
+    
+    依序檢查：文字框名稱、替代文字、框內文字的 {{標記}}。
+    名稱與替代文字可以直接寫角色名稱（例如「主題」）或寫成 {{主題}}。
+    
+    Returns:
+        tuple: (角色集合, 來源)；沒有標記時角色集合為空
+    """
+    for source, value in (('name', box['name']), ('alt', box['descr'])):
+        tokens = TOKEN_PATTERN.findall(value) or [value.strip()]
+        roles = {TOKEN_ROLES[token] for token in tokens if token in TOKEN_ROLES}
+        if roles:
+            return roles, source
+    roles = {TOKEN_ROLES[token] for token in TOKEN_PATTERN.findall(box['text']) if token in TOKEN_ROLES}
+    return roles, 'token' if roles else None
+
+
+def match_roles(kind, boxes):
+    """
+    判斷一頁模板的文字框角色（先看標記，沒有標記的角色再依位置或第一個文字框判斷）
+    
+    Args:
+        kind: 頁面類型（None 表示不屬於任何頁面類型的額外設計，只看標記）
+        boxes: list_text_boxes 的結果
+    
+    Returns:
+        dict: roles（文字框 ID → 角色，依文字框順序）、sources（角色來源）、
+              unmatched、ambiguous、missing
+    """
+    expected = PAGE_ROLES.get(kind)
+    assigned = {}
+    sources = {}
+    ambiguous = []
+    
+    # 以名稱、替代文字、{{標記}} 指定的角色
+    for box in boxes:
+        roles, source = tagged_roles(box)
+        if expected is not None:
+            roles = {role for role in roles if role in expected}
+        if len(roles) > 1:
+            ambiguous.append({'ids': [box['id']], 'roles': sorted(roles)})
+        if roles:
+            assigned[box['id']] = sorted(roles)[0]
+            sources[box['id']] = source
+    tagged = set(assigned.values())
+    
+    # 沒有標記的角色：依位置或第一個文字框判斷
+    if kind in FIRST_TEXTBOX_ROLES:
+        role = FIRST_TEXTBOX_ROLES[kind]
+        if role not in tagged:
+            for box in boxes:
+                if box['id'] not in assigned:
+                    assigned[box['id']] = role
+                    sources[box['id']] = 'first'
+                    break
+    elif kind in POSITION_ROLES:
+        rules = [(role, top) for role, top in POSITION_ROLES[kind] if role not in tagged]
+        for box in boxes:
+            if box['id'] in assigned or box['top'] is None:
+                continue
+            candidates = [role for role, top in rules if abs(box['top'] - top) < POSITION_TOLERANCE]
+            if not candidates:
+                continue
+            if len(candidates) > 1:
+                ambiguous.append({'ids': [box['id']], 'roles': candidates})
+            assigned[box['id']] = candidates[0]
+            sources[box['id']] = 'position'
+    
+    # 依文字框順序排列（生成時依此順序建立文字框）
+    roles = {str(box['id']): assigned[box['id']] for box in boxes if box['id'] in assigned}
+    
+    # 多個文字框對應到同一個角色
+    for role in expected or sorted(set(roles.values())):
+        ids = [int(shape_id) for shape_id, r in roles.items() if r == role]
+        if len(ids) > 1:
+            ambiguous.append({'ids': ids, 'roles': [role]})
+    
+    return {
+        'roles': roles,
+        'sources': {str(shape_id): source for shape_id, source in sources.items()},
+        'unmatched': [{'id': box['id'], 'name': box['name'], 'top': box['top'], 'text': box['text']}
+                      for box in boxes if box['id'] not in assigned],
+        'ambiguous': ambiguous,
+        'missing': [role for role in expected or [] if role not in roles.values()],
+    }
+
+
+def analyze_template(template_path, template_hash=None):
+    """
+    分析模板所有頁面的設計名稱與文字框角色
+    
+    Args:
+        template_path: 模板 PPT 路徑
+        template_hash: 模板雜湊（已計算過時傳入）
+    
+    Returns:
+        dict: 分析結果（designs：頁面設計名稱 → 模板頁索引；slides：每一頁的角色）
+    """
+    slides = []
+    for index, sld in enumerate(read_template_slides(template_path)):
+        boxes = list_text_boxes(sld)
+        name, tag_ids = design_tag(sld, boxes)
+        slides.append((index, name, [box for box in boxes if box['id'] not in tag_ids]))
+    
+    # 命名的模板頁優先，內建頁面類型沒有命名時使用預設位置
+    designs = {}
+    duplicates = []
+    for index, name, _ in slides:
+        if name is None:
+            continue
+        if name in designs:
+            duplicates.append(name)
+        else:
+            designs[name] = index
+    for kind, index in DEFAULT_DESIGNS.items():
+        if kind not in designs and index < len(slides) and slides[index][1] not in DEFAULT_DESIGNS:
+            designs[kind] = index
+    
+    kinds = {index: kind for kind, index in designs.items() if kind in DEFAULT_DESIGNS}
+    pages = []
+    for index, name, boxes in slides:
+        page = match_roles(kinds.get(index), boxes)
+        page['index'] = index
+        page['name'] = name
+        page['kind'] = kinds.get(index)
+        pages.append(page)
+    
+    return {
+        'version': ANALYSIS_VERSION,
+        'template_hash': template_hash or compute_template_hash(template_path),
+        'page_count': len(pages),
+        'designs': designs,
+        'duplicates': duplicates,
+        'slides': pages,
+    }
+
+
+def analysis_problems(analysis):
+    """
+    整理分析結果中的問題
+    
+    Returns:
+        tuple: (錯誤訊息列表, 警告訊息列表)
+    """
+    errors = []
+    warnings = []
+    for kind, index in DEFAULT_DESIGNS.items():
+        if kind not in analysis['designs']:
+            errors.append(f"缺少「{kind}」頁面設計（請將模板頁命名為「{kind}」或放在第 {index + 1} 頁）")
+    for name in analysis['duplicates']:
+        errors.append(f"頁面設計名稱「{name}」重複，只會使用第一個")
+    
+    for page in analysis['slides']:
+        design = page['kind'] or page['name']
+        if design is None or analysis['designs'].get(design) != page['index']:
+            # 沒有被任何頁面類型使用的模板頁
+            continue
+        prefix = f"第 {page['index'] + 1} 頁（{design}）"
+        if page['kind'] is None and not page['roles']:
+            warnings.append(f"{prefix}沒有以名稱、替代文字或 {{{{標記}}}} 指定角色的文字框")
+        for role in page['missing']:
+            errors.append(f"{prefix}找不到「{role}」文字框")
+        for item in page['ambiguous']:
+            ids = '、'.join(str(shape_id) for shape_id in item['ids'])
+            roles = '、'.join(item['roles'])
+            errors.append(f"{prefix}文字框 {ids} 無法確定角色（{roles}）")
+        for box in page['unmatched']:
+            top = f"{box['top']:.2f}\"" if box['top'] is not None else "無位置"
+            preview = box['text'].replace('\n', ' ')[:20]
+            warnings.append(f"{prefix}文字框 {box['id']}「{box['name']}」（top {top}）不會被使用：{preview}")
+    return errors, warnings
+
+
+def default_analysis_path(template_path):
+    """template.pptx → template.analysis.json"""
+    return os.path.splitext(template_path)[0] + '.analysis.json'
+
+
+def load_template_analysis(template_path, analysis_path=None):
+    """
+    載入模板分析：分析檔的模板雜湊相符時直接使用，否則重新分析並儲存
+    
+    Args:
+        template_path: 模板 PPT 路徑
+        analysis_path: 分析檔路徑（預設與模板同目錄的 .analysis.json）
+    
+    Returns:
+        dict: 分析結果
+    """
+    if analysis_path is None:
+        analysis_path = default_analysis_path(template_path)
+    template_hash = compute_template_hash(template_path)
+    
+    try:
+        with open(analysis_path, 'r', encoding='utf-8') as f:
+            analysis = json.load(f)
+        if (isinstance(analysis, dict) and analysis.get('version') == ANALYSIS_VERSION
+                and analysis.get('template_hash') == template_hash):
+            return analysis
+    except (OSError, ValueError):
+        pass
+    
+    analysis = analyze_template(template_path, template_hash)
+    try:
+        # 同一個模板可能有多個工作同時分析，寫入暫存檔後才改名
+        with atomic_write(analysis_path, 'w', encoding='utf-8') as f:
+            json.dump(analysis, f, ensure_ascii=False, indent=2)
+    except OSError:
+        # 分析檔只是快取，無法寫入時不影響生成
+        pass
+    return analysis
+
+
+def main():
+    """主程式：檢查模板文字框"""
+    args = sys.argv[1:]
+    if args and args[0] == 'validate-template':
+        args = args[1:]
+    template_path = args[0] if args else "template.pptx"
+    
+    if template_path in ['-h', '--help', 'help']:
+        print("使用方式：")
+        print("  python template_analysis.py validate-template [template]")
+        print()
+        print("檢查模板每個文字框對應的欄位，並儲存分析結果（template.analysis.json）")
+        return 0
+    
+    start = time.perf_counter()
+    try:
+        analysis = load_template_analysis(template_path)
+    except (OSError, KeyError, zipfile.BadZipFile, etree.XMLSyntaxError) as e:
+        print(f"❌ 無法讀取模板 {template_path}：{e}")
+        return 1
+    elapsed = time.perf_counter() - start
+    
+    print(f"📄 模板：{template_path}（{analysis['page_count']} 頁）")
+    for page in analysis['slides']:
+        roles = '、'.join(f"{role}={shape_id}（{SOURCE_LABELS[page['sources'][shape_id]]}）"
+                         for shape_id, role in page['roles'].items())
+        names = [name for name, index in analysis['designs'].items() if index == page['index']]
+        print(f"  第 {page['index'] + 1} 頁 {'、'.join(names) or '（未使用）'}：{roles or '（無）'}")
+    
+    errors, warnings = analysis_problems(analysis)
+    for warning in warnings:
+        print(f"⚠️  {warning}")
+    for error in errors:
+        print(f"❌ {error}")
+    print(f"⏱️  {elapsed * 1000:.0f} ms")
+    
+    if errors:
+        print(f"\n❌ 模板檢查失敗：{len(errors)} 個錯誤")
+        return 1
+    print(f"\n✅ 模板檢查通過")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
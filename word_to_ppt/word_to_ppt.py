@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Word 轉 PPT 工具 - 單一執行檔的入口（extract、generate、run 子指令）
+
+使用方式：
+    python word_to_ppt.py extract [Word檔案] [選項]                     # 同 1_extract.py
+    python word_to_ppt.py generate [template] [input] [config] [output] # 同 2_generate.py
+    python word_to_ppt.py run [Word檔案] [template] [config] [output]   # Word 直接生成 PPT
+
+打包成一個執行檔後，完整流程只需要啟動一次（解壓縮與載入 Python、python-pptx 只做一次）；
+run 在同一個程序內完成提取與生成，文字區塊直接傳遞，不需要寫入再讀取 output.txt。
+"""
+
+import os
+import sys
+import hashlib
+import argparse
+import traceback
+import multiprocessing
+
+from build_plan import ConfigError
+from pipeline import Pipeline
+from workspace import atomic_write, enter_workdir, write_error_log
+from events import open_event_stream, EXIT_OK, EXIT_ERROR, EXIT_INVALID
+import stages
+
+
+PROGRAM = 'word_to_ppt'
+
+# 子指令 → (程式檔, 說明)
+STAGE_COMMANDS = {
+    'extract': (stages.EXTRACT_STAGE, "從 Word 文件提取藍色文字到 output.txt"),
+    'generate': (stages.GENERATE_STAGE, "依 output.txt 與 config.txt 生成 PPT"),
+}
+
+
+def print_usage():
+    """顯示使用說明"""
+    print("📖 Word 轉 PPT 工具")
+    print("=" * 70)
+    print()
+    print("使用方式：")
+    print(f"  {PROGRAM} 子指令 [參數...]")
+    print()
+    print("子指令：")
+    for command, (_, description) in STAGE_COMMANDS.items():
+        print(f"  {command:<9} - {description}")
+    print("  run       - Word 文件直接生成 PPT（同一個程序內完成，不經過 output.txt）")
+    print("  batch     - 大量檔案的批次提取與生成（中斷後重新執行即可續跑）")
+    print()
+    print("各子指令的參數：")
+    print(f"  {PROGRAM} extract --help")
+    print(f"  {PROGRAM} generate --help")
+    print(f"  {PROGRAM} run --help")
+    print(f"  {PROGRAM} batch --help")
+    print()
+    print("範例：")
+    print(f"  {PROGRAM} run 20251231.docx")
+    print("    → 從 20251231.docx 提取文字並生成 output.pptx")
+    print()
+    print(f"  {PROGRAM} extract 20251231.docx")
+    print(f"  {PROGRAM} generate")
+    print("    → 分兩步驟執行，中間可以編輯 output.txt")
+    print()
+    print("=" * 70)
+
+
+def run(argv):
+    """
+    run 子指令：Word 文件 → PPT（提取結果直接在記憶體中傳給生成器）
+    
+    Returns:
+        int: 結束碼
+    """
+    generate_module = stages.generate_stage()
+    extract_module = stages.extract_stage()
+    
+    parser = argparse.ArgumentParser(prog=f"{PROGRAM} run",
+                                     description="Word 文件直接生成 PPT（同一個程序內完成提取與生成）")
+    parser.add_argument('input', nargs='?', default=None, help="Word 文件（預設：input.docx）")
+    parser.add_argument('template', nargs='?', default=None, help="模板 PPT（預設：template.pptx）")
+    parser.add_argument('config', nargs='?', default=None, help="設定檔（預設：config.txt）")
+    parser.add_argument('output', nargs='?', default=None, help="輸出 PPT（預設：output.pptx）")
+    parser.add_argument('--txt', default=None, help="同時輸出 output.txt 格式的文字檔（檢查提取結果用）")
+    parser.add_argument('--jobs', type=int, default=1, help="平行生成的程序數量（預設 1）")
+    parser.add_argument('--reproducible', action='store_true', help="可重現輸出")
+    parser.add_argument('--compress-level', type=int, choices=range(10), default=None, help="XML 壓縮等級 0-9")
+    parser.add_argument('--store-media', action='store_true', help="已壓縮的媒體不再壓縮")
+    parser.add_argument('--no-cache', action='store_true', help="不使用提取結果與文字框快取")
+    parser.add_argument('--workdir', default=None, help="獨立的工作目錄（預設檔名、快取與 error.log 放在此目錄）")
+    parser.add_argument('--headless', action='store_true', help="不等待按鍵，標準輸出改為 NDJSON 進度事件")
+    args = parser.parse_args(argv)
+    
+    events = open_event_stream(args.headless, f"{PROGRAM} run")
+    workdir = None
+    if args.workdir:
+        workdir = enter_workdir(args.workdir, args, ('input', 'template', 'config', 'output', 'txt'))
+    input_path = args.input or "input.docx"
+    template_path = args.template or "template.pptx"
+    config_path = args.config or "config.txt"
+    output_path = args.output or "output.pptx"
+    
+    print("\n" + "=" * 60)
+    print("📊 Word 轉 PPT")
+    print("=" * 60)
+    print(f"Word 文件：{input_path}")
+    print(f"模板檔案：{template_path}")
+    print(f"設定檔案：{config_path}")
+    print(f"輸出檔案：{output_path}")
+    if workdir:
+        print(f"工作目錄：{workdir}")
+    print("=" * 60 + "\n")
+    events.emit('job_start', input=input_path, template=template_path, config=config_path,
+                output=output_path, workdir=workdir or os.getcwd())
+    
+    if not os.path.exists(input_path):
+        print(f"❌ 錯誤：找不到檔案 '{input_path}'")
+        events.error(FileNotFoundError(f"找不到檔案 '{input_path}'"))
+        return events.job_end(EXIT_INVALID)
+    
+    try:
+        with events.stage('load', template=template_path, config=config_path):
+            pipeline = Pipeline(
+                template_path, config_path, jobs=args.jobs, quiet=False,
+                reproducible=args.reproducible, compress_level=args.compress_level, store_media=args.store_media,
+                cache_dir=None if args.no_cache else extract_module.DEFAULT_CACHE_DIR,
+                cache_mb=extract_module.DEFAULT_CACHE_MB,
+                slide_cache_dir=None if args.no_cache else generate_module.DEFAULT_SLIDE_CACHE_DIR,
+                slide_cache_mb=generate_module.DEFAULT_SLIDE_CACHE_MB,
+                events=events)
+        
+        extractor = pipeline.extract(input_path)
+        print(f"\n✅ 提取 {len(extractor.extracted_text)} 段文字\n")
+        if args.txt:
+            with atomic_write(args.txt, 'w', encoding='utf-8') as f:
+                f.write(extractor.format_output_text())
+            print(f"📝 提取結果已儲存到：{args.txt}\n")
+            events.emit('output', path=args.txt, blocks=len(extractor.extracted_text))
+        
+        data = pipeline.generate(extractor.output_variables(), extractor.extracted_text)
+        with events.stage('save', output=output_path):
+            with atomic_write(output_path) as f:
+                f.write(data)
+        sha256 = hashlib.sha256(data).hexdigest() if args.reproducible else None
+        
+        print(f"\n✅ PPT 生成完成！")
+        print(f"💾 已儲存到：{output_path}")
+        if sha256:
+            print(f"🔑 SHA-256：{sha256}")
+        events.emit('output', path=output_path, template=template_path, sha256=sha256)
+    
+    except ConfigError as e:
+        print(f"❌ 設定錯誤：{e}")
+        events.error(e)
+        return events.job_end(EXIT_INVALID)
+    except Exception as e:
+        print(f"❌ 錯誤：{e}")
+        traceback.print_exc()
+        events.error(e)
+        return events.job_end(EXIT_ERROR)
+    
+    return events.job_end(EXIT_OK)
+
+
+def main(argv=None):
+    """
+    主程式：依子指令執行
+    
+    Returns:
+        int: 結束碼
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    # 沒有子指令（只有選項，例如 --headless）時顯示使用說明
+    if not argv or argv[0] in ('-h', '--help', 'help') or argv[0].startswith('-'):
+        print_usage()
+        return EXIT_OK
+    
+    command, rest = argv[0], argv[1:]
+    if command in STAGE_COMMANDS:
+        # 原本的程式（參數、說明與結束碼都相同）
+        module = stages.load_stage(STAGE_COMMANDS[command][0])
+        sys.argv = [f"{PROGRAM} {command}"] + rest
+        module.main()
+        return EXIT_OK
+    if command == 'run':
+        return run(rest)
+    if command == 'batch':
+        import batch
+        sys.argv = [f"{PROGRAM} batch"] + rest
+        return batch.main()
+    
+    print(f"❌ 未知的子指令：{command}\n")
+    print_usage()
+    return EXIT_INVALID
+
+
+if __name__ == "__main__":
+    # 打包成執行檔後，平行生成的子程序需要此呼叫
+    multiprocessing.freeze_support()
+    # --headless：不等待按鍵，由結束碼與事件串流回報結果
+    headless = '--headless' in sys.argv[1:]
+    try:
+        sys.exit(main())
+    except Exception as e:
+        # 記錄錯誤到檔案（使用 --workdir 時在工作目錄中）
+        try:
+            write_error_log(PROGRAM, e, traceback.format_exc())
+        except:
+            pass
+        
+        print(f"\n{'='*60}")
+        print(f"❌ 發生錯誤")
+        print(f"{'='*60}")
+        print(f"錯誤訊息: {e}")
+        print(f"\n錯誤詳細資訊已記錄到 error.log")
+        print(f"請將 error.log 提供給開發者協助除錯")
+        print(f"{'='*60}")
+        sys.exit(EXIT_ERROR)
+    finally:
+        if not headless:
+            input("\n按 Enter 鍵退出...")
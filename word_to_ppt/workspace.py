@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作目錄與原子寫入 - 讓多個工作可以在同一台機器上同時執行
+
+輸出檔先寫入同目錄的暫存檔，寫完才改名成目標檔名（os.replace 是原子操作）：
+其他程序只會看到舊檔或完整的新檔，程式中途當掉也不會留下寫一半的簡報。
+
+每個工作可用 --workdir 指定自己的工作目錄：命令列指定的路徑仍相對於原本的目錄，
+沒有指定時使用的預設檔名（output.txt、config.txt、output.pptx、error.log、快取目錄）
+則放在工作目錄中，不同工作不會互相覆蓋。
+"""
+
+import os
+import tempfile
+import contextlib
+from datetime import datetime
+
+
+ERROR_LOG = 'error.log'
+
+
+def _new_file_mode(path):
+    """新檔案的權限：沿用既有檔案，沒有時依 umask（mkstemp 建立的暫存檔只有擁有者可讀寫）"""
+    try:
+        return os.stat(path).st_mode & 0o777
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode='wb', encoding=None):
+    """
+    原子寫入檔案：在同目錄的暫存檔中寫入，離開 with 區塊時才改名成 path
+    （發生例外時刪除暫存檔，原本的檔案保持不變）
+
+    with atomic_write('output.pptx') as f:
+        f.write(data)
+
+    Args:
+        path: 目標檔案路徑
+        mode: 開啟模式（'wb' 或 'w'）
+        encoding: 文字模式的編碼
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+        os.chmod(tmp_path, _new_file_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def enter_workdir(workdir, args, path_options):
+    """
+    切換到工作目錄（不存在時建立）
+
+    Args:
+        workdir: 工作目錄
+        args: argparse 結果；path_options 列出的路徑參數先轉成絕對路徑
+              （命令列指定的路徑相對於原本的目錄，未指定的為 None，之後使用工作目錄中的預設檔名）
+        path_options: 路徑參數名稱（值可以是路徑或路徑列表）
+
+    Returns:
+        str: 工作目錄的絕對路徑
+    """
+    for name in path_options:
+        value = getattr(args, name)
+        if isinstance(value, list):
+            setattr(args, name, [os.path.abspath(path) for path in value])
+        elif value:
+            setattr(args, name, os.path.abspath(value))
+
+    workdir = os.path.abspath(workdir)
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    return workdir
+
+
+def write_error_log(program, error, details, path=ERROR_LOG):
+    """
+    記錄錯誤到目前工作目錄的 error.log（一次寫入整筆記錄，同時發生的錯誤不會交錯）
+
+    Args:
+        program: 程式名稱
+        error: 例外
+        details: 詳細資訊（traceback）
+        path: 記錄檔路徑
+    """
+    record = (f"\n{'='*60}\n"
+              f"錯誤時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+              f"程式: {program}\n"
+              f"工作目錄: {os.getcwd()}\n"
+              f"錯誤訊息: {str(error)}\n"
+              f"詳細資訊:\n{details}\n")
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(record)